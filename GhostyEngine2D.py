@@ -1,4 +1,4 @@
-import os, sys, json, copy, io, base64, subprocess
+import os, sys, json, copy, io, base64, subprocess, math, queue
 from typing import List, Dict, Tuple, Any, Optional, Union, cast
 
 import pygame
@@ -8,14 +8,18 @@ from theme import (
     LEFTBAR_W, RIGHTBAR_W, TOPBAR_H, TABS_H, STATUS_H, WIN_W, WIN_H,
     C_BG, C_PANEL, C_FRAME, C_TEXT, C_TEXT_DIM,
     MASK_DRAW_COLOR, MASK_ERASE_COLOR, LINE_WIDTH_DEFAULT, DOUBLE_CLICK_MS,
-    ENTRY_NEXT_BAKE_COLOR, ENTRY_BACK_BAKE_COLOR,
     DOOR_NEXT_OVERLAY_OUTLINE, DOOR_BACK_OVERLAY_OUTLINE,
-    DOOR_NEXT_BAKE_COLOR, DOOR_BACK_BAKE_COLOR,
     SPAWN_COLOR, SPAWN_BORDER, SPAWN_SIZE,
     ENTRY_NEXT_OVERLAY, ENTRY_BACK_OVERLAY, ENTRY_MARK_SIZE,
     C_CHECKER_A, C_CHECKER_B,
+    WIDTH_MIN, WIDTH_MAX,
     clamp,
 )
+from raster import (
+    orthogonalize_pts,
+    stroke_bounds as _raster_stroke_bounds,
+    axis_segment_rect, stroke_width, place_image_onto_canvas,
+)
 
 from ui_widgets import px_rect, px_button, text, trunc_text
 from ui_panels import (
@@ -24,12 +28,18 @@ from ui_panels import (
 )
 
 from start_menu import draw_start_menu, handle_event as startmenu_handle
+from recents import get_store as recents_get_store
+from persist import project_meta, write_project_file, bake_mask_surface
+from thumbs import ThumbIndex, ThumbPipeline, make_thumbnail_png, thumb_fit
+from journal import Journal, pending_records, replay as journal_replay
+from geom import simplify_stroke_pts, simplify_tolerance, smooth_pts, lod_polyline
+from outlines import WallUnion
+from zoomscale import ZoomScaler, blit_stretched
+from tiledmask import TiledMask
+from pagedbg import PagedBackground, open_paged_background, wants_paging
 
 WORLD_W, WORLD_H = 1280, 720
 
-WIDTH_MIN = 1
-WIDTH_MAX = 150
-
 def _discover_resources_root() -> Optional[str]:
     bases = []
     base_mei = getattr(sys, "_MEIPASS", None)
@@ -69,9 +79,6 @@ def resource_path(*parts: str) -> str:
         return os.path.join(_RES_ROOT, *parts)
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), *parts)
 
-pygame.init()
-pygame.display.set_caption("Ghosty Engine 2D (v3.7)")
-
 def _load_icon():
     p = resource_path("icons", "app_icon.ico")
     if os.path.isfile(p):
@@ -81,12 +88,6 @@ def _load_icon():
         except Exception:
             pass
 
-_load_icon()
-
-screen = pygame.display.set_mode((WIN_W, WIN_H), pygame.DOUBLEBUF)
-clock  = pygame.time.Clock()
-app_start_ms = pygame.time.get_ticks()
-
 def _require_font_path() -> str:
     p = resource_path("fonts", "font-default.ttf")
     if os.path.isfile(p):
@@ -107,135 +108,73 @@ def _require_font_path() -> str:
     raise FileNotFoundError(
     )
 
-_FONT_PATH = _require_font_path()
+_FONT_PATH = ""
 
 def _mkfont(size: int) -> pygame.font.Font:
     return pygame.font.Font(_FONT_PATH, size)
 
-font_title     = _mkfont(22)
-font_btn       = _mkfont(18)
-font_layer_hdr = _mkfont(18)
-font_layer     = _mkfont(17)
-font_base      = _mkfont(16)
-font_small     = _mkfont(14)
-font_tiny      = _mkfont(12)
-font_mono      = _mkfont(14)
-
-FONTS = {
-    "title": font_title,
-    "btn":   font_btn,
-    "hdr":   font_layer_hdr,
-    "layer": font_layer,
-    "base":  font_base,
-    "small": font_small,
-    "tiny":  font_tiny,
-    "mono":  font_mono,
-}
+# Filled in by init_window(). Pool workers import this module too (spawned
+# processes re-run the main script's top level), so importing it must not
+# open a window.
+screen: pygame.Surface
+clock: pygame.time.Clock
+app_start_ms = 0
+font_small: pygame.font.Font
+FONTS: Dict[str, pygame.font.Font] = {}
+
+def init_window():
+    global screen, clock, app_start_ms, _FONT_PATH, font_small
+    pygame.init()
+    pygame.display.set_caption("Ghosty Engine 2D (v3.7)")
+    _load_icon()
+
+    screen = pygame.display.set_mode((WIN_W, WIN_H), pygame.DOUBLEBUF)
+    clock  = pygame.time.Clock()
+    app_start_ms = pygame.time.get_ticks()
+
+    _FONT_PATH = _require_font_path()
+    font_small = _mkfont(14)
+    FONTS.update({
+        "title": _mkfont(22),
+        "btn":   _mkfont(18),
+        "hdr":   _mkfont(18),
+        "layer": _mkfont(17),
+        "base":  _mkfont(16),
+        "small": font_small,
+        "tiny":  _mkfont(12),
+        "mono":  _mkfont(14),
+    })
 
 BytesLike = Union[bytes, bytearray, memoryview]
 
+recents_store = recents_get_store()
+thumb_index = ThumbIndex()
+thumb_pipeline = ThumbPipeline(thumb_index)
+wall_union = WallUnion()
+zoom_scaler = ZoomScaler()
+
 def set_world_size(w: int, h: int):
-    global WORLD_W, WORLD_H, mask_world, _last_zoom, _scaled_mask_dirty
+    global WORLD_W, WORLD_H, mask_world, _last_zoom
     WORLD_W, WORLD_H = int(w), int(h)
-    mask_world = pygame.Surface((WORLD_W, WORLD_H)).convert()
-    mask_world.fill(MASK_ERASE_COLOR)
+    mask_world = TiledMask((WORLD_W, WORLD_H))
     _last_zoom = -1.0
-    _scaled_mask_dirty = True
+    touch_overlays()
 
 def _place_image_onto_canvas(img: pygame.Surface, canvas_wh: Tuple[int,int]) -> pygame.Surface:
-    cw, ch = canvas_wh
-    iw, ih = img.get_size()
-    canvas = pygame.Surface((cw, ch)).convert()
-    canvas.fill((255, 255, 255))
-    x = max(0, (cw - iw) // 2)
-    y = max(0, (ch - ih) // 2)
-    src = pygame.Rect(0, 0, min(iw, cw), min(ih, ch))
-    canvas.blit(img, (x, y), area=src)
-    return canvas
+    return place_image_onto_canvas(img, canvas_wh).convert()
 
 def _sanitize_name(s: str) -> str:
     bad = {">", "<", "◄", "►"}
     return "".join(ch for ch in s if ch not in bad).strip()
 
-# ---- Orthogonalization helpers (fix for disconnected auto-straight) ----
-def _dedupe_consecutive(pts: List[Tuple[int,int]]) -> List[Tuple[int,int]]:
-    out: List[Tuple[int,int]] = []
-    last = None
-    for p in pts:
-        if p != last:
-            out.append(p)
-            last = p
-    return out
-
-def orthogonalize_pts(pts: List[Tuple[int,int]]) -> List[Tuple[int,int]]:
-    if not pts:
-        return []
-    out: List[Tuple[int,int]] = [(int(pts[0][0]), int(pts[0][1]))]
-    last_dir: Optional[str] = None  # 'h' or 'v'
-    for i in range(1, len(pts)):
-        x1, y1 = out[-1]
-        x2, y2 = int(pts[i][0]), int(pts[i][1])
-        if x1 == x2 or y1 == y2:
-            out.append((x2, y2))
-            last_dir = 'h' if y1 == y2 else 'v'
-            continue
-        cand_h = (x2, y1) 
-        cand_v = (x1, y2) 
-        if last_dir == 'h':
-            out.append(cand_h); out.append((x2, y2)); last_dir = 'v'
-        elif last_dir == 'v':
-            out.append(cand_v); out.append((x2, y2)); last_dir = 'h'
-        else:
-            if abs(x2 - x1) >= abs(y2 - y1):
-                out.append(cand_h); out.append((x2, y2)); last_dir = 'v'
-            else:
-                out.append(cand_v); out.append((x2, y2)); last_dir = 'h'
-    return _dedupe_consecutive(out)
-
-def _recents_path():
-    appdata = os.environ.get("APPDATA", os.path.expanduser("~"))
-    d = os.path.join(appdata, "Welcome")
-    os.makedirs(d, exist_ok=True)
-    return os.path.join(d, "recent.json")
-
-RECENT_FILE = _recents_path()
-MAX_RECENTS = 12
-
-def _load_json(path, default):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return default
-
-def _save_json(path, data):
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except Exception:
-        pass
-
 def _recent_list():
-    data = _load_json(RECENT_FILE, {"projects": []})
-    items = [p for p in data.get("projects", []) if isinstance(p, str)]
-    items = [p for p in items if os.path.isfile(p)]
-    return items[:MAX_RECENTS]
+    return recents_store.items()
 
 def _remember_recent(path):
-    data = _load_json(RECENT_FILE, {"projects": []})
-    items = [p for p in data.get("projects", []) if isinstance(p, str)]
-    if path in items:
-        items.remove(path)
-    items.insert(0, path)
-    items = items[:MAX_RECENTS]
-    _save_json(RECENT_FILE, {"projects": items})
+    recents_store.remember(path)
 
 def _remove_recent(path):
-    data = _load_json(RECENT_FILE, {"projects": []})
-    items = [p for p in data.get("projects", []) if isinstance(p, str)]
-    if path in items:
-        items.remove(path)
-    _save_json(RECENT_FILE, {"projects": items})
+    recents_store.remove(path)
 
 hidden_recent_stack: List[str] = []
 hidden_recent_set:   set[str]  = set()
@@ -250,25 +189,33 @@ def snapshot_state():
 def restore_state(snap):
     global strokes, doors, sel_kind, sel_idx, brush_w, preview_alpha
     global grid_on, grid_size, simplify_on, sym_x, sym_y, spawn_pos, zoom, ox, oy
-    global entry_next_spawns, entry_back_spawns, _scaled_mask_dirty, _last_zoom
+    global entry_next_spawns, entry_back_spawns, _last_zoom
     (strokes, doors, sel_kind, sel_idx, brush_w, preview_alpha,
      grid_on, grid_size, simplify_on, sym_x, sym_y, spawn_pos, zoom, ox, oy,
      entry_next_spawns, entry_back_spawns) = copy.deepcopy(snap)
-    _scaled_mask_dirty = True
+    touch_overlays()
     _last_zoom = -1.0
     update_mask()
 
-def make_tab_dict(name: str, bg_path: Optional[str], bg_surface: Optional[pygame.Surface]):
+def make_tab_dict(name: str, bg_path: Optional[str], bg_surface: Optional[pygame.Surface],
+                  bg_paged: Optional[PagedBackground] = None):
     return {
         "name": name,
         "bg_path": bg_path,
         "bg_surface": bg_surface,
+        "bg_tiles": bg_paged,
         "state": snapshot_state(),
         "project_path": None,
-        "dirty": False
+        "dirty": False,
+        "journal": None,
     }
 
+def touch_overlays():
+    global overlay_rev
+    overlay_rev += 1
+
 def mark_dirty():
+    touch_overlays()
     if tabs:
         tabs[active_tab]["dirty"] = True
 
@@ -281,7 +228,8 @@ active_tab: int = 0
 
 BG_PATH: Optional[str] = None
 bg_world: Optional[pygame.Surface] = None
-mask_world = pygame.Surface((WORLD_W, WORLD_H)).convert(); mask_world.fill(MASK_ERASE_COLOR)
+bg_tiles: Optional[PagedBackground] = None     # huge backgrounds: drawn from disk tiles, bg_world stays None
+mask_world = TiledMask((WORLD_W, WORLD_H))
 
 edges_overlay: Optional[pygame.Surface] = None
 show_edges = False
@@ -310,7 +258,7 @@ zoom = 1.0
 ox, oy = (VIEW.x + (VIEW.w - WORLD_W)//2), (VIEW.y + (VIEW.h - WORLD_H)//2)
 last_click_time = 0
 
-TOOL_BRUSH = "brush"; TOOL_LINE = "line"; TOOL_MOVE = "move"; TOOL_HAND = "hand"; TOOL_SPAWN = "spawn"
+TOOL_BRUSH = "brush"; TOOL_FREEHAND = "freehand"; TOOL_LINE = "line"; TOOL_MOVE = "move"; TOOL_HAND = "hand"; TOOL_SPAWN = "spawn"
 TOOL_DOOR_NEXT = "door_next"; TOOL_DOOR_BACK = "door_back"
 TOOL_ENTRY_NEXT = "entry_spawn_next"; TOOL_ENTRY_BACK = "entry_spawn_back"
 tool = TOOL_BRUSH
@@ -332,6 +280,13 @@ preview_alpha = 96
 simplify_on = False
 sym_x = False; sym_y = False
 
+status_note = ""; status_note_until = 0
+
+FREEHAND_STEP_SCREEN_PX = 3          # motion samples closer than this (on screen) are dropped
+freehand_active = False
+_fh_layer: Optional[pygame.Surface] = None
+_fh_drawn = 0; _fh_key = None
+
 renaming = False; rename_buf = ""
 
 history_show = False
@@ -353,9 +308,32 @@ file_menu_rect: Optional[pygame.Rect] = None
 
 _last_zoom = -1.0
 _cached_bg: Optional[pygame.Surface] = None
-_cached_mask: Optional[pygame.Surface] = None
 _cached_edges: Optional[pygame.Surface] = None
-_scaled_mask_dirty = True
+_cached_zoom = 0.0                   # the zoom _cached_bg/_cached_edges were scaled for
+
+VECTOR_ZOOM = 2.0                    # from this zoom on strokes are drawn as vectors instead of a scaled mask
+VECTOR_LAYER_MARGIN = 32             # off-screen border, so lines cut by the layer edge never show
+_vector_layer: Optional[pygame.Surface] = None
+_stroke_geom: Dict[int, Tuple[Any, ...]] = {}
+
+# level of detail for overlays, in screen px
+LOD_SEG_PX = 2          # door edges shorter than this get merged into the next one
+LOD_NODE_PX = 6         # node circles only once the outline is at least this thick
+LOD_TINY_PX = 4         # a door smaller than this is drawn as its bounds
+_door_box: Dict[int, Tuple[Any, pygame.Rect]] = {}
+
+# doors and markers are drawn into a cached layer covering the view plus a margin
+OVERLAY_KEY = (255, 0, 255)
+overlay_rev = 0                      # bumped by every edit (mark_dirty), undo/redo and load
+_ovl_surf: Optional[pygame.Surface] = None
+_ovl_key: Optional[Tuple[Any, ...]] = None
+_ovl_origin: Tuple[int, int] = (0, 0)
+
+# the composed view, scrolled while panning
+mask_rev = 0                         # bumped by update_mask
+_vc_surf: Optional[pygame.Surface] = None
+_vc_key: Optional[Tuple[Any, ...]] = None
+_vc_pos: Tuple[int, int] = (0, 0)
 
 def _assets_bat_files() -> List[Tuple[str, str]]:
     """Scan likely 'assets' folders for .bat files; return (display, full_path)."""
@@ -398,48 +376,30 @@ def _run_bat(full_path: str):
     except Exception as ex:
         print(f"[File] Failed to run: {full_path} — {ex}")
 
+def _union_base():
+    # the selected stroke is the one about to change, so the cached layer leaves it out
+    skip = sel_idx if sel_kind == "stroke" else None
+    return skip, [st for i, st in enumerate(strokes) if i != skip and st.get('visible', True)]
+
 def update_mask():
-    global _scaled_mask_dirty
-    mask_world.fill(MASK_ERASE_COLOR)
-    for st in strokes:
-        if not st.get('visible', True):
-            continue
-        draw_stroke_on(mask_world, st, MASK_DRAW_COLOR)
-    _scaled_mask_dirty = True
-
-def _draw_axis_rect_segment_world(surf, col, w, a: Tuple[int,int], b: Tuple[int,int]):
-    x1, y1 = a; x2, y2 = b
-    dx, dy = x2 - x1, y2 - y1
-    if abs(dx) >= abs(dy):
-        x0, x1b = (x2, x1) if x2 < x1 else (x1, x2)
-        rect = pygame.Rect(x0, int(y1 - w//2), (x1b - x0) + 1, w)
+    global mask_rev
+    mask_rev += 1
+    skip, base = _union_base()
+    layer = wall_union.layer_for(base, (WORLD_W, WORLD_H), brush_w)
+    if layer is not None:
+        mask_world.assign(layer)
+        if skip is not None and 0 <= skip < len(strokes) and strokes[skip].get('visible', True):
+            mask_world.draw_stroke(strokes[skip], brush_w)
     else:
-        y0, y1b = (y2, y1) if y2 < y1 else (y1, y2)
-        rect = pygame.Rect(int(x1 - w//2), y0, w, (y1b - y0) + 1)
-    pygame.draw.rect(surf, col, rect)
-
-def draw_stroke_on(surf, st, col):
-    pts = [(int(x), int(y)) for (x, y) in st['pts']]
-    w = max(WIDTH_MIN, int(st.get('w', brush_w)))
-    if st['mode'] == 'poly':
-        for a, b in zip(pts, pts[1:]):
-            pygame.draw.line(surf, col, a, b, w)
-    elif st['mode'] == 'straight_poly':
-        o = orthogonalize_pts(pts)
-        if len(o) == 1:
-            pygame.draw.rect(surf, col, pygame.Rect(o[0][0] - w//2, o[0][1] - w//2, w, w))
-            return
-        for a, b in zip(o, o[1:]):
-            _draw_axis_rect_segment_world(surf, col, w, a, b)
-        for (jx, jy) in o:
-            pygame.draw.rect(surf, col, pygame.Rect(int(jx - w//2), int(jy - w//2), w, w))
+        mask_world.clear()
+        for st in strokes:
+            if not st.get('visible', True):
+                continue
+            mask_world.draw_stroke(st, brush_w)
+        wall_union.request(base, (WORLD_W, WORLD_H), brush_w)
 
 def stroke_bounds(st):
-    xs=[p[0] for p in st['pts']]; ys=[p[1] for p in st['pts']]
-    if not xs:
-        return pygame.Rect(0,0,0,0)
-    w = max(WIDTH_MIN, int(st.get('w', brush_w)))
-    return pygame.Rect(min(xs)-w, min(ys)-w, max(xs)-min(xs)+2*w, max(ys)-min(ys)+2*w)
+    return _raster_stroke_bounds(st, brush_w)
 
 def door_bounds(d):
     xs=[p[0] for p in d['pts']]; ys=[p[1] for p in d['pts']]
@@ -463,15 +423,75 @@ def hit_test_doors(world_pos):
             return i
     return None
 
+def note_status(msg, ms=3000):
+    global status_note, status_note_until
+    print(msg)
+    status_note = msg; status_note_until = pygame.time.get_ticks() + ms
+
 def commit_points(mode_kind, pts):
     if len(pts) < 1:
         return
+    if simplify_on:
+        n0 = len(pts)
+        pts = simplify_stroke_pts(mode_kind, pts, simplify_tolerance(brush_w, zoom))
+        if len(pts) < n0:
+            note_status(f"✂️ Simplified stroke: {n0} -> {len(pts)} points")
     s = {
         'mode': mode_kind, 'pts': pts, 'visible': True,
         'locked': False, 'name': f"Stroke {len(strokes):02d}",
         'w': int(brush_w)
     }
     strokes.append(s); update_mask(); mark_dirty()
+    journal_note("stroke_added", s)
+
+def freehand_sample(wx, wy):
+    """MOUSEMOTION while drawing freehand: keep the sample once it is far enough from the last one."""
+    if not points:
+        points.append((int(wx), int(wy))); return
+    lx, ly = points[-1]
+    step = max(1.0, FREEHAND_STEP_SCREEN_PX / max(zoom, 1e-6))
+    if (wx - lx) ** 2 + (wy - ly) ** 2 >= step * step:
+        points.append((int(wx), int(wy)))
+
+def freehand_finish():
+    """Button released: smooth, simplify and commit the captured stroke."""
+    global freehand_active
+    freehand_active = False
+    raw = points[:]; points.clear()
+    if len(raw) < 2:
+        return
+    pts = smooth_pts(raw)
+    if not simplify_on:     # commit_points simplifies it when the toggle is on
+        pts = simplify_stroke_pts('poly', pts, simplify_tolerance(brush_w, zoom))
+    push_undo()
+    commit_points('poly', pts + symmetry_mirror_pts(pts))
+    note_status(f"✏️ Freehand stroke: {len(raw)} samples -> {len(strokes[-1]['pts'])} points")
+
+def simplify_layers():
+    """Alt+S: simplify the selected stroke, or every visible unlocked one if none is selected."""
+    if sel_kind == "stroke" and sel_idx is not None and 0 <= sel_idx < len(strokes):
+        idxs = [sel_idx]
+    else:
+        idxs = [i for i, st in enumerate(strokes) if st.get('visible', True) and not st.get('locked', False)]
+    tol = simplify_tolerance(brush_w, zoom)
+    new_pts = {}
+    for i in idxs:
+        st = strokes[i]
+        pts = simplify_stroke_pts(st['mode'], st['pts'], simplify_tolerance(st.get('w', brush_w), zoom))
+        if len(pts) < len(st['pts']):
+            new_pts[i] = pts
+    before = sum(len(strokes[i]['pts']) for i in idxs)
+    if not new_pts:
+        note_status(f"✂️ Nothing to simplify ({len(idxs)} stroke(s), {before} points, tol {tol:.1f}px)")
+        return
+    push_undo()
+    for i, pts in new_pts.items():
+        strokes[i]['pts'] = pts
+        journal_note("layer_moved", "stroke", i, pts)
+    after = sum(len(strokes[i]['pts']) for i in idxs)
+    update_mask(); mark_dirty()
+    note_status(f"✂️ Simplified {len(new_pts)} stroke(s): {before} -> {after} points "
+                f"(-{100 * (before - after) / max(before, 1):.0f}%)")
 
 def commit_door_points(pts, kind: str):
     if len(pts) < 3:
@@ -485,6 +505,7 @@ def commit_door_points(pts, kind: str):
         'w': int(brush_w)
     }
     doors.append(d); mark_dirty()
+    journal_note("door_added", d)
 
 def symmetry_mirror_pts(pts):
     out=[]
@@ -508,6 +529,7 @@ def do_undo():
     snap = undo_stack.pop()
     redo_stack.append(snapshot_state())
     restore_state(snap); mark_dirty()
+    journal_note("state_replaced", _edit_state())
 
 def do_redo():
     if not redo_stack:
@@ -515,9 +537,21 @@ def do_redo():
     snap = redo_stack.pop()
     undo_stack.append(snapshot_state())
     restore_state(snap); mark_dirty()
+    journal_note("state_replaced", _edit_state())
 
 def load_background(src: Union[str, pygame.Surface, BytesLike], *, keep_world: bool = False):
-    global BG_PATH, bg_world, _cached_bg, _cached_edges, _last_zoom
+    global BG_PATH, bg_world, bg_tiles, _cached_bg, _cached_edges, _last_zoom
+
+    if isinstance(src, str) and wants_paging(src):
+        paged = open_paged_background(src)
+        if keep_world:
+            paged.place((WORLD_W, WORLD_H))
+        else:
+            set_world_size(*paged.image_size)
+        BG_PATH = src
+        bg_world = None; bg_tiles = paged
+        _cached_bg = None; _cached_edges = None; _last_zoom = -1.0
+        return
 
     if isinstance(src, (bytes, bytearray, memoryview)):
         BG_PATH = None
@@ -537,6 +571,7 @@ def load_background(src: Union[str, pygame.Surface, BytesLike], *, keep_world: b
         iw, ih = surf.get_size()
         set_world_size(iw, ih)
         bg_world = surf
+    bg_tiles = None
 
     _cached_bg = None; _cached_edges = None; _last_zoom = -1.0
 
@@ -556,32 +591,6 @@ def compute_edges_surface(bg):
     edges.set_alpha(90)
     return edges
 
-def _mask_with_spawns_pixels(base_surf: pygame.Surface, spawn, entries_next, entries_back):
-    out = base_surf.copy(); out.lock()
-    if spawn:
-        x, y = map(int, spawn)
-        if 0 <= x < out.get_width() and 0 <= y < out.get_height():
-            out.set_at((x, y), (255, 0, 0))
-    for (x,y) in entries_next:
-        xi, yi = int(x), int(y)
-        if 0 <= xi < out.get_width() and 0 <= yi < out.get_height():
-            out.set_at((xi, yi), ENTRY_NEXT_BAKE_COLOR)
-    for (x,y) in entries_back:
-        xi, yi = int(x), int(y)
-        if 0 <= xi < out.get_width() and 0 <= yi < out.get_height():
-            out.set_at((xi, yi), ENTRY_BACK_BAKE_COLOR)
-    out.unlock()
-    return out
-
-def _bake_doors_fill(out_surf: pygame.Surface):
-    for d in doors:
-        if not d.get('visible', True):
-            continue
-        if len(d['pts']) >= 3:
-            col = DOOR_NEXT_BAKE_COLOR if d.get('kind','next')=='next' else DOOR_BACK_BAKE_COLOR
-            pygame.draw.polygon(out_surf, col, d['pts'])
-    return out_surf
-
 def save_mask_png():
     try:
         init_dir = os.path.dirname(BG_PATH) if BG_PATH else os.path.expanduser("~")
@@ -599,8 +608,7 @@ def save_mask_png():
     if not out:
         print("🚫 Save canceled.")
         return
-    out_surf = _mask_with_spawns_pixels(mask_world, spawn_pos, entry_next_spawns, entry_back_spawns)
-    out_surf = _bake_doors_fill(out_surf)
+    out_surf = bake_mask_surface(mask_world.surface(), spawn_pos, entry_next_spawns, entry_back_spawns, doors)
     try:
         pygame.image.save(out_surf, out)
         print(f"✅ Saved mask -> {out}")
@@ -626,24 +634,54 @@ def save_project(save_as: bool=False):
             return False
         p = out
 
+    old_j = cur.get("journal")
+    if old_j is not None and old_j.project_path != p:
+        old_j.discard(); cur["journal"] = None
+    j = _attach_journal(cur, p)
+    j.flush()
+
+    data = _project_save_data(p, journal_seq=j.seq)
+    data["bg_embed_b64"] = _read_bg_b64(data["bg_path"])
+    meta = _project_meta_now(data)
+
+    def _write(upto_seq: int) -> bool:
+        data["journal_seq"] = upto_seq
+        _write_project_file(p, data, meta)
+        return True
+
+    # waits out a compaction that is still writing an older snapshot
+    j.save_full(_write)
+    thumb_index.put(p, meta); thumb_index.save()
+
+    tabs[active_tab]["project_path"] = p
+    _remember_recent(p); mark_clean()
+    print("💾 Project saved:", p)
+    return True
+
+def _read_bg_b64(bg_path_abs: Optional[str]) -> Optional[str]:
+    # a paged background is saved by path only: embedding it would read and encode the whole file
+    if not bg_path_abs or wants_paging(bg_path_abs):
+        return None
+    try:
+        with open(bg_path_abs, "rb") as f:
+            return base64.b64encode(f.read()).decode("ascii")
+    except Exception:
+        return None
+
+def _project_save_data(p: str, *, journal_seq: int = 0) -> Dict[str, Any]:
+    """Project dict for path p; bg_embed_b64 is left for the caller to fill."""
     bg_path_abs = BG_PATH if BG_PATH and os.path.isfile(BG_PATH) else None
     bg_rel = None
-    bg_embed_b64 = None
     if bg_path_abs:
         try:
             bg_rel = os.path.relpath(bg_path_abs, os.path.dirname(p))
         except Exception:
             bg_rel = None
-        try:
-            with open(bg_path_abs, "rb") as f:
-                bg_embed_b64 = base64.b64encode(f.read()).decode("ascii")
-        except Exception:
-            bg_embed_b64 = None
 
-    data = {
+    return {
         "bg_path": bg_path_abs,
         "bg_rel": bg_rel,
-        "bg_embed_b64": bg_embed_b64,
+        "bg_embed_b64": None,
         "world_size": [WORLD_W, WORLD_H],
         "strokes": strokes, "doors": doors,
         "brush_w": brush_w, "preview_alpha": preview_alpha,
@@ -652,13 +690,113 @@ def save_project(save_as: bool=False):
         "spawn_pos": list(spawn_pos) if spawn_pos is not None else None,
         "entry_next_spawns": entry_next_spawns,
         "entry_back_spawns": entry_back_spawns,
+        "journal_seq": int(journal_seq),
     }
-    with open(p, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
 
-    tabs[active_tab]["project_path"] = p
-    _remember_recent(p); mark_clean()
-    print("💾 Project saved:", p)
+def _project_meta_now(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Header stats + thumbnail of the live scene (main thread: touches surfaces)."""
+    try:
+        bg = bg_tiles.scaled(thumb_fit((WORLD_W, WORLD_H))) if bg_tiles is not None else bg_world
+        png, size = make_thumbnail_png(bg, mask_world.scaled(thumb_fit((WORLD_W, WORLD_H))),
+                                       (WORLD_W, WORLD_H), alpha=preview_alpha)
+    except Exception as ex:
+        print("thumbnail failed:", ex)
+        png, size = None, None
+    return project_meta(data, thumb_png=png, thumb_size=size)
+
+def _write_project_file(p: str, data: Dict[str, Any], meta: Optional[Dict[str, Any]] = None):
+    write_project_file(p, data, meta)
+
+# ---------- JOURNAL (autosave) ----------
+def _attach_journal(t: Dict[str, Any], p: str, base_seq: int = 0) -> Journal:
+    j = t.get("journal")
+    if j is None or j.project_path != p:
+        j = Journal(p, base_seq)
+        t["journal"] = j
+    return j
+
+def journal_note(event: str, *args):
+    """Record a committed edit in the active tab's journal (if it has a project)."""
+    if not tabs:
+        return
+    j = tabs[active_tab].get("journal")
+    if j is not None:
+        getattr(j, event)(*args)
+
+def _edit_state() -> Dict[str, Any]:
+    return {
+        "strokes": strokes, "doors": doors, "spawn_pos": spawn_pos,
+        "entry_next_spawns": entry_next_spawns, "entry_back_spawns": entry_back_spawns,
+    }
+
+_compacted: "queue.SimpleQueue[Tuple[str, Dict[str, Any]]]" = queue.SimpleQueue()
+
+def journal_compact_now():
+    """Snapshot the active tab and fold its journal into a full save off-thread."""
+    if not tabs:
+        return
+    t = tabs[active_tab]
+    j = t.get("journal"); p = t.get("project_path")
+    if j is None or not p:
+        return
+    j.flush()
+    data = copy.deepcopy(_project_save_data(p, journal_seq=j.seq))
+    meta = _project_meta_now(data)
+
+    def _write(upto_seq: int) -> bool:
+        data["journal_seq"] = upto_seq
+        b64 = _read_bg_b64(data["bg_path"])
+        if b64 is None and not (data["bg_path"] and wants_paging(data["bg_path"])):
+            try:
+                with open(p, "r", encoding="utf-8") as f:
+                    b64 = json.load(f).get("bg_embed_b64")
+            except Exception:
+                b64 = None
+        data["bg_embed_b64"] = b64
+        _write_project_file(p, data, meta)
+        _compacted.put((p, meta))     # thumb_index belongs to the UI thread; journal_tick hands it over
+        return True
+
+    j.compact_async(_write)
+
+def _open_tab_journal(t: Dict[str, Any], p: str, base_seq: int):
+    j = _attach_journal(t, p, base_seq)
+    if j.seq > base_seq:
+        # recovered edits: fold them into the project file right away
+        journal_compact_now()
+
+def journal_tick():
+    while not _compacted.empty():
+        p, meta = _compacted.get_nowait()
+        thumb_index.put(p, meta); thumb_index.save()
+    # background tabs can still hold a pending batch from before they were switched away from
+    for t in tabs:
+        if t.get("journal") is not None:
+            t["journal"].tick()
+    j = tabs[active_tab].get("journal") if tabs else None
+    if j is not None and j.wants_compaction():
+        journal_compact_now()
+
+def _offer_journal_replay(p: str, base_seq: int) -> bool:
+    """Ask whether to replay unsaved journal edits over the last full save."""
+    global spawn_pos
+    recs = pending_records(p, base_seq)
+    if not recs:
+        return False
+    root = tk.Tk(); root.withdraw()
+    ans = messagebox.askyesno(
+        "Recover unsaved edits?",
+        f"'{os.path.basename(p)}' has {len(recs)} journaled edit(s) newer than its last save.\n"
+        "Replay them now?"
+    )
+    root.destroy()
+    if not ans:
+        Journal(p, base_seq).discard()
+        return False
+    state = _edit_state()
+    last = journal_replay(recs, state)
+    spawn_pos = state["spawn_pos"]
+    print(f"🩹 Recovered {len(recs)} edit(s) from journal (seq {last}).")
     return True
 
 def _load_project_from_path(p: str):
@@ -735,9 +873,11 @@ def _load_project_from_path(p: str):
     entry_back_spawns[:] = [tuple(pp) for pp in data.get("entry_back_spawns", [])]
 
     sel_kind, sel_idx = None, None
+    _offer_journal_replay(p, int(data.get("journal_seq", 0)))
     _remember_recent(p)
-    update_mask()
+    update_mask(); touch_overlays()
     print("📂 Project loaded:", p)
+    return int(data.get("journal_seq", 0))
 
 def load_project_into_current():
     root = tk.Tk(); root.withdraw()
@@ -745,18 +885,21 @@ def load_project_into_current():
     root.destroy()
     if not p:
         return False
-    _load_project_from_path(p)
+    if tabs and tabs[active_tab].get("journal") is not None:
+        tabs[active_tab]["journal"].close(); tabs[active_tab]["journal"] = None
+    base_seq = _load_project_from_path(p)
     if tabs:
         tabs[active_tab]["project_path"] = p
         tabs[active_tab]["name"] = os.path.basename(p)
+        _open_tab_journal(tabs[active_tab], p, base_seq)
     fit_and_center(); mark_clean(); return True
 
 def clear_all():
     strokes.clear(); doors.clear()
     entry_next_spawns.clear(); entry_back_spawns.clear()
-    global spawn_pos, _scaled_mask_dirty
+    global spawn_pos
     spawn_pos=None
-    update_mask(); _scaled_mask_dirty = True; mark_dirty()
+    update_mask(); mark_dirty()
 
 def reorder_layer(delta):
     global sel_idx, sel_kind
@@ -768,6 +911,7 @@ def reorder_layer(delta):
     if j == sel_idx:
         return
     strokes[sel_idx], strokes[j] = strokes[j], strokes[sel_idx]
+    journal_note("strokes_swapped", sel_idx, j)
     sel_idx = j; update_mask(); mark_dirty()
 
 # ---------- COORD + ZOOM ----------
@@ -808,13 +952,15 @@ def tabs_save_current():
     t["state"] = snapshot_state()
     t["bg_path"] = BG_PATH
     t["bg_surface"] = bg_world
+    t["bg_tiles"] = bg_tiles
 
 def tabs_load(i:int):
-    global active_tab, BG_PATH, bg_world, _last_zoom, _cached_bg, _cached_edges
+    global active_tab, BG_PATH, bg_world, bg_tiles, _last_zoom, _cached_bg, _cached_edges
     active_tab = i
     t = tabs[i]
     BG_PATH = t.get("bg_path")
     bg_world = t.get("bg_surface")
+    bg_tiles = t.get("bg_tiles")
     restore_state(t.get("state"))
     _cached_bg = None; _cached_edges = None; _last_zoom = -1.0
     fit_and_center()
@@ -830,7 +976,7 @@ def tab_new_from_png():
     clear_all()
     fit_and_center()
     name = os.path.basename(path)
-    tabs.append(make_tab_dict(name, path, bg_world))
+    tabs.append(make_tab_dict(name, path, bg_world, bg_tiles))
     tabs_load(len(tabs)-1)
     mark_clean()
 
@@ -841,14 +987,15 @@ def tab_open_project():
     if not p:
         return
     tabs_save_current()
-    _load_project_from_path(p)
+    base_seq = _load_project_from_path(p)
     fit_and_center()
     name = os.path.basename(p)
-    t = make_tab_dict(name, BG_PATH, bg_world)
+    t = make_tab_dict(name, BG_PATH, bg_world, bg_tiles)
     t["project_path"] = p
     t["dirty"] = False
     tabs.append(t)
     tabs_load(len(tabs)-1)
+    _open_tab_journal(t, p, base_seq)
     mark_clean()
 
 def maybe_save_before_close(i:int) -> bool:
@@ -861,6 +1008,8 @@ def maybe_save_before_close(i:int) -> bool:
     root.destroy()
     if ans is None:
         return False
+    if not ans and t.get("journal") is not None:
+        t["journal"].discard()
     if ans:
         if i == active_tab:
             return save_project(save_as=not bool(t.get("project_path")))
@@ -874,14 +1023,16 @@ def maybe_save_before_close(i:int) -> bool:
     return True
 
 def close_tab(i:int):
-    global active_tab, BG_PATH, bg_world
+    global active_tab, BG_PATH, bg_world, bg_tiles
     if not (0 <= i < len(tabs)):
         return
     if not maybe_save_before_close(i):
         return
+    if tabs[i].get("journal") is not None:
+        tabs[i]["journal"].close()
     tabs.pop(i)
     if not tabs:
-        BG_PATH = None; bg_world = None
+        BG_PATH = None; bg_world = None; bg_tiles = None
         clear_all(); fit_and_center()
     else:
         active_tab = max(0, min(active_tab, len(tabs)-1))
@@ -909,51 +1060,320 @@ def _draw_axis_rect_segment_screen(ax: int, ay: int, bx: int, by: int, w: int, c
         rect = pygame.Rect(int(ax - w//2), y0, w, (y1b - y0) + 1)
     pygame.draw.rect(screen, col, rect)
 
-def draw_viewport():
-    global _last_zoom, _cached_bg, _cached_mask, _cached_edges, _scaled_mask_dirty
-    px_rect(screen, VIEW, C_PANEL, C_FRAME)
-    clip_old = screen.get_clip(); screen.set_clip(VIEW)
+def draw_freehand_preview(prev_w):
+    """In-progress freehand stroke, kept on a view-sized layer: each frame only
+    the segments added since the last one are drawn; pan/zoom/width changes redraw it."""
+    global _fh_layer, _fh_drawn, _fh_key
+    key = (zoom, ox, oy, prev_w, VIEW.size, points[0])
+    if _fh_layer is None or _fh_layer.get_size() != VIEW.size:
+        _fh_layer = pygame.Surface(VIEW.size, pygame.SRCALPHA)
+        _fh_key = None
+    if key != _fh_key or _fh_drawn > len(points):
+        _fh_layer.fill((0, 0, 0, 0)); _fh_drawn = 0; _fh_key = key
+    col = (0, 140, 90)
+    start = max(_fh_drawn - 1, 0)
+    for a, b in zip(points[start:], points[start + 1:]):
+        ax, ay = world_to_screen(*a); bx, by = world_to_screen(*b)
+        pygame.draw.line(_fh_layer, col, (ax - VIEW.x, ay - VIEW.y), (bx - VIEW.x, by - VIEW.y), prev_w)
+    if len(points) == 1:
+        ax, ay = world_to_screen(*points[0])
+        pygame.draw.circle(_fh_layer, col, (int(ax - VIEW.x), int(ay - VIEW.y)), max(1, prev_w // 2))
+    _fh_drawn = len(points)
+    screen.blit(_fh_layer, VIEW.topleft)
+
+def _stroke_geometry(st):
+    """(bounds, shape) for drawing a stroke in screen space, cached until its points or width change.
+
+    shape is the world rects a straight_poly fills, or the polyline of a poly.
+    """
+    w = stroke_width(st, brush_w)
+    g = _stroke_geom.get(id(st))
+    if g is not None and g[0] is st['pts'] and g[1] == w:
+        return g[2], g[3]
+    pts = [(int(x), int(y)) for (x, y) in st['pts']]
+    if st['mode'] == 'straight_poly':
+        o = orthogonalize_pts(pts)
+        shape = [axis_segment_rect(w, a, b) for a, b in zip(o, o[1:])] + \
+                [pygame.Rect(int(jx - w//2), int(jy - w//2), w, w) for (jx, jy) in o]
+    else:
+        shape = pts
+    bounds = _raster_stroke_bounds(st, brush_w)
+    _stroke_geom[id(st)] = (st['pts'], w, bounds, shape)
+    return bounds, shape
+
+def door_box(d) -> pygame.Rect:
+    """Exact bounds of a door's points, cached until they change."""
+    g = _door_box.get(id(d))
+    if g is None or g[0] is not d['pts']:
+        xs = [p[0] for p in d['pts']]; ys = [p[1] for p in d['pts']]
+        g = (d['pts'], pygame.Rect(min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)))
+        _door_box[id(d)] = g
+    return g[1]
+
+def visible_world_rect(area: Optional[pygame.Rect] = None) -> pygame.Rect:
+    area = area or VIEW
+    x0, y0 = screen_to_world(area.x, area.y); x1, y1 = screen_to_world(area.right, area.bottom)
+    return pygame.Rect(int(x0) - 1, int(y0) - 1, int(x1 - x0) + 3, int(y1 - y0) + 3)
+
+def draw_strokes_vector(area: pygame.Rect):
+    """Visible strokes straight onto the viewport in screen coordinates (no scaled mask).
+
+    They go on one layer first so overlaps blend like the mask preview does;
+    the layer only covers the world, like the mask would. Only the area
+    (screen rect) is redrawn.
+    """
+    global _vector_layer, _stroke_geom
+    m = VECTOR_LAYER_MARGIN
+    if _vector_layer is None or _vector_layer.get_size() != (VIEW.w + 2*m, VIEW.h + 2*m):
+        _vector_layer = pygame.Surface((VIEW.w + 2*m, VIEW.h + 2*m)).convert()
+    layer = _vector_layer
+    local = area.move(m - VIEW.x, m - VIEW.y)
+    layer.fill(MASK_ERASE_COLOR, local)
+    # strokes aren't clipped to the area: pygame rasterizes a clipped thick line
+    # slightly differently, so strips wouldn't match a full redraw
+    lx, ly = ox + m, oy + m
+    view_w = visible_world_rect(area)
+    live = {}
+    for st in strokes:
+        if not st.get('visible', True) or not st.get('pts'):
+            continue
+        bounds, shape = _stroke_geometry(st)
+        live[id(st)] = _stroke_geom[id(st)]
+        if not view_w.colliderect(bounds):
+            continue
+        if st['mode'] == 'straight_poly':
+            for r in shape:
+                if view_w.colliderect(r):
+                    x0 = math.floor(lx + r.x*zoom); y0 = math.floor(ly + r.y*zoom)
+                    layer.fill(MASK_DRAW_COLOR, pygame.Rect(x0, y0, math.floor(lx + r.right*zoom) - x0, math.floor(ly + r.bottom*zoom) - y0))
+        else:
+            # each segment as a filled quad with floored corners: unlike a thick
+            # draw.line, a polygon fill doesn't change when the layer edge cuts it,
+            # so strips drawn while panning match a full redraw
+            hw = stroke_width(st, brush_w) * zoom / 2
+            for a, b in zip(shape, shape[1:]):
+                ax = lx + (a[0] + 0.5)*zoom; ay = ly + (a[1] + 0.5)*zoom
+                bx = lx + (b[0] + 0.5)*zoom; by = ly + (b[1] + 0.5)*zoom
+                L = math.hypot(bx - ax, by - ay)
+                if L == 0:
+                    pygame.draw.rect(layer, MASK_DRAW_COLOR, pygame.Rect(math.floor(ax - hw), math.floor(ay - hw), max(1, int(2*hw)), max(1, int(2*hw))))
+                    continue
+                nx = -(by - ay) / L * hw; ny = (bx - ax) / L * hw
+                pygame.draw.polygon(layer, MASK_DRAW_COLOR, [
+                    (math.floor(ax + nx), math.floor(ay + ny)), (math.floor(bx + nx), math.floor(by + ny)),
+                    (math.floor(bx - nx), math.floor(by - ny)), (math.floor(ax - nx), math.floor(ay - ny))])
+    _stroke_geom = live
+    layer.set_alpha(preview_alpha)
+    clip = screen.get_clip()
+    screen.set_clip(clip.clip(pygame.Rect(VIEW.x + ox, VIEW.y + oy, int(WORLD_W*zoom), int(WORLD_H*zoom))))
+    screen.blit(layer, area.topleft, local)
+    screen.set_clip(clip)
+
+def _draw_overlays(surf: pygame.Surface, vx: float, vy: float, view_w: pygame.Rect):
+    """Doors, spawn and entry markers onto surf, where world (0, 0) lands at (vx, vy)."""
+    global _door_box
+    if doors:
+        tiny_done = set()
+        live = {}
+        for d in doors:
+            pts = d['pts']
+            if not d.get('visible', True) or len(pts) < 2:
+                continue
+            b = door_box(d); live[id(d)] = _door_box[id(d)]
+            dw = d.get('w', brush_w)
+            if not view_w.colliderect(b.inflate(2*dw + 1, 2*dw + 1)):
+                continue
+            kind = d.get('kind','next')
+            outline = DOOR_NEXT_OVERLAY_OUTLINE if kind=='next' else DOOR_BACK_OVERLAY_OUTLINE
+            if b.w * zoom < LOD_TINY_PX and b.h * zoom < LOD_TINY_PX:
+                # decided from the cached bounds, before any point is transformed;
+                # many tiny doors land on the same few pixels when zoomed out
+                r = pygame.Rect(int(vx + b.x*zoom), int(vy + b.y*zoom), int(b.w*zoom) + 1, int(b.h*zoom) + 1)
+                cell = (r.x, r.y, kind)
+                if cell not in tiny_done:
+                    tiny_done.add(cell)
+                    pygame.draw.rect(surf, outline, r)
+                continue
+            w_scr = max(1, int(round(dw * zoom)))
+            scr = lod_polyline([(int(vx + x*zoom), int(vy + y*zoom)) for (x, y) in pts], LOD_SEG_PX)
+            if len(scr) >= 2:
+                pygame.draw.lines(surf, outline, len(pts) >= 3, scr, w_scr)
+            if w_scr >= LOD_NODE_PX:
+                for (sx,sy) in scr:
+                    pygame.draw.circle(surf, outline, (sx,sy), max(1, w_scr//2))
+        _door_box = live
+
+    if spawn_pos is not None:
+        sz = max(2, int(SPAWN_SIZE * zoom))
+        rect = pygame.Rect(int(vx + spawn_pos[0]*zoom) - sz//2, int(vy + spawn_pos[1]*zoom) - sz//2, sz, sz)
+        pygame.draw.rect(surf, SPAWN_COLOR, rect); pygame.draw.rect(surf, SPAWN_BORDER, rect, 1)
+
+    sz = max(2, int(ENTRY_MARK_SIZE * zoom))
+    bounds = surf.get_rect()
+    for marks, col in ((entry_next_spawns, ENTRY_NEXT_OVERLAY), (entry_back_spawns, ENTRY_BACK_OVERLAY)):
+        for x,y in marks:
+            r = pygame.Rect(int(vx + x*zoom) - sz//2, int(vy + y*zoom) - sz//2, sz, sz)
+            if not r.colliderect(bounds):
+                continue
+            pygame.draw.rect(surf, col, r, 0)
+            if sz >= LOD_TINY_PX:
+                pygame.draw.rect(surf, C_FRAME, r, 1)
+
+def overlay_key():
+    return (overlay_rev, zoom, brush_w, VIEW.size, id(doors), len(doors), spawn_pos,
+            id(entry_next_spawns), len(entry_next_spawns), id(entry_back_spawns), len(entry_back_spawns))
+
+def draw_overlay_layer():
+    """Blit the cached door/marker layer, re-rendering it only when they, the zoom
+    or the width change, or the view pans out of the area it covers."""
+    global _ovl_surf, _ovl_key, _ovl_origin
+    key = overlay_key()
+    mx, my = VIEW.w // 2, VIEW.h // 2
+    # the view in zoomed-world pixels
+    vx0, vy0 = int(-ox), int(-oy)
+    rx, ry = _ovl_origin
+    inside = rx <= vx0 and ry <= vy0 and vx0 + VIEW.w <= rx + VIEW.w + 2*mx and vy0 + VIEW.h <= ry + VIEW.h + 2*my
+    if _ovl_surf is None or key != _ovl_key or not inside:
+        size = (VIEW.w + 2*mx, VIEW.h + 2*my)
+        if _ovl_surf is None or _ovl_surf.get_size() != size:
+            _ovl_surf = pygame.Surface(size).convert()
+            _ovl_surf.set_colorkey(OVERLAY_KEY)
+        rx, ry = vx0 - mx, vy0 - my
+        _ovl_surf.fill(OVERLAY_KEY)
+        area = pygame.Rect(int(rx / zoom) - 1, int(ry / zoom) - 1, int(size[0] / zoom) + 3, int(size[1] / zoom) + 3)
+        _draw_overlays(_ovl_surf, -rx, -ry, area)
+        _ovl_key, _ovl_origin = key, (rx, ry)
+    screen.blit(_ovl_surf, (VIEW.x + ox + rx, VIEW.y + oy + ry))
+
+def _scale_sources() -> Dict[str, Tuple[Any, pygame.Surface]]:
+    # keyed by the source itself, so a new background or edge map never hits an old level
+    out: Dict[str, Tuple[Any, pygame.Surface]] = {"bg": (bg_world, cast(pygame.Surface, bg_world))}
+    if edges_overlay is not None:
+        out["edges"] = (edges_overlay, edges_overlay)
+    return out
+
+def _refresh_scaled():
+    """Bring bg/edges to the current zoom.
 
-    # checker
+    A zoom level that isn't cached yet is scaled on the worker; until it
+    arrives the old surfaces stay and the view draws them stretched.
+    """
+    global _last_zoom, _cached_bg, _cached_edges, _cached_zoom
+    if bg_world is None:
+        return
+    zoom_scaler.poll()
+    target_size = (int(WORLD_W*zoom), int(WORLD_H*zoom))
+    if _last_zoom != zoom:
+        layers = _scale_sources()
+        got = {n: zoom_scaler.get(zoom, n, k) for n, (k, _) in layers.items()}
+        if not all(got.values()):
+            if _cached_bg is not None and _cached_zoom != zoom:
+                zoom_scaler.request(zoom, target_size, layers)
+                return
+            # same zoom (new edge map) or nothing to stretch meanwhile: scale right here
+            for n, (k, src) in layers.items():
+                if got[n] is None:
+                    got[n] = pygame.transform.scale(src, target_size)
+                    zoom_scaler.put(zoom, n, k, cast(pygame.Surface, got[n]))
+        _cached_bg = got["bg"]; _cached_edges = got.get("edges")
+        _cached_zoom = _last_zoom = zoom
+
+def _draw_walls(area: pygame.Rect):
+    if zoom >= VECTOR_ZOOM:
+        draw_strokes_vector(area)
+    else:
+        mask_world.blit_scaled(screen, (VIEW.x+ox, VIEW.y+oy), zoom, area, preview_alpha)
+
+def _compose_view(area: pygame.Rect):
+    """The pannable part of the viewport (checker, bg, walls, edges, grid, doors/markers), clipped to area."""
+    screen.set_clip(area)
+    # checker, anchored to the pan offset so scrolled and freshly drawn parts line up
     tile=16
-    for yy in range(VIEW.y, VIEW.bottom, tile):
-        for xx in range(VIEW.x, VIEW.right, tile):
-            c = C_CHECKER_A if ((xx//tile + yy//tile) % 2 == 0) else C_CHECKER_B
+    x0 = area.x - (area.x - VIEW.x - int(ox)) % tile
+    y0 = area.y - (area.y - VIEW.y - int(oy)) % tile
+    for yy in range(y0, area.bottom, tile):
+        ty = (yy - VIEW.y - int(oy)) // tile
+        for xx in range(x0, area.right, tile):
+            c = C_CHECKER_A if (((xx - VIEW.x - int(ox)) // tile + ty) % 2 == 0) else C_CHECKER_B
             pygame.draw.rect(screen, c, pygame.Rect(xx,yy,tile,tile))
 
-    if bg_world is not None:
-        if _last_zoom != zoom:
-            target_size = (int(WORLD_W*zoom), int(WORLD_H*zoom))
-            _cached_bg = pygame.transform.scale(bg_world, target_size)
-            if edges_overlay is not None:
-                _cached_edges = pygame.transform.scale(edges_overlay, target_size)
-            _cached_mask = pygame.transform.scale(mask_world, target_size)
-            _last_zoom = zoom
-            _scaled_mask_dirty = False
-        elif _scaled_mask_dirty:
-            target_size = (int(WORLD_W*zoom), int(WORLD_H*zoom))
-            _cached_mask = pygame.transform.scale(mask_world, target_size)
-            _scaled_mask_dirty = False
-
+    if bg_tiles is not None:
+        bg_tiles.blit_view(screen, (VIEW.x+ox, VIEW.y+oy), zoom, area)
+        _draw_walls(area)
+    elif bg_world is not None and _cached_zoom == zoom:
         if _cached_bg is not None:
             screen.blit(_cached_bg, (VIEW.x+ox, VIEW.y+oy))
-        if _cached_mask is not None:
-            m = _cached_mask.copy(); m.set_alpha(preview_alpha); screen.blit(m, (VIEW.x+ox, VIEW.y+oy))
+        _draw_walls(area)
         if show_edges and _cached_edges is not None:
             screen.blit(_cached_edges, (VIEW.x+ox, VIEW.y+oy))
+    elif bg_world is not None:
+        # the new zoom level is still being scaled: stretch the closest one we have
+        origin = (VIEW.x+ox, VIEW.y+oy)
+        layers = _scale_sources()
+        near = {n: zoom_scaler.nearest(zoom, n, k) for n, (k, _) in layers.items()}
+        bg_z, bg_s = near["bg"] or (_cached_zoom, _cached_bg)
+        if bg_s is not None:
+            blit_stretched(screen, bg_s, bg_z, zoom, origin, area)
+        _draw_walls(area)
+        ed_z, ed_s = near.get("edges") or (_cached_zoom, _cached_edges)
+        if show_edges and ed_s is not None:
+            blit_stretched(screen, ed_s, ed_z, zoom, origin, area)
 
     # translucent grid overlay
     if grid_on:
         step = max(4, int(grid_size * zoom))
-        grid_surf = pygame.Surface((VIEW.w, VIEW.h), pygame.SRCALPHA)
+        grid_surf = pygame.Surface(area.size, pygame.SRCALPHA)
         gcol = (0, 0, 0, 60)
         offx = int((VIEW.x + int(ox)) % step)
         offy = int((VIEW.y + int(oy)) % step)
-        for x in range(offx, VIEW.w, step):
-            pygame.draw.line(grid_surf, gcol, (x, 0), (x, VIEW.h), 1)
-        for y in range(offy, VIEW.h, step):
-            pygame.draw.line(grid_surf, gcol, (0, y), (VIEW.w, y), 1)
-        screen.blit(grid_surf, (VIEW.x, VIEW.y))
+        lx, ly = area.x - VIEW.x, area.y - VIEW.y
+        for x in range(offx + (lx - offx) // step * step, lx + area.w, step):
+            if x >= lx:
+                pygame.draw.line(grid_surf, gcol, (x - lx, 0), (x - lx, area.h), 1)
+        for y in range(offy + (ly - offy) // step * step, ly + area.h, step):
+            if y >= ly:
+                pygame.draw.line(grid_surf, gcol, (0, y - ly), (area.w, y - ly), 1)
+        screen.blit(grid_surf, area.topleft)
+
+    draw_overlay_layer()
+    screen.set_clip(VIEW)
+
+def _view_key():
+    # everything the composed view depends on except the pan offset
+    return (zoom, _cached_zoom, zoom_scaler.rev if _cached_zoom != zoom else 0, tuple(VIEW), id(bg_world), id(bg_tiles), id(_cached_bg), id(_cached_edges), show_edges,
+            grid_on, grid_size, preview_alpha, mask_rev, brush_w, (WORLD_W, WORLD_H), overlay_key())
+
+def draw_viewport():
+    global _vc_surf, _vc_key, _vc_pos
+    _refresh_scaled()
+    px_rect(screen, VIEW, C_PANEL, C_FRAME)
+    clip_old = screen.get_clip(); screen.set_clip(VIEW)
+
+    # panning scrolls the last composed view and only draws the strips it exposes
+    key = _view_key()
+    pos = (int(ox), int(oy))
+    dx, dy = pos[0] - _vc_pos[0], pos[1] - _vc_pos[1]
+    if _vc_surf is not None and key == _vc_key and ox == pos[0] and oy == pos[1] \
+            and abs(dx) < VIEW.w and abs(dy) < VIEW.h:
+        if dx or dy:
+            _vc_surf.scroll(dx, dy)
+            screen.blit(_vc_surf, VIEW.topleft)
+            strips = []
+            if dx > 0: strips.append(pygame.Rect(VIEW.x, VIEW.y, dx, VIEW.h))
+            if dx < 0: strips.append(pygame.Rect(VIEW.right + dx, VIEW.y, -dx, VIEW.h))
+            if dy > 0: strips.append(pygame.Rect(VIEW.x, VIEW.y, VIEW.w, dy))
+            if dy < 0: strips.append(pygame.Rect(VIEW.x, VIEW.bottom + dy, VIEW.w, -dy))
+            for r in strips:
+                _compose_view(r)
+            _vc_surf.blit(screen, (0, 0), VIEW)
+        else:
+            screen.blit(_vc_surf, VIEW.topleft)
+    else:
+        _compose_view(VIEW)
+        if _vc_surf is None or _vc_surf.get_size() != VIEW.size:
+            _vc_surf = pygame.Surface(VIEW.size).convert()
+        _vc_surf.blit(screen, (0, 0), VIEW)
+    _vc_key, _vc_pos = key, pos
 
     if mode == "create":
         prev_w = max(1, int(round(brush_w * zoom)))
@@ -996,6 +1416,9 @@ def draw_viewport():
                     bx, by = world_to_screen(*b)
                     pygame.draw.line(screen, col, (ax, ay), (bx, by), prev_w)
 
+        if create_tool == TOOL_FREEHAND and points:
+            draw_freehand_preview(prev_w)
+
         if create_tool in (TOOL_DOOR_NEXT, TOOL_DOOR_BACK) and door_points:
             col = DOOR_NEXT_OVERLAY_OUTLINE if create_tool==TOOL_DOOR_NEXT else DOOR_BACK_OVERLAY_OUTLINE
             mx, my = pygame.mouse.get_pos()
@@ -1030,43 +1453,10 @@ def draw_viewport():
         tl=world_to_screen(b.left,b.top); br=world_to_screen(b.right,b.bottom)
         pygame.draw.rect(screen, (200,160,40), pygame.Rect(tl,(br[0]-tl[0], br[1]-tl[1])), 1)
 
-    if doors:
-        for d in doors:
-            if not d.get('visible', True):
-                continue
-            pts = d['pts']; kind = d.get('kind','next')
-            w_scr = max(1, int(round(d.get('w', brush_w) * zoom)))
-            if len(pts) >= 2:
-                outline = DOOR_NEXT_OVERLAY_OUTLINE if kind=='next' else DOOR_BACK_OVERLAY_OUTLINE
-                for a,b in zip(pts, pts[1:]):
-                    ax,ay = world_to_screen(*a); bx,by = world_to_screen(*b)
-                    pygame.draw.line(screen, outline, (ax,ay), (bx,by), w_scr)
-                if len(pts) >= 3:
-                    ax,ay = world_to_screen(*pts[-1]); bx,by = world_to_screen(*pts[0])
-                    pygame.draw.line(screen, outline, (ax,ay), (bx,by), w_scr)
-                for (jx,jy) in pts:
-                    sx,sy = world_to_screen(jx,jy)
-                    pygame.draw.circle(screen, outline, (sx,sy), max(1, w_scr//2))
-
-    if spawn_pos is not None:
-        sx, sy = world_to_screen(spawn_pos[0], spawn_pos[1])
-        sz = max(2, int(SPAWN_SIZE * zoom))
-        rect = pygame.Rect(sx - sz//2, sy - sz//2, sz, sz)
-        pygame.draw.rect(screen, SPAWN_COLOR, rect); pygame.draw.rect(screen, SPAWN_BORDER, rect, 1)
-
-    for x,y in entry_next_spawns:
-        sx, sy = world_to_screen(x,y)
-        sz = max(2, int(ENTRY_MARK_SIZE * zoom))
-        r = pygame.Rect(sx - sz//2, sy - sz//2, sz, sz)
-        pygame.draw.rect(screen, ENTRY_NEXT_OVERLAY, r, 0); pygame.draw.rect(screen, C_FRAME, r, 1)
-    for x,y in entry_back_spawns:
-        sx, sy = world_to_screen(x,y)
-        sz = max(2, int(ENTRY_MARK_SIZE * zoom))
-        r = pygame.Rect(sx - sz//2, sy - sz//2, sz, sz)
-        pygame.draw.rect(screen, ENTRY_BACK_OVERLAY, r, 0); pygame.draw.rect(screen, C_FRAME, r, 1)
-
     mx,my=pygame.mouse.get_pos(); wx,wy=screen_to_world(mx,my)
-    if bg_world is not None and 0<=wx<WORLD_W and 0<=wy<WORLD_H:
+    if bg_tiles is not None and 0<=wx<WORLD_W and 0<=wy<WORLD_H:
+        c = bg_tiles.get_at((clamp(int(wx),0,WORLD_W-1), clamp(int(wy),0,WORLD_H-1)))
+    elif bg_world is not None and 0<=wx<WORLD_W and 0<=wy<WORLD_H:
         c = bg_world.get_at((clamp(int(wx),0,WORLD_W-1), clamp(int(wy),0,WORLD_H-1)))
     else:
         c = (0,0,0)
@@ -1080,7 +1470,7 @@ start_pressed: Optional[str]   = None
 
 def main():
     global tool, create_tool, mode, dragging, drag_started, last_mouse, sel_kind, sel_idx, ox, oy, last_click_time
-    global space_pan, mmb_pan, brush_w, grid_on, preview_alpha, simplify_on, sym_x, sym_y, renaming, rename_buf
+    global space_pan, mmb_pan, brush_w, grid_on, preview_alpha, simplify_on, sym_x, sym_y, renaming, rename_buf, freehand_active
     global history_show, help_show, zoom, show_edges, spawn_pos, points, door_points
     global entry_next_spawns, entry_back_spawns, edges_overlay, _cached_edges, _last_zoom, PHASE
     global toolbar_pressed, start_pressed, bg_world, BG_PATH, topbar_pressed, tab_pressed, tab_close_pressed
@@ -1090,6 +1480,7 @@ def main():
     global file_menu_open, file_menu_items, file_menu_item_rects, file_menu_rect
     global hidden_recent_stack, hidden_recent_set
 
+    init_window()
     fit_to_view()
     running=True
     cached_start_hit: Optional[Dict[str, Any]] = None
@@ -1154,11 +1545,12 @@ def main():
                                                 pth = item[1]
                                     if pth:
                                         tabs_save_current()
-                                        _load_project_from_path(pth)
+                                        base_seq = _load_project_from_path(pth)
                                         name=os.path.basename(pth)
-                                        t = make_tab_dict(name, BG_PATH, bg_world)
+                                        t = make_tab_dict(name, BG_PATH, bg_world, bg_tiles)
                                         t["project_path"]=pth
-                                        tabs.append(t); tabs_load(len(tabs)-1); PHASE="editor"; mark_clean()
+                                        tabs.append(t); tabs_load(len(tabs)-1); PHASE="editor"
+                                        _open_tab_journal(t, pth, base_seq); mark_clean()
                                     else:
                                         print("Failed to open recent: could not resolve path from hitmap")
                                 except Exception as ex:
@@ -1186,16 +1578,6 @@ def main():
                                             hidden_recent_stack.remove(pth)
                                     except Exception:
                                         pass
-
-                screen.fill(C_BG)
-                all_recents = _recent_list()
-                visible_for_now = [p for p in all_recents if p not in hidden_recent_set]
-                uptime_s = (pygame.time.get_ticks() - app_start_ms)/1000.0
-                cached_start_hit = draw_start_menu(
-                    screen, (mx, my), FONTS, visible_for_now, start_pressed,
-                    title_text="Welcome!", uptime_s=uptime_s, auto_hide_min=30
-                )
-                pygame.display.flip()
                 continue
 
             if e.type == pygame.KEYDOWN and e.key == pygame.K_SPACE:
@@ -1218,6 +1600,7 @@ def main():
                 if e.key == pygame.K_PAGEUP:   mode="edit";  tool=TOOL_MOVE
                 if e.key == pygame.K_PAGEDOWN: mode="create"; tool=create_tool
                 if e.key == pygame.K_b: create_tool=TOOL_BRUSH; mode="create"; tool=create_tool; points.clear(); door_points.clear()
+                if e.key == pygame.K_f and not (mods & pygame.KMOD_CTRL): create_tool=TOOL_FREEHAND; mode="create"; tool=create_tool; points.clear(); door_points.clear()
                 if e.key == pygame.K_l: create_tool=TOOL_LINE;  mode="create"; tool=create_tool; points.clear(); door_points.clear()
                 if e.key == pygame.K_o: create_tool=TOOL_DOOR_NEXT;  mode="create"; tool=create_tool; points.clear(); door_points.clear()
                 if e.key == pygame.K_u: create_tool=TOOL_DOOR_BACK;  mode="create"; tool=create_tool; points.clear(); door_points.clear()
@@ -1236,9 +1619,15 @@ def main():
                 if e.key == pygame.K_g: grid_on = not grid_on; mark_dirty()
                 if e.key == pygame.K_x: sym_x = not sym_x; mark_dirty()
                 if e.key == pygame.K_t: sym_y = not sym_y; mark_dirty()
-                if e.key == pygame.K_s: simplify_on = not simplify_on; mark_dirty()
+                if e.key == pygame.K_s and not (mods & (pygame.KMOD_CTRL | pygame.KMOD_ALT)):
+                    simplify_on = not simplify_on; mark_dirty()
+                    note_status(f"✂️ Simplify on commit: {'on' if simplify_on else 'off'}")
+                if e.key == pygame.K_s and (mods & pygame.KMOD_ALT) and not renaming: simplify_layers()
                 if e.key == pygame.K_e:
                     show_edges = not show_edges
+                    if show_edges and bg_tiles is not None:
+                        show_edges = False
+                        note_status("🧱 No edge map for a paged background")
                     if show_edges and edges_overlay is None and bg_world is not None:
                         edges_overlay = compute_edges_surface(bg_world)
                         _cached_edges = None; _last_zoom = -1.0
@@ -1272,8 +1661,10 @@ def main():
                 if e.key == pygame.K_l and sel_kind is not None and sel_idx is not None and not renaming:
                     if sel_kind=="stroke":
                         strokes[cast(int, sel_idx)]['locked'] = not strokes[cast(int, sel_idx)].get('locked', False); update_mask(); mark_dirty()
+                        journal_note("layer_flags", "stroke", sel_idx, strokes[cast(int, sel_idx)])
                     else:
                         doors[cast(int, sel_idx)]['locked'] = not doors[cast(int, sel_idx)].get('locked', False); mark_dirty()
+                        journal_note("layer_flags", "door", sel_idx, doors[cast(int, sel_idx)])
                 if e.key == pygame.K_F2 and sel_kind is not None and sel_idx is not None:
                     renaming = True
                     if sel_kind=="stroke": rename_buf = strokes[cast(int, sel_idx)].get('name',"")
@@ -1283,6 +1674,7 @@ def main():
                     if e.key == pygame.K_RETURN and sel_kind is not None and sel_idx is not None:
                         if sel_kind=="stroke": strokes[cast(int, sel_idx)]['name']=_sanitize_name(rename_buf)
                         else: doors[cast(int, sel_idx)]['name']=_sanitize_name(rename_buf)
+                        journal_note("layer_renamed", sel_kind, sel_idx, _sanitize_name(rename_buf))
                         renaming=False; mark_dirty()
                     elif e.key == pygame.K_ESCAPE: renaming=False
                     elif e.key == pygame.K_BACKSPACE: rename_buf = rename_buf[:-1]
@@ -1291,7 +1683,7 @@ def main():
                         if ch.isprintable(): rename_buf += ch
 
                 if e.key == pygame.K_DELETE and sel_kind is not None and sel_idx is not None:
-                    push_undo()
+                    push_undo(); journal_note("layer_removed", sel_kind, sel_idx)
                     if sel_kind=="stroke":
                         idx = cast(int, sel_idx)
                         strokes.pop(idx); update_mask()
@@ -1306,7 +1698,7 @@ def main():
                         else: sel_kind, sel_idx = None, None
 
                 if e.key == pygame.K_d and not (mods & pygame.KMOD_CTRL) and sel_kind is not None and sel_idx is not None:
-                    push_undo()
+                    push_undo(); journal_note("layer_duplicated", sel_kind, sel_idx)
                     if sel_kind=="stroke":
                         idx = cast(int, sel_idx)
                         strokes.append(copy.deepcopy(strokes[idx])); sel_idx=len(strokes)-1; update_mask()
@@ -1315,7 +1707,7 @@ def main():
                         doors.append(copy.deepcopy(doors[idx])); sel_idx=len(doors)-1
 
                 if (mods & pygame.KMOD_CTRL) and e.key == pygame.K_BACKSPACE:
-                    push_undo(); clear_all()
+                    push_undo(); clear_all(); journal_note("cleared")
                 if (mods & pygame.KMOD_CTRL) and (mods & pygame.KMOD_SHIFT) and e.key == pygame.K_s:
                     save_project(save_as=True)
                 if (mods & pygame.KMOD_CTRL) and e.key == pygame.K_o:
@@ -1410,10 +1802,12 @@ def main():
                             push_undo(); globals()['spawn_pos'] = (int(wx), int(wy))
                         else:
                             push_undo(); globals()['spawn_pos'] = None
+                        journal_note("spawn_set", globals()['spawn_pos'])
 
                     elif tool==TOOL_ENTRY_NEXT:
                         if e.button==1:
                             push_undo(); entry_next_spawns.append((int(wx),int(wy)))
+                            journal_note("entry_added", "next", (int(wx),int(wy)))
                         elif e.button in (3,2):
                             if entry_next_spawns:
                                 sx,sy=int(wx),int(wy)
@@ -1421,9 +1815,11 @@ def main():
                                         key=lambda i:(entry_next_spawns[i][0]-sx)**2+(entry_next_spawns[i][1]-sy)**2)
                                 if (entry_next_spawns[idx][0]-sx)**2+(entry_next_spawns[idx][1]-sy)**2 <= 36:
                                     push_undo(); entry_next_spawns.pop(idx)
+                                    journal_note("entry_removed", "next", idx)
                     elif tool==TOOL_ENTRY_BACK:
                         if e.button==1:
                             push_undo(); entry_back_spawns.append((int(wx),int(wy)))
+                            journal_note("entry_added", "back", (int(wx),int(wy)))
                         elif e.button in (3,2):
                             if entry_back_spawns:
                                 sx,sy=int(wx),int(wy)
@@ -1431,6 +1827,11 @@ def main():
                                         key=lambda i:(entry_back_spawns[i][0]-sx)**2+(entry_back_spawns[i][1]-sy)**2)
                                 if (entry_back_spawns[idx][0]-sx)**2+(entry_back_spawns[idx][1]-sy)**2 <= 36:
                                     push_undo(); entry_back_spawns.pop(idx)
+                                    journal_note("entry_removed", "back", idx)
+
+                    elif mode=="create" and create_tool==TOOL_FREEHAND and e.button==1:
+                        points.clear(); freehand_active = True
+                        freehand_sample(*screen_to_world(mx, my))
 
                     elif mode=="create" and create_tool==TOOL_BRUSH and e.button==1:
                         if pygame.key.get_mods() & pygame.KMOD_SHIFT and points:
@@ -1484,6 +1885,7 @@ def main():
                             dragging=True; drag_started=False
                             drag_anchor_world=(wx,wy)
                             drag_orig_pts_cache = strokes[sidx]['pts'][:]
+                            wall_union.request(_union_base()[1], (WORLD_W, WORLD_H), brush_w)
 
                 rows_local = draw_right_panel(screen, FONTS, strokes, doors,
                                               {"kind": sel_kind, "idx": sel_idx}, renaming, rename_buf)
@@ -1495,11 +1897,13 @@ def main():
                             strokes[i]['visible']=not strokes[i].get('visible',True); update_mask(); mark_dirty()
                         else:
                             doors[i]['visible']=not doors[i].get('visible',True); mark_dirty()
+                        journal_note("layer_flags", kind, i, strokes[i] if kind=="stroke" else doors[i])
                     if lkr.collidepoint((mx,my)) and e.button==1:
                         if kind=="stroke":
                             strokes[i]['locked']=not strokes[i].get('locked',False); mark_dirty()
                         else:
                             doors[i]['locked']=not doors[i].get('locked',False); mark_dirty()
+                        journal_note("layer_flags", kind, i, strokes[i] if kind=="stroke" else doors[i])
 
             if e.type == pygame.MOUSEBUTTONUP:
                 if e.button==1:
@@ -1542,7 +1946,7 @@ def main():
                                 clicked_inside = key; break
                         if clicked_inside is not None:
                             key = clicked_inside
-                            if key in (TOOL_BRUSH,TOOL_LINE,TOOL_DOOR_NEXT,TOOL_DOOR_BACK):
+                            if key in (TOOL_BRUSH,TOOL_FREEHAND,TOOL_LINE,TOOL_DOOR_NEXT,TOOL_DOOR_BACK):
                                 create_tool=key; mode="create"; tool=create_tool
                                 points.clear(); door_points.clear()
                             elif key==TOOL_MOVE: mode="edit"; tool=TOOL_MOVE
@@ -1552,9 +1956,9 @@ def main():
                             elif key==TOOL_ENTRY_BACK: mode="edit"; tool=TOOL_ENTRY_BACK
                             elif key=="fit": fit_and_center()
                             elif key=="clear":
-                                push_undo(); clear_all()
+                                push_undo(); clear_all(); journal_note("cleared")
                             elif key=="del" and sel_kind is not None and sel_idx is not None:
-                                push_undo()
+                                push_undo(); journal_note("layer_removed", sel_kind, sel_idx)
                                 if sel_kind=="stroke":
                                     idx = cast(int, sel_idx)
                                     strokes.pop(idx); update_mask()
@@ -1568,7 +1972,7 @@ def main():
                                     elif strokes: sel_kind, sel_idx = "stroke", 0
                                     else: sel_kind, sel_idx = None, None
                             elif key=="dup" and sel_kind is not None and sel_idx is not None:
-                                push_undo()
+                                push_undo(); journal_note("layer_duplicated", sel_kind, sel_idx)
                                 if sel_kind=="stroke":
                                     idx = cast(int, sel_idx)
                                     strokes.append(copy.deepcopy(strokes[idx])); sel_idx=len(strokes)-1; update_mask()
@@ -1578,12 +1982,20 @@ def main():
 
                 if e.button == 2:
                     mmb_pan = False
+                if e.button == 1 and freehand_active:
+                    freehand_finish()
+                if drag_started and tool==TOOL_MOVE and sel_kind is not None and sel_idx is not None:
+                    moved = strokes if sel_kind=="stroke" else doors
+                    if 0 <= sel_idx < len(moved):
+                        journal_note("layer_moved", sel_kind, sel_idx, moved[sel_idx]['pts'])
                 dragging=False; drag_started=False
                 drag_anchor_world=None; drag_orig_pts_cache=[]
 
             if e.type == pygame.MOUSEMOTION:
                 if thickness_dragging:
                     slider_set_from_mouse(e.pos[0])
+                if freehand_active:
+                    freehand_sample(*screen_to_world(*e.pos))
                 if dragging:
                     if (tool==TOOL_HAND) or space_pan or mmb_pan:
                         ox += (e.pos[0]-last_mouse[0]); oy += (e.pos[1]-last_mouse[1]); last_mouse=e.pos
@@ -1600,10 +2012,28 @@ def main():
                         elif sel_kind=="door" and not doors[cast(int, sel_idx)].get('locked',False):
                             d=doors[cast(int, sel_idx)]
                             d['pts']=[(int(round(x+dx)), int(round(y+dy))) for (x,y) in drag_orig_pts_cache]
+                            touch_overlays()
 
         if PHASE == "start":
+            screen.fill(C_BG)
+            all_recents = _recent_list()
+            visible_for_now = [p for p in all_recents if p not in hidden_recent_set]
+            thumb_pipeline.poll()
+            previews = thumb_index.previews(visible_for_now)
+            thumb_pipeline.request(visible_for_now)
+            uptime_s = (pygame.time.get_ticks() - app_start_ms)/1000.0
+            cached_start_hit = draw_start_menu(
+                screen, (mx, my), FONTS, visible_for_now, start_pressed,
+                title_text="Welcome!", uptime_s=uptime_s, auto_hide_min=30,
+                previews=previews,
+            )
+            pygame.display.flip()
             continue
 
+        journal_tick()
+        if wall_union.poll() and wall_union.layer_for(_union_base()[1], (WORLD_W, WORLD_H), brush_w) is not None:
+            update_mask()       # switch to the finished layer now, not at the next edit
+
         screen.fill(C_BG)
 
         topbar_hit_cache = draw_topbar(screen, FONTS, pressed=topbar_pressed, thickness=int(brush_w))
@@ -1654,16 +2084,24 @@ def main():
             "n_door_back": sum(1 for d in doors if d.get('kind','next')=='back'),
             "n_entry_next": len(entry_next_spawns),
             "n_entry_back": len(entry_back_spawns),
+            "mask_tiles": mask_world.stats(),
         }
         wx,wy = screen_to_world(mx,my)
         msg = f"{int(wx)}, {int(wy)}"
         if mode=="create":
-            if create_tool in (TOOL_BRUSH, TOOL_LINE) and points: msg += f"  pts:{len(points)}"
+            if create_tool in (TOOL_BRUSH, TOOL_FREEHAND, TOOL_LINE) and points: msg += f"  pts:{len(points)}"
             if create_tool in (TOOL_DOOR_NEXT, TOOL_DOOR_BACK) and door_points: msg += f"  door_pts:{len(door_points)}"
+        if status_note and pygame.time.get_ticks() < status_note_until: msg += f"   {status_note}"
         draw_status(screen, FONTS, msg, info)
 
         pygame.display.flip()
 
+    for t in tabs:
+        if t.get("journal") is not None:
+            t["journal"].close()
+    thumb_pipeline.shutdown()
+    wall_union.shutdown()
+    zoom_scaler.shutdown()
     pygame.quit()
 
 if __name__ == "__main__":
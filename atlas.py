@@ -0,0 +1,151 @@
+from __future__ import annotations
+import io, os, json
+from typing import Any, Dict, List, Optional, Tuple
+
+import pygame
+
+from raster import place_image_onto_canvas
+
+# Packs many rooms' baked masks (and optionally their backgrounds) into a few
+# large atlas pages so the game opens a handful of images instead of one per
+# room. Placement is MaxRects with best-short-side-fit; rooms are never rotated.
+# Background pages mirror the mask pages, so one (page, x, y) covers both.
+
+ATLAS_PAGE_SIZE = 4096
+ATLAS_PADDING = 2          # empty pixels between rooms so filtering/sampling never bleeds
+
+
+class MaxRects:
+    """Free-rectangle bin packer for one page."""
+
+    def __init__(self, w: int, h: int):
+        self.w, self.h = w, h
+        self.free: List[pygame.Rect] = [pygame.Rect(0, 0, w, h)]
+
+    def insert(self, w: int, h: int) -> Optional[Tuple[int, int]]:
+        best: Optional[pygame.Rect] = None
+        best_key = None
+        for fr in self.free:
+            if fr.w >= w and fr.h >= h:
+                lw, lh = fr.w - w, fr.h - h
+                key = (min(lw, lh), max(lw, lh), fr.y, fr.x)
+                if best_key is None or key < best_key:
+                    best, best_key = fr, key
+        if best is None:
+            return None
+        placed = pygame.Rect(best.x, best.y, w, h)
+        self._split(placed)
+        return placed.x, placed.y
+
+    def _split(self, used: pygame.Rect) -> None:
+        out: List[pygame.Rect] = []
+        for fr in self.free:
+            if not fr.colliderect(used):
+                out.append(fr)
+                continue
+            # up to four maximal leftovers around the used box
+            if used.x > fr.x:
+                out.append(pygame.Rect(fr.x, fr.y, used.x - fr.x, fr.h))
+            if used.right < fr.right:
+                out.append(pygame.Rect(used.right, fr.y, fr.right - used.right, fr.h))
+            if used.y > fr.y:
+                out.append(pygame.Rect(fr.x, fr.y, fr.w, used.y - fr.y))
+            if used.bottom < fr.bottom:
+                out.append(pygame.Rect(fr.x, used.bottom, fr.w, fr.bottom - used.bottom))
+        # drop free rects contained in another one
+        out.sort(key=lambda r: r.w * r.h, reverse=True)
+        kept: List[pygame.Rect] = []
+        for r in out:
+            if not any(k.contains(r) for k in kept):
+                kept.append(r)
+        self.free = kept
+
+
+def pack_rects(
+    sizes: List[Tuple[int, int]], page_size: int = ATLAS_PAGE_SIZE, padding: int = ATLAS_PADDING
+) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+    """Place every (w, h) on some page; returns [(page, x, y)] in input order and each page's used size.
+
+    Larger items go first; each goes on the first page with room, else a new
+    page. An item bigger than a page gets a page of its own size.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (max(sizes[i]), sizes[i][0] * sizes[i][1]), reverse=True)
+    bins: List[MaxRects] = []
+    extents: List[List[int]] = []
+    placed: List[Tuple[int, int, int]] = [(0, 0, 0)] * len(sizes)
+    for i in order:
+        w, h = sizes[i]
+        pw, ph = w + padding, h + padding
+        spot = None
+        for p, b in enumerate(bins):
+            xy = b.insert(pw, ph)
+            if xy is not None:
+                spot = (p, xy[0], xy[1])
+                break
+        if spot is None:
+            b = MaxRects(max(page_size, pw), max(page_size, ph))
+            bins.append(b); extents.append([0, 0])
+            xy = b.insert(pw, ph)
+            assert xy is not None
+            spot = (len(bins) - 1, xy[0], xy[1])
+        p, x, y = spot
+        extents[p][0] = max(extents[p][0], x + w)
+        extents[p][1] = max(extents[p][1], y + h)
+        placed[i] = spot
+    return placed, [(e[0], e[1]) for e in extents]
+
+
+def load_bg(bg_src: Optional[Tuple[str, Any]], world: Tuple[int, int]) -> Optional[pygame.Surface]:
+    """Project background (load_project_file's bg tuple) on a world-sized canvas, like the editor shows it."""
+    if bg_src is None:
+        return None
+    kind, val = bg_src
+    img = pygame.image.load(val) if kind == "path" else pygame.image.load(io.BytesIO(val), "bg.png")
+    return place_image_onto_canvas(img, world) if img.get_size() != tuple(world) else img
+
+
+def write_atlas(
+    rooms: List[Dict[str, Any]],
+    out_base: str,
+    page_size: int = ATLAS_PAGE_SIZE,
+    padding: int = ATLAS_PADDING,
+) -> Dict[str, Any]:
+    """Write <out_base>_<n>.png (+ <out_base>_bg_<n>.png) pages and the <out_base>.json index.
+
+    rooms: dicts with "name", "mask" (Surface), optional "bg" (Surface) and "source".
+    """
+    placed, extents = pack_rects([r["mask"].get_size() for r in rooms], page_size, padding)
+    with_bg = any(r.get("bg") is not None for r in rooms)
+    stem = os.path.basename(out_base)
+    os.makedirs(os.path.dirname(out_base) or ".", exist_ok=True)
+
+    pages = [pygame.Surface(ext) for ext in extents]
+    bg_pages = [pygame.Surface(ext) for ext in extents] if with_bg else []
+    for pg in pages + bg_pages:
+        pg.fill((0, 0, 0))
+    index: Dict[str, Any] = {"padding": padding, "pages": [], "rooms": {}}
+    for r, (p, x, y) in zip(rooms, placed):
+        pages[p].blit(r["mask"], (x, y))
+        if r.get("bg") is not None:
+            bg_pages[p].blit(r["bg"], (x, y))
+        name = r["name"]
+        n = 2
+        while name in index["rooms"]:
+            name = f"{r['name']}_{n}"; n += 1
+        w, h = r["mask"].get_size()
+        index["rooms"][name] = {"page": p, "x": x, "y": y, "w": w, "h": h,
+                                "bg": r.get("bg") is not None, "source": r.get("source", "")}
+
+    used = sum(r["mask"].get_width() * r["mask"].get_height() for r in rooms)
+    total = 0
+    for p, pg in enumerate(pages):
+        entry = {"mask": f"{stem}_{p}.png", "w": pg.get_width(), "h": pg.get_height()}
+        pygame.image.save(pg, f"{out_base}_{p}.png")
+        if with_bg:
+            entry["bg"] = f"{stem}_bg_{p}.png"
+            pygame.image.save(bg_pages[p], f"{out_base}_bg_{p}.png")
+        index["pages"].append(entry)
+        total += pg.get_width() * pg.get_height()
+    with open(out_base + ".json", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    return {"rooms": len(rooms), "pages": len(pages), "fill": used / total if total else 0.0}
@@ -0,0 +1,408 @@
+from __future__ import annotations
+import os, sys, json, time, hashlib, argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+# Headless batch export: python bake_masks.py rooms/ other.xzenp -o build/masks -j 8
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from persist import load_project_file, bake_mask_surface, bake_mask_surface_reference
+from raster import render_mask
+from theme import MASK_ERASE_COLOR
+from maskexport import FORMATS, export_baked, export_paths, parse_formats
+from tiles import TILE_SIZE
+from rebake import region_hashes, dirty_regions, rebake_regions, previous_baked
+from atlas import ATLAS_PAGE_SIZE, load_bg, write_atlas
+
+MANIFEST_NAME = ".bake_manifest.json"
+DEFAULT_NAME = "{stem}_mask.png"
+BAKE_VERSION = 1
+
+
+def find_projects(inputs: List[str]) -> List[str]:
+    out: List[str] = []
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _dirs, files in os.walk(item):
+                for name in sorted(files):
+                    if name.lower().endswith(".xzenp"):
+                        out.append(os.path.join(root, name))
+        elif os.path.isfile(item):
+            out.append(item)
+        else:
+            print(f"⚠️ Not found: {item}")
+    uniq = []
+    for p in out:
+        ap = os.path.abspath(p)
+        if ap not in seen:
+            seen.add(ap); uniq.append(ap)
+    return uniq
+
+
+def output_path_for(project_path: str, out_dir: Optional[str], pattern: str) -> str:
+    stem = os.path.splitext(os.path.basename(project_path))[0]
+    d = out_dir or os.path.dirname(project_path)
+    return os.path.join(d, pattern.format(stem=stem))
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def bake_inputs_hash(proj: Dict[str, Any]) -> str:
+    """Hash of exactly what the baked mask depends on (not bg, zoom, alpha...)."""
+    keyed = {
+        "v": BAKE_VERSION,
+        "world_size": list(proj["world_size"]),
+        "brush_w": proj["brush_w"],
+        "strokes": proj["strokes"],
+        "doors": proj["doors"],
+        "spawn_pos": proj["spawn_pos"],
+        "entry_next_spawns": proj["entry_next_spawns"],
+        "entry_back_spawns": proj["entry_back_spawns"],
+    }
+    raw = json.dumps(keyed, sort_keys=True, separators=(",", ":"), default=list)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _bg_key(bg_src: Optional[Tuple[str, Any]]) -> str:
+    if bg_src is None:
+        return ""
+    kind, val = bg_src
+    if kind == "path":
+        return json.dumps([os.path.abspath(val), _stat_key(val)])
+    return hashlib.sha1(val).hexdigest()
+
+
+def bake_one(
+    project_path: str,
+    outs: Dict[str, str],
+    prev_hash: Optional[str],
+    force: bool,
+    tile_size: int = TILE_SIZE,
+    prev_regions: Optional[List[str]] = None,
+    atlas: bool = False,
+    atlas_bg: bool = False,
+) -> Dict[str, Any]:
+    """Worker job: load, hash inputs, bake and write one mask in every requested format.
+
+    With the previous run's region hashes and its baked image still on disk,
+    only the regions whose inputs changed are re-baked and patched in.
+    With atlas set, the baked pixels also come back for packing (see _atlas_part).
+    """
+    t0 = time.perf_counter()
+    proj, bg_src = load_project_file(project_path, allow_bg_prompt=False)
+    h = bake_inputs_hash(proj)
+    extra = _bg_key(bg_src) if "tiles" in outs else ""    # background tiles also depend on the background image
+    if extra:
+        h = hashlib.sha1((h + extra).encode("utf-8")).hexdigest()
+    w, hgt = proj["world_size"]
+    regions = region_hashes(proj, tile_size, extra)
+    res: Dict[str, Any] = {"path": project_path, "outs": outs, "hash": h, "pixels": int(w) * int(hgt),
+                           "region_hashes": regions}
+    if not force and prev_hash == h and all(os.path.isfile(o) for o in outs.values()):
+        res["status"] = "unchanged"
+        if atlas:
+            res["atlas"] = _atlas_part(proj, bg_src, previous_baked(outs, (int(w), int(hgt))), atlas_bg)
+        res["secs"] = time.perf_counter() - t0
+        return res
+    dirty = None if force else dirty_regions(prev_regions, regions)
+    prev = None
+    if dirty is not None and len(dirty) * 2 <= len(regions) and all(os.path.isfile(o) for o in outs.values()):
+        if set(outs) == {"tiles"}:
+            # only the dirty tiles get written and they are re-baked whole, so nothing old is needed
+            prev = pygame.Surface((int(w), int(hgt)))
+            prev.fill(MASK_ERASE_COLOR)
+        else:
+            prev = previous_baked(outs, (int(w), int(hgt)))
+    if prev is not None and dirty is not None:
+        baked = rebake_regions(prev, proj, dirty, tile_size)
+        res["rebaked"] = [len(dirty), len(regions)]
+    else:
+        dirty = None
+        baked = _bake(proj)
+    for o in outs.values():
+        os.makedirs(os.path.dirname(o) or ".", exist_ok=True)
+    # a background change dirties every region, so patched exports keep their bg tiles
+    bg = load_bg(bg_src, proj["world_size"]) if "tiles" in outs and dirty is None else None
+    res.update(export_baked(baked, outs, proj, source=os.path.basename(project_path), bg=bg,
+                            tile_size=tile_size, tiles_only=dirty))
+    if atlas:
+        res["atlas"] = _atlas_part(proj, bg_src, baked, atlas_bg, bg)
+    res["status"] = "baked"
+    res["secs"] = time.perf_counter() - t0
+    return res
+
+
+def _bake(proj: Dict[str, Any]) -> pygame.Surface:
+    mask = render_mask(proj["world_size"], proj["strokes"], proj["brush_w"])
+    return bake_mask_surface(
+        mask, proj["spawn_pos"], proj["entry_next_spawns"], proj["entry_back_spawns"], proj["doors"]
+    )
+
+
+def _atlas_part(
+    proj: Dict[str, Any],
+    bg_src: Optional[Tuple[str, Any]],
+    baked: Optional[pygame.Surface],
+    with_bg: bool,
+    bg: Optional[pygame.Surface] = None,
+) -> Dict[str, Any]:
+    """One room's baked mask and background as RGB bytes, for write_atlas in the parent.
+
+    baked is None when no usable earlier export is on disk (e.g. only
+    colliders were exported); the room is then baked here.
+    """
+    if baked is None:
+        baked = _bake(proj)
+    if with_bg and bg is None:
+        bg = load_bg(bg_src, proj["world_size"])
+    return {
+        "size": baked.get_size(),
+        "mask": pygame.image.tobytes(baked, "RGB"),
+        "bg": pygame.image.tobytes(bg, "RGB") if with_bg and bg is not None else None,
+    }
+
+
+def atlas_room(project_path: str, outs: Dict[str, str], with_bg: bool) -> Dict[str, Any]:
+    """Worker job for a project the manifest says is unchanged: its atlas part only.
+
+    Re-reads the last export instead of baking, so an unchanged project costs
+    a load, not a bake.
+    """
+    t0 = time.perf_counter()
+    proj, bg_src = load_project_file(project_path, allow_bg_prompt=False)
+    w, h = proj["world_size"]
+    part = _atlas_part(proj, bg_src, previous_baked(outs, (int(w), int(h))), with_bg)
+    return {"path": project_path, "outs": outs, "status": "unchanged", "atlas": part,
+            "secs": time.perf_counter() - t0}
+
+
+def verify_one(project_path: str) -> Dict[str, Any]:
+    """Worker job: bake with the array engine and the set_at/draw.polygon reference, compare bytes."""
+    proj, _bg = load_project_file(project_path, allow_bg_prompt=False)
+    mask = render_mask(proj["world_size"], proj["strokes"], proj["brush_w"])
+    args = (proj["spawn_pos"], proj["entry_next_spawns"], proj["entry_back_spawns"], proj["doors"])
+    t0 = time.perf_counter()
+    fast = bake_mask_surface(mask, *args)
+    t1 = time.perf_counter()
+    ref = bake_mask_surface_reference(mask, *args)
+    t2 = time.perf_counter()
+    same = pygame.image.tobytes(fast, "RGB") == pygame.image.tobytes(ref, "RGB")
+    return {"path": project_path, "same": same, "fast_s": t1 - t0, "ref_s": t2 - t1}
+
+
+def run_verify(inputs: List[str], *, jobs: Optional[int] = None) -> int:
+    projects = find_projects(inputs)
+    bad = 0; fast_s = ref_s = 0.0
+    with ProcessPoolExecutor(max_workers=max(1, jobs or os.cpu_count() or 1)) as pool:
+        for res in pool.map(verify_one, projects):
+            fast_s += res["fast_s"]; ref_s += res["ref_s"]
+            if not res["same"]:
+                bad += 1
+                print(f"❌ {res['path']}: baked output differs from reference")
+    print(f"🔍 {len(projects)} project(s) verified, {bad} mismatch(es); "
+          f"bake {fast_s * 1000:.0f} ms vs reference {ref_s * 1000:.0f} ms")
+    return 1 if bad else 0
+
+
+def _load_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_manifest(path: str, data: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def run(
+    inputs: List[str],
+    *,
+    out_dir: Optional[str] = None,
+    pattern: str = DEFAULT_NAME,
+    formats: Tuple[str, ...] = ("png",),
+    jobs: Optional[int] = None,
+    force: bool = False,
+    quiet: bool = False,
+    tile_size: int = TILE_SIZE,
+    atlas: Optional[str] = None,
+    atlas_size: int = ATLAS_PAGE_SIZE,
+    atlas_bg: bool = False,
+) -> Dict[str, Any]:
+    """Bake every project that changed; with atlas, also pack every room into atlas pages.
+
+    The atlas is fed by the same jobs: baked rooms hand back their pixels,
+    unchanged ones re-read their last export, failed ones are left out.
+    """
+    projects = find_projects(inputs)
+    t0 = time.perf_counter()
+    manifests: Dict[str, Dict[str, Any]] = {}
+    todo: List[Tuple[str, Dict[str, str], Optional[str], Optional[List[str]], str]] = []
+    cached: List[Tuple[str, Dict[str, str]]] = []      # unchanged, but the atlas still needs their pixels
+    stats = {"total": len(projects), "baked": 0, "unchanged": 0, "failed": 0, "pixels": 0,
+             "rects": 0, "wall_px": 0, "patched": 0}
+    opts = {"tile": tile_size} if "tiles" in formats else {}   # output options the hash doesn't cover
+
+    for p in projects:
+        out = output_path_for(p, out_dir, pattern)
+        outs = export_paths(out, formats)
+        mpath = os.path.join(os.path.dirname(out) or ".", MANIFEST_NAME)
+        man = manifests.setdefault(mpath, _load_manifest(mpath))
+        ent = man.get(p)
+        same_outs = bool(ent) and ent.get("outs") == outs and ent.get("opts", {}) == opts
+        if not force and same_outs and ent.get("stat") == _stat_key(p) \
+                and all(os.path.isfile(o) for o in outs.values()):
+            stats["unchanged"] += 1     # fast path: project file untouched since last bake
+            if atlas:
+                cached.append((p, outs))
+            continue
+        # a different format set means the old hash doesn't cover these outputs
+        prev = ent.get("hash") if same_outs else None
+        prev_regions = ent.get("regions") if same_outs else None
+        todo.append((p, outs, prev, prev_regions, mpath))
+
+    results: List[Dict[str, Any]] = []
+    parts: Dict[str, Dict[str, Any]] = {}
+    if todo or cached:
+        workers = jobs or min(len(todo) + len(cached), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+            futs = {pool.submit(bake_one, p, outs, h, force, tile_size, regs, bool(atlas), atlas_bg): (p, outs, mpath)
+                    for (p, outs, h, regs, mpath) in todo}
+            futs.update({pool.submit(atlas_room, p, outs, atlas_bg): (p, outs, None) for (p, outs) in cached})
+            for fut in as_completed(futs):
+                p, outs, mpath = futs[fut]
+                try:
+                    res = fut.result()
+                except Exception as ex:
+                    stats["failed"] += 1
+                    print(f"💥 {p}: {ex}")
+                    continue
+                if res.get("atlas") is not None:
+                    parts[p] = res.pop("atlas")
+                if mpath is None:
+                    continue    # atlas-only job, already counted as unchanged
+                results.append(res)
+                stats[res["status"]] += 1
+                if res["status"] == "baked":
+                    stats["pixels"] += res["pixels"]
+                    if res.get("rebaked"):
+                        stats["patched"] += 1
+                    if not quiet:
+                        names = ", ".join(os.path.basename(o) for o in outs.values())
+                        part = f", {res['rebaked'][0]}/{res['rebaked'][1]} region(s) re-baked" if res.get("rebaked") else ""
+                        print(f"✅ {os.path.basename(p)} -> {names} ({res['secs'] * 1000:.0f} ms{part})")
+                    col = res.get("colliders")
+                    if col:
+                        stats["rects"] += col["rects"]; stats["wall_px"] += col["wall_px"]
+                        if not quiet:
+                            print(f"   colliders: {col['rects']} rects ({col['from_strokes']} from straight strokes)"
+                                  f" for {col['wall_px']} wall px")
+                    til = res.get("tiles")
+                    if til and not quiet:
+                        print(f"   tiles: {til['mask_tiles']} of {til['tiles']} mask tile(s) non-empty,"
+                              f" {til['bg_tiles']} bg tile(s), {til['files_written']} file(s) written")
+                    reg = res.get("regions")
+                    if reg and not quiet:
+                        print(f"   regions: {reg['doors']} door id(s), {reg['wall_regions']} wall area(s)")
+                    oln = res.get("outlines")
+                    if oln and not quiet:
+                        print(f"   outlines: {oln['outlines']} wall outline(s), {oln['holes']} hole(s),"
+                              f" {oln['vertices']} vertices")
+                manifests[mpath][p] = {"stat": _stat_key(p), "hash": res["hash"], "outs": outs, "opts": opts,
+                                     "regions": res["region_hashes"]}
+
+    for mpath, man in manifests.items():
+        if os.path.isdir(os.path.dirname(mpath) or "."):
+            _save_manifest(mpath, man)
+
+    if atlas:
+        rooms: List[Dict[str, Any]] = []
+        for p in projects:      # input order, so names and placement don't depend on which job finished first
+            part = parts.get(p)
+            if part is None:
+                continue
+            size = part["size"]
+            rooms.append({
+                "name": os.path.splitext(os.path.basename(p))[0],
+                "source": p,
+                "mask": pygame.image.frombytes(part["mask"], size, "RGB"),
+                "bg": pygame.image.frombytes(part["bg"], size, "RGB") if part["bg"] else None,
+            })
+        stats["atlas"] = write_atlas(rooms, atlas, page_size=atlas_size)
+
+    stats["secs"] = time.perf_counter() - t0
+    stats["results"] = results
+    return stats
+
+
+def print_summary(stats: Dict[str, Any]) -> None:
+    secs = max(stats["secs"], 1e-9)
+    done = stats["baked"] + stats["unchanged"]
+    print(
+        f"📦 {stats['total']} project(s): {stats['baked']} baked, {stats['unchanged']} unchanged, "
+        f"{stats['failed']} failed in {secs:.2f}s"
+        + (f" ({stats['patched']} patched incrementally)" if stats.get("patched") else "")
+    )
+    print(
+        f"   throughput: {done / secs:.1f} projects/s, {stats['baked'] / secs:.1f} bakes/s, "
+        f"{stats['pixels'] / secs / 1e6:.1f} Mpx/s"
+    )
+    if stats.get("rects"):
+        print(f"   colliders: {stats['rects']} rects for {stats['wall_px']} wall px "
+              f"({stats['wall_px'] / stats['rects']:.0f} px per rect)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Bake collision masks for .xzenp projects without the GUI.")
+    ap.add_argument("inputs", nargs="+", help="project files or directories (searched recursively)")
+    ap.add_argument("-o", "--out-dir", help="write masks here (default: next to each project)")
+    ap.add_argument("--name", default=DEFAULT_NAME, help="output file name pattern (default: %(default)s)")
+    ap.add_argument("--formats", default="png",
+                    help=f"comma-separated outputs: {', '.join(FORMATS)} (default: %(default)s)")
+    ap.add_argument("--tile-size", type=int, default=TILE_SIZE,
+                    help="chunk size in px for --formats tiles (default: %(default)s)")
+    ap.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    ap.add_argument("-f", "--force", action="store_true", help="re-bake even if inputs are unchanged")
+    ap.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    ap.add_argument("--atlas", metavar="BASE",
+                    help="also pack every room's mask into BASE_<n>.png atlas pages with a BASE.json index")
+    ap.add_argument("--atlas-size", type=int, default=ATLAS_PAGE_SIZE, help="atlas page size (default: %(default)s)")
+    ap.add_argument("--atlas-bg", action="store_true", help="pack the backgrounds too, into BASE_bg_<n>.png")
+    ap.add_argument("--verify", action="store_true",
+                    help="don't write anything; check the baked pixels match the reference baker byte for byte")
+    args = ap.parse_args(argv)
+
+    if args.verify:
+        return run_verify(args.inputs, jobs=args.jobs)
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as ex:
+        ap.error(str(ex))
+
+    stats = run(args.inputs, out_dir=args.out_dir, pattern=args.name, formats=formats,
+                jobs=args.jobs, force=args.force, quiet=args.quiet, tile_size=args.tile_size,
+                atlas=args.atlas, atlas_size=args.atlas_size, atlas_bg=args.atlas_bg)
+    print_summary(stats)
+    info = stats.get("atlas")
+    if info:
+        print(f"🗺️ atlas: {info['rooms']} room(s) on {info['pages']} page(s), "
+              f"{info['fill'] * 100:.0f}% filled -> {args.atlas}.json")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pygame
+
+from raster import orthogonalize_pts, axis_segment_rect, stroke_width
+from theme import LINE_WIDTH_DEFAULT
+
+# Wall colliders as axis-aligned rectangles, plus door polygons, for game code
+# that shouldn't test the mask per pixel.
+
+
+def row_runs(walls: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Horizontal runs of True per row: (y, x0, x1) with x1 exclusive."""
+    edges = np.diff(np.pad(walls.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    ys, xs = np.nonzero(edges)
+    kinds = edges[ys, xs]
+    return ys[kinds == 1], xs[kinds == 1], xs[kinds == -1]
+
+
+def greedy_rects(walls: np.ndarray) -> np.ndarray:
+    """Greedy meshing: each rect grows downward while the next row fully covers [x0, x1).
+
+    Rows are swept top to bottom. Open rects whose span is still all wall carry
+    on; the others close. What's left of the row's runs outside the carried
+    spans opens new rects. Returns an (n, 4) int array of x, y, w, h, sorted by
+    y then x, covering exactly the True pixels without overlap.
+    """
+    h, w = walls.shape
+    ox0 = ox1 = oy = np.zeros(0, dtype=np.int64)
+    done: List[np.ndarray] = []
+    for y in range(h + 1):
+        row = walls[y] if y < h else np.zeros(w, dtype=bool)
+        cs = np.r_[0, np.cumsum(row, dtype=np.int64)]
+        keep = cs[ox1] - cs[ox0] == ox1 - ox0
+        if not keep.all():
+            shut = ~keep
+            done.append(np.stack([ox0[shut], oy[shut], ox1[shut] - ox0[shut], y - oy[shut]], axis=1))
+            ox0, ox1, oy = ox0[keep], ox1[keep], oy[keep]
+        if y == h:
+            break
+        held = np.zeros(w + 1, dtype=np.int64)
+        held[ox0] += 1
+        held[ox1] -= 1
+        free = row & (np.cumsum(held[:w]) == 0)
+        edges = np.diff(np.r_[0, free.astype(np.int8), 0])
+        nx0, nx1 = np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]
+        if len(nx0):
+            ox0, ox1 = np.r_[ox0, nx0], np.r_[ox1, nx1]
+            oy = np.r_[oy, np.full(len(nx0), y, dtype=np.int64)]
+    if not done:
+        return np.zeros((0, 4), dtype=np.int64)
+    rects = np.concatenate(done).astype(np.int64)
+    return rects[np.lexsort((rects[:, 0], rects[:, 1]))]
+
+
+def straight_stroke_rects(st: Dict[str, Any], default_w: int = LINE_WIDTH_DEFAULT) -> List[pygame.Rect]:
+    """The boxes raster.draw_stroke_on fills for a straight_poly stroke."""
+    o = orthogonalize_pts([(int(x), int(y)) for (x, y) in st['pts']])
+    w = stroke_width(st, default_w)
+    if not o:
+        return []
+    if len(o) == 1:
+        return [pygame.Rect(o[0][0] - w//2, o[0][1] - w//2, w, w)]
+    segs = [axis_segment_rect(w, a, b) for a, b in zip(o, o[1:])]
+    joints = [pygame.Rect(int(jx - w//2), int(jy - w//2), w, w) for (jx, jy) in o]
+    return segs + [j for j in joints if not any(s.contains(j) for s in segs)]
+
+
+def wall_colliders(
+    walls: np.ndarray,
+    strokes: List[Dict[str, Any]],
+    default_w: int = LINE_WIDTH_DEFAULT,
+) -> Tuple[np.ndarray, int]:
+    """Rectangles covering the baked wall pixels; returns (rects, how many came straight from strokes).
+
+    straight_poly boxes are taken as-is wherever the baked walls still cover
+    them entirely (no door or marker painted over); everything left is meshed.
+    """
+    h, w = walls.shape
+    bounds = pygame.Rect(0, 0, w, h)
+    covered = np.zeros_like(walls, dtype=bool)
+    direct: List[Tuple[int, int, int, int]] = []
+    for st in strokes:
+        if not st.get('visible', True) or st.get('mode') != 'straight_poly':
+            continue
+        for r in straight_stroke_rects(st, default_w):
+            r = r.clip(bounds)
+            if r.w <= 0 or r.h <= 0:
+                continue
+            if walls[r.y:r.bottom, r.x:r.right].all():
+                covered[r.y:r.bottom, r.x:r.right] = True
+                direct.append((r.x, r.y, r.w, r.h))
+    meshed = greedy_rects(walls & ~covered)
+    rects = np.concatenate([np.array(direct, dtype=np.int64).reshape(-1, 4), meshed])
+    return rects, len(direct)
+
+
+def door_polygons(doors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out = []
+    for d in doors:
+        if not d.get('visible', True) or len(d.get('pts', [])) < 3:
+            continue
+        out.append({
+            "name": d.get('name', ''),
+            "kind": d.get('kind', 'next'),
+            "pts": [[int(x), int(y)] for (x, y) in d['pts']],
+        })
+    return out
+
+
+def build_colliders(walls: np.ndarray, proj: Dict[str, Any]) -> Dict[str, Any]:
+    rects, n_direct = wall_colliders(walls, proj.get("strokes", []), proj.get("brush_w", LINE_WIDTH_DEFAULT))
+    h, w = walls.shape
+    return {
+        "w": w, "h": h,
+        "walls": rects.tolist(),
+        "doors": door_polygons(proj.get("doors", [])),
+        "stats": {
+            "wall_px": int(walls.sum()),
+            "rects": int(len(rects)),
+            "from_strokes": n_direct,
+        },
+    }
+
+
+def write_colliders(path: str, walls: np.ndarray, proj: Dict[str, Any]) -> Dict[str, Any]:
+    data = build_colliders(walls, proj)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    return data["stats"]
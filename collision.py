@@ -0,0 +1,298 @@
+from __future__ import annotations
+import os, sys, json, math, struct, time, random
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Runtime collision queries for exported rooms (bake_masks.py --formats bits,npy,rects,ids).
+# Game-side module: numpy only, no pygame, no image decoding.
+#
+#   room = Room.load("build/masks/room01_mask")
+#   room.point_in_wall(x, y); room.aabb_hits_wall(x, y, w, h)
+#   x, y, hit_x, hit_y = room.move_aabb(x, y, w, h, dx, dy)
+#   room.door_at(x, y) -> {"name": ..., "kind": "next"|"back"} or None
+
+BITS_MAGIC = b"XZB1"                     # same layout as maskexport.write_bits
+BITS_HEADER = struct.Struct("<4sII")
+DOOR_NEXT, DOOR_BACK = 3, 4              # maskexport label codes
+EDGE_EPS = 1e-7                          # a box edge this close to a pixel line doesn't enter the next pixel
+
+
+def _read_bits(path: str) -> np.ndarray:
+    with open(path, "rb") as f:
+        magic, w, h = BITS_HEADER.unpack(f.read(BITS_HEADER.size))
+        if magic != BITS_MAGIC:
+            raise ValueError(f"not a wall bitmap: {path}")
+        packed = np.frombuffer(f.read(), dtype=np.uint8).reshape(h, (w + 7) // 8)
+    return np.unpackbits(packed, axis=1, count=w).astype(bool)
+
+
+def _px_span(lo: float, size: float) -> Tuple[int, int]:
+    """Pixel range [p0, p1) touched by the interval [lo, lo + size)."""
+    return math.floor(lo + EDGE_EPS), math.ceil(lo + size - EDGE_EPS)
+
+
+def _point_in_poly(x: float, y: float, pts: List[List[int]]) -> bool:
+    inside = False
+    n = len(pts)
+    for i in range(n):
+        x1, y1 = pts[i - 1]; x2, y2 = pts[i]
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+class RectIndex:
+    """Uniform grid over wall rectangles, for rooms exported with rects only."""
+
+    def __init__(self, rects: List[List[int]], cell: int = 64):
+        self.rects = [tuple(r) for r in rects]
+        self.cell = cell
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, (x, y, w, h) in enumerate(self.rects):
+            for cy in range(y // cell, (y + h - 1) // cell + 1):
+                for cx in range(x // cell, (x + w - 1) // cell + 1):
+                    self.grid.setdefault((cx, cy), []).append(i)
+
+    def hit_point(self, x: int, y: int) -> bool:
+        for i in self.grid.get((x // self.cell, y // self.cell), ()):
+            rx, ry, rw, rh = self.rects[i]
+            if rx <= x < rx + rw and ry <= y < ry + rh:
+                return True
+        return False
+
+    def hit_box(self, x0: int, y0: int, x1: int, y1: int) -> bool:
+        c = self.cell
+        for cy in range(y0 // c, (y1 - 1) // c + 1):
+            for cx in range(x0 // c, (x1 - 1) // c + 1):
+                for i in self.grid.get((cx, cy), ()):
+                    rx, ry, rw, rh = self.rects[i]
+                    if rx < x1 and x0 < rx + rw and ry < y1 and y0 < ry + rh:
+                        return True
+        return False
+
+
+class Room:
+    """Collision data of one exported room.
+
+    With a wall bitmap (.bits or .npy) queries use a summed-area table, so
+    point and box tests are O(1); with only .colliders.json they go through
+    a RectIndex. Coordinates are world pixels; boxes are x, y, w, h.
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        walls: Optional[np.ndarray] = None,
+        rects: Optional[List[List[int]]] = None,
+        doors: Optional[List[Dict[str, Any]]] = None,
+        labels: Optional[np.ndarray] = None,
+        door_ids: Optional[np.ndarray] = None,
+        door_table: Optional[List[Dict[str, Any]]] = None,
+        solid_outside: bool = False,
+    ):
+        self.w, self.h = int(size[0]), int(size[1])
+        self.solid_outside = solid_outside
+        self.doors = doors or []
+        self._labels = memoryview(np.ascontiguousarray(labels, dtype=np.uint8)).cast("B") if labels is not None else None
+        # per-pixel door id (0 = none) -> door_table[id - 1]; makes door_at one index
+        self._door_ids = memoryview(np.ascontiguousarray(door_ids, dtype=np.uint16)).cast("B").cast("H") \
+            if door_ids is not None else None
+        self._door_by_id = [None] + [{"name": d["name"], "kind": d["kind"]} for d in (door_table or [])]
+        self._index: Optional[RectIndex] = None
+        self._sat: Optional[memoryview] = None
+        self._px: Optional[bytes] = None
+        if walls is not None:
+            self._px = np.ascontiguousarray(walls, dtype=np.uint8).tobytes()
+            # int64: a world past 2**31 wall pixels would wrap an int32 table
+            sat = np.zeros((self.h + 1, self.w + 1), dtype=np.int64)
+            sat[1:, 1:] = walls.astype(np.int64).cumsum(0).cumsum(1)
+            self._sat = memoryview(sat).cast("B").cast("q")
+        elif rects is not None:
+            self._index = RectIndex(rects)
+        else:
+            raise ValueError("Room needs a wall bitmap or wall rectangles")
+        self._door_boxes = []
+        for d in self.doors:
+            xs = [p[0] for p in d["pts"]]; ys = [p[1] for p in d["pts"]]
+            self._door_boxes.append((min(xs), min(ys), max(xs), max(ys)))
+
+    @classmethod
+    def load(cls, base: str, solid_outside: bool = False) -> "Room":
+        """Load <base>.bits / <base>.npy / <base>.colliders.json / <base>.ids.json, whichever exist."""
+        walls = labels = door_ids = None
+        rects = doors = door_table = None
+        size: Optional[Tuple[int, int]] = None
+        if os.path.isfile(base + ".npy"):
+            labels = np.load(base + ".npy", mmap_mode="r")
+            walls = labels == 1
+        elif os.path.isfile(base + ".bits"):
+            walls = _read_bits(base + ".bits")
+        if walls is not None:
+            size = (walls.shape[1], walls.shape[0])
+        if os.path.isfile(base + ".colliders.json"):
+            with open(base + ".colliders.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            rects, doors = data["walls"], data["doors"]
+            size = size or (data["w"], data["h"])
+        if os.path.isfile(base + ".ids.json") and os.path.isfile(base + ".door_ids.npy"):
+            with open(base + ".ids.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            door_ids = np.load(base + ".door_ids.npy")
+            door_table = data["doors"]           # entry i has id i + 1
+            size = size or (data["w"], data["h"])
+        if size is None:
+            raise FileNotFoundError(f"no exported collision data for {base}")
+        return cls(size, walls=walls, rects=rects, doors=doors, labels=labels, door_ids=door_ids,
+                   door_table=door_table, solid_outside=solid_outside)
+
+    # ---- walls ----
+    def _count(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        s, W = self._sat, self.w + 1
+        return s[y1 * W + x1] - s[y0 * W + x1] - s[y1 * W + x0] + s[y0 * W + x0]  # type: ignore[index]
+
+    def point_in_wall(self, x: float, y: float) -> bool:
+        if x < 0 or y < 0:
+            return self.solid_outside
+        xi, yi = int(x), int(y)              # floor, since both are >= 0
+        if xi >= self.w or yi >= self.h:
+            return self.solid_outside
+        if self._px is not None:
+            return self._px[yi * self.w + xi] == 1
+        return self._index.hit_point(xi, yi)  # type: ignore[union-attr]
+
+    def _hits_px(self, x0: int, y0: int, x1: int, y1: int) -> bool:
+        # any wall in the pixel range [x0, x1) x [y0, y1)
+        if x1 <= x0 or y1 <= y0:
+            return False
+        if self.solid_outside and (x0 < 0 or y0 < 0 or x1 > self.w or y1 > self.h):
+            return True
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.w), min(y1, self.h)
+        if x1 <= x0 or y1 <= y0:
+            return False
+        if self._sat is not None:
+            return self._count(x0, y0, x1, y1) > 0
+        return self._index.hit_box(x0, y0, x1, y1)  # type: ignore[union-attr]
+
+    def aabb_hits_wall(self, x: float, y: float, w: float, h: float) -> bool:
+        x0, x1 = _px_span(x, w)
+        y0, y1 = _px_span(y, h)
+        return self._hits_px(x0, y0, x1, y1)
+
+    def _sweep_axis(self, x: float, y: float, w: float, h: float, d: float, axis: int) -> Tuple[float, bool]:
+        # Farthest free travel along one axis. The swept box only grows with
+        # distance, so "does it hit a wall" is monotonic in the number of extra
+        # pixel columns (rows) it covers and can be bisected.
+        if d == 0:
+            return 0.0, False
+        lo_edge, size = (x, w) if axis == 0 else (y, h)
+        a0, a1 = _px_span(lo_edge, size)
+        if axis == 0:
+            b0, b1 = _px_span(y, h)
+            hits = lambda p0, p1: self._hits_px(p0, b0, p1, b1)
+        else:
+            b0, b1 = _px_span(x, w)
+            hits = lambda p0, p1: self._hits_px(b0, p0, b1, p1)
+        if hits(a0, a1):
+            return 0.0, True                 # already inside a wall: don't move on this axis
+        if d > 0:
+            n = _px_span(lo_edge + d, size)[1] - a1
+            grow = lambda k: hits(a0, a1 + k)
+        else:
+            n = a0 - _px_span(lo_edge + d, size)[0]
+            grow = lambda k: hits(a0 - k, a1)
+        if n <= 0 or not grow(n):
+            return d, False
+        lo, hi = 0, n                        # grow(lo) is free, grow(hi) is blocked
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if grow(mid):
+                hi = mid
+            else:
+                lo = mid
+        # stop flush against the first blocked column (row)
+        if d > 0:
+            return (a1 + hi - 1) - (lo_edge + size), True
+        return (a0 - hi + 1) - lo_edge, True
+
+    def move_aabb(self, x: float, y: float, w: float, h: float, dx: float, dy: float) -> Tuple[float, float, bool, bool]:
+        """Move a box by (dx, dy), stopping at walls and sliding along them.
+
+        Resolves x then y. Returns the new x, y and whether each axis was blocked.
+        """
+        mx, hit_x = self._sweep_axis(x, y, w, h, dx, 0)
+        x += mx
+        my, hit_y = self._sweep_axis(x, y, w, h, dy, 1)
+        return x, y + my, hit_x, hit_y
+
+    # ---- doors ----
+    def door_at(self, x: float, y: float) -> Optional[Dict[str, Any]]:
+        xi, yi = math.floor(x), math.floor(y)
+        if self._door_ids is not None:
+            if not (0 <= xi < self.w and 0 <= yi < self.h):
+                return None
+            return self._door_by_id[self._door_ids[yi * self.w + xi]]
+        code = None
+        if self._labels is not None:
+            if not (0 <= xi < self.w and 0 <= yi < self.h):
+                return None
+            code = self._labels[yi * self.w + xi]
+            if code != DOOR_NEXT and code != DOOR_BACK:
+                return None
+        edge = None
+        for d, (bx0, by0, bx1, by1) in zip(reversed(self.doors), reversed(self._door_boxes)):
+            # last drawn door wins, like the baked fill
+            if bx0 <= xi <= bx1 and by0 <= yi <= by1:
+                # with labels, the baked code decides which kind of door owns the pixel
+                same = code is None or code == (DOOR_NEXT if d["kind"] == "next" else DOOR_BACK)
+                if same and _point_in_poly(xi + 0.5, yi + 0.5, d["pts"]):
+                    return {"name": d["name"], "kind": d["kind"]}
+                if edge is None and code is not None and same:
+                    edge = d                 # baked edge pixel the center test misses
+        return {"name": edge["name"], "kind": edge["kind"]} if edge else None
+
+
+# ---------- benchmark ----------
+def benchmark(base: str, n: int = 200_000, seed: int = 1) -> Dict[str, float]:
+    """Queries per second for each query type on one exported room."""
+    room = Room.load(base)
+    rnd = random.Random(seed)
+    pts = [(rnd.uniform(0, room.w), rnd.uniform(0, room.h)) for _ in range(n)]
+    out: Dict[str, float] = {}
+
+    def timed(name: str, fn) -> None:
+        t0 = time.perf_counter()
+        for (px, py) in pts:
+            fn(px, py)
+        out[name] = n / max(time.perf_counter() - t0, 1e-9)
+
+    timed("point_in_wall", room.point_in_wall)
+    timed("aabb_hits_wall", lambda px, py: room.aabb_hits_wall(px, py, 16, 24))
+    timed("move_aabb", lambda px, py: room.move_aabb(px, py, 16, 24, 37.0, -23.0))
+    timed("door_at", room.door_at)
+    if room._sat is not None and os.path.isfile(base + ".colliders.json"):
+        with open(base + ".colliders.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rr = Room((room.w, room.h), rects=data["walls"], doors=data["doors"])
+        timed("point_in_wall[rects]", rr.point_in_wall)
+        timed("aabb_hits_wall[rects]", lambda px, py: rr.aabb_hits_wall(px, py, 16, 24))
+    try:
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        import pygame
+        if os.path.isfile(base + ".png"):
+            surf = pygame.image.load(base + ".png")
+            white = (255, 255, 255, 255)
+            timed("Surface.get_at", lambda px, py: surf.get_at((int(px), int(py))) == white)
+    except ImportError:
+        pass
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python collision.py <exported room base, e.g. build/masks/room01_mask> [queries]")
+        sys.exit(2)
+    qps = benchmark(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 200_000)
+    for name, v in qps.items():
+        print(f"{name:24s} {v / 1e6:6.2f} M queries/s")
@@ -0,0 +1,134 @@
+from __future__ import annotations
+from typing import List, Sequence, Tuple
+
+# Polyline geometry for the editor (no pygame).
+
+Pt = Tuple[int, int]
+
+SIMPLIFY_MIN_TOL = 0.5      # world px; below this RDP only drops exactly collinear points
+
+
+def simplify_tolerance(brush_w: int, zoom: float) -> float:
+    """How far (world px) a simplified stroke may stray from the clicked one.
+
+    A quarter of the brush width disappears inside the stroke itself, and
+    one screen pixel at the current zoom is below what the click could aim
+    for; never more than the full brush width.
+    """
+    return max(SIMPLIFY_MIN_TOL, min(float(brush_w), max(brush_w / 4.0, 1.0 / max(zoom, 1e-6))))
+
+
+def _seg_dist2(p: Pt, a: Pt, b: Pt) -> float:
+    ax, ay = a; bx, by = b; px, py = p
+    dx, dy = bx - ax, by - ay
+    L = dx * dx + dy * dy
+    if L == 0:
+        return (px - ax) ** 2 + (py - ay) ** 2
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / L))
+    qx, qy = ax + t * dx, ay + t * dy
+    return (px - qx) ** 2 + (py - qy) ** 2
+
+
+def rdp(pts: Sequence[Pt], tol: float) -> List[Pt]:
+    """Ramer-Douglas-Peucker, iterative; keeps the end points and every point
+    farther than tol from the simplified segment that replaces it."""
+    n = len(pts)
+    if n < 3:
+        return list(pts)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol2 = tol * tol
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        best, idx = -1.0, -1
+        a, b = pts[i], pts[j]
+        for k in range(i + 1, j):
+            d = _seg_dist2(pts[k], a, b)
+            if d > best:
+                best, idx = d, k
+        if idx >= 0 and best > tol2:
+            keep[idx] = True
+            stack.append((i, idx)); stack.append((idx, j))
+    return [p for p, k in zip(pts, keep) if k]
+
+
+def drop_collinear(pts: Sequence[Pt]) -> List[Pt]:
+    """Remove repeated points and middle points of straight runs (exact, integer)."""
+    out: List[Pt] = []
+    for p in pts:
+        if out and out[-1] == p:
+            continue
+        if len(out) >= 2:
+            (ax, ay), (bx, by) = out[-2], out[-1]
+            cross = (bx - ax) * (p[1] - ay) - (by - ay) * (p[0] - ax)
+            dot = (bx - ax) * (p[0] - bx) + (by - ay) * (p[1] - by)
+            if cross == 0 and dot >= 0:         # same direction: b is redundant
+                out[-1] = p
+                continue
+        out.append(p)
+    return out
+
+
+def drop_axis_runs(pts: Sequence[Pt]) -> List[Pt]:
+    """Remove middle points of horizontal and vertical runs that keep their direction.
+
+    This is all straight_poly strokes can lose. They are orthogonalized when
+    drawn, and any other point (a diagonal one, or a repeat) steers which
+    way the staircase goes.
+    """
+    out: List[Pt] = []
+    for p in pts:
+        if len(out) >= 2:
+            (ax, ay), (bx, by) = out[-2], out[-1]
+            if (ay == by == p[1] and (bx - ax) * (p[0] - bx) > 0) or \
+                    (ax == bx == p[0] and (by - ay) * (p[1] - by) > 0):
+                out[-1] = p
+                continue
+        out.append(p)
+    return out
+
+
+def lod_polyline(pts: Sequence[Pt], min_dist: float) -> List[Pt]:
+    """Screen-space decimation: drop points closer than min_dist to the last kept one.
+
+    The last point always stays, so the polyline still ends where it did.
+    """
+    if len(pts) < 3:
+        return list(pts)
+    d2 = min_dist * min_dist
+    out = [pts[0]]
+    for p in pts[1:-1]:
+        q = out[-1]
+        if (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 >= d2:
+            out.append(p)
+    last = pts[-1]
+    if len(out) > 1 and (last[0] - out[-1][0]) ** 2 + (last[1] - out[-1][1]) ** 2 < d2:
+        out[-1] = last
+    else:
+        out.append(last)
+    return out
+
+
+def smooth_pts(pts: Sequence[Pt], passes: int = 2) -> List[Pt]:
+    """[1, 2, 1] / 4 moving average, end points pinned; takes the jitter out of hand-drawn strokes."""
+    out = [(float(x), float(y)) for (x, y) in pts]
+    for _ in range(passes):
+        if len(out) < 3:
+            break
+        out = [out[0]] + [((a[0] + 2 * b[0] + c[0]) / 4, (a[1] + 2 * b[1] + c[1]) / 4)
+                          for a, b, c in zip(out, out[1:], out[2:])] + [out[-1]]
+    return [(int(round(x)), int(round(y))) for (x, y) in out]
+
+
+def simplify_stroke_pts(mode: str, pts: Sequence[Pt], tol: float) -> List[Pt]:
+    """Simplified copy of a stroke's points.
+
+    straight_poly strokes are re-orthogonalized when drawn, so only points
+    inside straight axis runs go; anything else would turn corners into new steps.
+    """
+    pts = [(int(x), int(y)) for (x, y) in pts]
+    if mode == 'straight_poly':
+        return drop_axis_runs(pts)
+    out = rdp(drop_collinear(pts), tol)
+    return out * 2 if len(out) == 1 and len(pts) > 1 else out    # a poly needs a segment to draw its dot
@@ -0,0 +1,455 @@
+from __future__ import annotations
+import os, json, copy, struct, zlib, threading, time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Append-only edit journal kept next to a project file ("<project>.journal").
+#
+# File layout: MAGIC, then records of
+#   <I payload_len> <Q seq> <B op> payload <I crc32(seq..payload)>
+# A torn or corrupt tail simply ends the replay at the last good record.
+# The project file stores "journal_seq" = the last seq it already contains,
+# so records at or below it are skipped on replay.
+
+JOURNAL_SUFFIX = ".journal"
+
+_MAGIC = b"XZJ1"
+_REC_HEAD = struct.Struct("<IQB")
+_REC_CRC  = struct.Struct("<I")
+_PT_COUNT = struct.Struct("<I")
+_STR_LEN  = struct.Struct("<H")
+_LAYER_HDR = struct.Struct("<BHB")   # mode/kind, width, flags
+_IDX  = struct.Struct("<BI")          # layer kind, index
+_XY   = struct.Struct("<ii")
+
+OP_STROKE_ADD   = 1
+OP_STROKE_PTS   = 2
+OP_DOOR_ADD     = 3
+OP_DOOR_PTS     = 4
+OP_SPAWN_SET    = 5
+OP_ENTRY_ADD    = 6
+OP_ENTRY_DEL    = 7
+OP_LAYER_DEL    = 8
+OP_LAYER_DUP    = 9
+OP_LAYER_FLAGS  = 10
+OP_LAYER_RENAME = 11
+OP_STROKE_SWAP  = 12
+OP_CLEAR        = 13
+OP_STATE        = 14
+
+BATCH_RECORDS = 32
+BATCH_MS = 750
+COMPACT_RECORDS = 400
+COMPACT_BYTES = 512 * 1024
+
+_KIND_STROKE, _KIND_DOOR = 0, 1
+_STROKE_MODES = ("poly", "straight_poly")
+
+Record = Tuple[int, int, bytes]   # (seq, op, payload)
+
+
+def journal_path_for(project_path: str) -> str:
+    return project_path + JOURNAL_SUFFIX
+
+
+# ---------- payload encoding ----------
+def _enc_pts(pts: Sequence[Tuple[int, int]]) -> bytes:
+    flat: List[int] = []
+    for (x, y) in pts:
+        flat.append(int(x)); flat.append(int(y))
+    return _PT_COUNT.pack(len(pts)) + struct.pack(f"<{len(flat)}i", *flat)
+
+
+def _dec_pts(buf: bytes, off: int) -> Tuple[List[Tuple[int, int]], int]:
+    (n,) = _PT_COUNT.unpack_from(buf, off); off += _PT_COUNT.size
+    flat = struct.unpack_from(f"<{2 * n}i", buf, off); off += 8 * n
+    return [(flat[i], flat[i + 1]) for i in range(0, 2 * n, 2)], off
+
+
+def _enc_str(s: str) -> bytes:
+    raw = s.encode("utf-8")[:0xFFFF]
+    return _STR_LEN.pack(len(raw)) + raw
+
+
+def _dec_str(buf: bytes, off: int) -> Tuple[str, int]:
+    (n,) = _STR_LEN.unpack_from(buf, off); off += _STR_LEN.size
+    return buf[off:off + n].decode("utf-8", "replace"), off + n
+
+
+def _flags(layer: Dict[str, Any]) -> int:
+    return (1 if layer.get('visible', True) else 0) | (2 if layer.get('locked', False) else 0)
+
+
+def _enc_stroke(st: Dict[str, Any]) -> bytes:
+    mode = _STROKE_MODES.index(st['mode']) if st.get('mode') in _STROKE_MODES else 0
+    return (_LAYER_HDR.pack(mode, int(st.get('w', 3)), _flags(st))
+            + _enc_str(st.get('name', "")) + _enc_pts(st['pts']))
+
+
+def _dec_stroke(buf: bytes) -> Dict[str, Any]:
+    mode, w, flags = _LAYER_HDR.unpack_from(buf, 0)
+    name, off = _dec_str(buf, _LAYER_HDR.size)
+    pts, _ = _dec_pts(buf, off)
+    return {'mode': _STROKE_MODES[mode], 'pts': pts, 'visible': bool(flags & 1),
+            'locked': bool(flags & 2), 'name': name, 'w': w}
+
+
+def _enc_door(d: Dict[str, Any]) -> bytes:
+    kind = 1 if d.get('kind', 'next') == 'back' else 0
+    return (_LAYER_HDR.pack(kind, int(d.get('w', 3)), _flags(d))
+            + _enc_str(d.get('name', "")) + _enc_pts(d['pts']))
+
+
+def _dec_door(buf: bytes) -> Dict[str, Any]:
+    kind, w, flags = _LAYER_HDR.unpack_from(buf, 0)
+    name, off = _dec_str(buf, _LAYER_HDR.size)
+    pts, _ = _dec_pts(buf, off)
+    return {'pts': pts, 'visible': bool(flags & 1), 'locked': bool(flags & 2),
+            'name': name, 'kind': 'back' if kind else 'next', 'w': w}
+
+
+def _layer_kind(kind: str) -> int:
+    return _KIND_DOOR if kind == "door" else _KIND_STROKE
+
+
+def _entry_kind(kind: str) -> int:
+    return 1 if kind == "back" else 0
+
+
+# ---------- reading / replay ----------
+def _scan(buf: bytes) -> Tuple[List[Record], int]:
+    if not buf.startswith(_MAGIC):
+        return [], 0
+    out: List[Record] = []
+    off = len(_MAGIC)
+    while off + _REC_HEAD.size <= len(buf):
+        n, seq, op = _REC_HEAD.unpack_from(buf, off)
+        end = off + _REC_HEAD.size + n
+        if end + _REC_CRC.size > len(buf):
+            break
+        (crc,) = _REC_CRC.unpack_from(buf, end)
+        if zlib.crc32(buf[off + 4:end]) != crc:
+            break
+        out.append((seq, op, bytes(buf[off + _REC_HEAD.size:end])))
+        off = end + _REC_CRC.size
+    return out, off
+
+
+def _read_file(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return b""
+
+
+def read_records(path: str) -> List[Record]:
+    """Return all intact records of a journal file, stopping at a torn tail."""
+    return _scan(_read_file(path))[0]
+
+
+def pending_records(project_path: str, base_seq: int) -> List[Record]:
+    return [r for r in read_records(journal_path_for(project_path)) if r[0] > base_seq]
+
+
+def _layers(state: Dict[str, Any], kind: int) -> List[Dict[str, Any]]:
+    return state["doors"] if kind == _KIND_DOOR else state["strokes"]
+
+
+def _entries(state: Dict[str, Any], kind: int) -> List[Tuple[int, int]]:
+    return state["entry_back_spawns"] if kind else state["entry_next_spawns"]
+
+
+def apply_record(state: Dict[str, Any], op: int, payload: bytes) -> None:
+    """Apply one journal record to an edit state dict (strokes, doors, spawns)."""
+    if op == OP_STROKE_ADD:
+        state["strokes"].append(_dec_stroke(payload))
+    elif op == OP_DOOR_ADD:
+        state["doors"].append(_dec_door(payload))
+    elif op in (OP_STROKE_PTS, OP_DOOR_PTS):
+        kind, idx = _IDX.unpack_from(payload, 0)
+        pts, _ = _dec_pts(payload, _IDX.size)
+        layers = _layers(state, kind)
+        if 0 <= idx < len(layers):
+            layers[idx]['pts'] = pts
+    elif op == OP_SPAWN_SET:
+        has = payload[0]
+        state["spawn_pos"] = _XY.unpack_from(payload, 1) if has else None
+    elif op == OP_ENTRY_ADD:
+        kind = payload[0]
+        _entries(state, kind).append(_XY.unpack_from(payload, 1))
+    elif op == OP_ENTRY_DEL:
+        kind, idx = _IDX.unpack_from(payload, 0)
+        ents = _entries(state, kind)
+        if 0 <= idx < len(ents):
+            ents.pop(idx)
+    elif op == OP_LAYER_DEL:
+        kind, idx = _IDX.unpack_from(payload, 0)
+        layers = _layers(state, kind)
+        if 0 <= idx < len(layers):
+            layers.pop(idx)
+    elif op == OP_LAYER_DUP:
+        kind, idx = _IDX.unpack_from(payload, 0)
+        layers = _layers(state, kind)
+        if 0 <= idx < len(layers):
+            layers.append(copy.deepcopy(layers[idx]))
+    elif op == OP_LAYER_FLAGS:
+        kind, idx = _IDX.unpack_from(payload, 0)
+        flags = payload[_IDX.size]
+        layers = _layers(state, kind)
+        if 0 <= idx < len(layers):
+            layers[idx]['visible'] = bool(flags & 1)
+            layers[idx]['locked'] = bool(flags & 2)
+    elif op == OP_LAYER_RENAME:
+        kind, idx = _IDX.unpack_from(payload, 0)
+        name, _ = _dec_str(payload, _IDX.size)
+        layers = _layers(state, kind)
+        if 0 <= idx < len(layers):
+            layers[idx]['name'] = name
+    elif op == OP_STROKE_SWAP:
+        i, j = _XY.unpack_from(payload, 0)
+        st = state["strokes"]
+        if 0 <= i < len(st) and 0 <= j < len(st):
+            st[i], st[j] = st[j], st[i]
+    elif op == OP_CLEAR:
+        state["strokes"].clear(); state["doors"].clear()
+        state["entry_next_spawns"].clear(); state["entry_back_spawns"].clear()
+        state["spawn_pos"] = None
+    elif op == OP_STATE:
+        snap = json.loads(zlib.decompress(payload).decode("utf-8"))
+        state["strokes"][:] = snap.get("strokes", [])
+        state["doors"][:] = snap.get("doors", [])
+        sp = snap.get("spawn_pos")
+        state["spawn_pos"] = tuple(sp) if sp else None
+        state["entry_next_spawns"][:] = [tuple(p) for p in snap.get("entry_next_spawns", [])]
+        state["entry_back_spawns"][:] = [tuple(p) for p in snap.get("entry_back_spawns", [])]
+
+
+def replay(records: List[Record], state: Dict[str, Any]) -> int:
+    """Apply records in order; returns the last applied seq (0 if none)."""
+    last = 0
+    for seq, op, payload in records:
+        try:
+            apply_record(state, op, payload)
+        except (struct.error, ValueError, zlib.error):
+            break
+        last = seq
+    return last
+
+
+# ---------- writer ----------
+class Journal:
+    """Batched, fsynced append-only writer for one project's journal file."""
+
+    def __init__(self, project_path: str, base_seq: int = 0):
+        self.project_path = project_path
+        self.path = journal_path_for(project_path)
+        self.seq = int(base_seq)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()   # held across a whole full save, sync or compaction
+        self._saved_seq = int(base_seq)      # journal_seq of the newest full save on disk
+        self._buf = bytearray()
+        self._pending = 0
+        self._oldest_ms = 0.0
+        self._since_compact = 0
+        self._compacting = False
+        self._fh: Optional[Any] = None
+        buf = _read_file(self.path)
+        last, good_end = _scan(buf)
+        if last:
+            self.seq = max(self.seq, last[-1][0])
+            self._since_compact = len(last)
+        if buf and good_end < len(buf):
+            # cut a torn tail so new records are not appended after garbage
+            try:
+                if good_end == 0:
+                    os.remove(self.path)
+                else:
+                    with open(self.path, "r+b") as f:
+                        f.truncate(good_end)
+            except OSError:
+                pass
+
+    def _open(self):
+        if self._fh is None:
+            fresh = not os.path.isfile(self.path) or os.path.getsize(self.path) < len(_MAGIC)
+            self._fh = open(self.path, "wb" if fresh else "ab")
+            if fresh:
+                self._fh.write(_MAGIC)
+        return self._fh
+
+    def _append(self, op: int, payload: bytes) -> None:
+        with self._lock:
+            self.seq += 1
+            head = _REC_HEAD.pack(len(payload), self.seq, op)
+            body = head + payload
+            self._buf += body + _REC_CRC.pack(zlib.crc32(body[4:]))
+            if not self._pending:
+                self._oldest_ms = time.monotonic() * 1000.0
+            self._pending += 1
+            self._since_compact += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buf:
+            return
+        try:
+            fh = self._open()
+            fh.write(self._buf)
+            fh.flush()
+            os.fsync(fh.fileno())
+        except OSError as ex:
+            print("💥 Journal write failed:", ex)
+            return
+        self._buf.clear()
+        self._pending = 0
+
+    def tick(self) -> None:
+        """Flush when the pending batch is big or old enough."""
+        if not self._pending:
+            return
+        age = time.monotonic() * 1000.0 - self._oldest_ms
+        if self._pending >= BATCH_RECORDS or age >= BATCH_MS:
+            self.flush()
+
+    def wants_compaction(self) -> bool:
+        if self._compacting:
+            return False
+        if self._since_compact >= COMPACT_RECORDS:
+            return True
+        try:
+            return os.path.getsize(self.path) >= COMPACT_BYTES
+        except OSError:
+            return False
+
+    def save_full(self, write_full_save: Callable[[int], bool]) -> bool:
+        """Run write_full_save(self.seq) now, then drop every record it covers.
+
+        Waits for a compaction that is mid-write, so the older snapshot can't
+        land on top of this save; one that hasn't started yet skips itself.
+        """
+        with self._save_lock:
+            self.flush()
+            upto = self.seq
+            if not write_full_save(upto):
+                return False
+            self._saved_seq = upto
+            self.truncate_through(upto)
+            return True
+
+    def compact_async(self, write_full_save: Callable[[int], bool]) -> None:
+        """Run write_full_save(upto_seq) on a worker, then drop records <= upto_seq.
+
+        write_full_save must write a complete project whose "journal_seq" is
+        upto_seq; it runs off the UI thread, so it must only touch data that was
+        snapshotted beforehand. It is skipped if a full save at or past
+        upto_seq finished in the meantime.
+        """
+        if self._compacting:
+            return
+        self.flush()
+        upto = self.seq
+        self._compacting = True
+
+        def _run():
+            try:
+                with self._save_lock:
+                    if upto <= self._saved_seq:
+                        return
+                    if write_full_save(upto):
+                        self._saved_seq = upto
+                        self.truncate_through(upto)
+            except Exception as ex:
+                print("💥 Journal compaction failed:", ex)
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=_run, name="journal-compact", daemon=True).start()
+
+    def truncate_through(self, upto_seq: int) -> None:
+        """Rewrite the journal keeping only records newer than upto_seq."""
+        with self._lock:
+            self._flush_locked()
+            if self._fh is not None:
+                self._fh.close(); self._fh = None
+            keep = [r for r in read_records(self.path) if r[0] > upto_seq]
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_MAGIC)
+                for seq, op, payload in keep:
+                    body = _REC_HEAD.pack(len(payload), seq, op) + payload
+                    f.write(body + _REC_CRC.pack(zlib.crc32(body[4:])))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._since_compact = len(keep)
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            if self._fh is not None:
+                self._fh.close(); self._fh = None
+
+    def discard(self) -> None:
+        """Drop all journaled edits (user chose not to keep them)."""
+        with self._lock:
+            self._buf.clear(); self._pending = 0
+            if self._fh is not None:
+                self._fh.close(); self._fh = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self._since_compact = 0
+
+    # ---- edit records ----
+    def stroke_added(self, st: Dict[str, Any]) -> None:
+        self._append(OP_STROKE_ADD, _enc_stroke(st))
+
+    def door_added(self, d: Dict[str, Any]) -> None:
+        self._append(OP_DOOR_ADD, _enc_door(d))
+
+    def layer_moved(self, kind: str, idx: int, pts: Sequence[Tuple[int, int]]) -> None:
+        op = OP_DOOR_PTS if kind == "door" else OP_STROKE_PTS
+        self._append(op, _IDX.pack(_layer_kind(kind), int(idx)) + _enc_pts(pts))
+
+    def spawn_set(self, pos: Optional[Tuple[int, int]]) -> None:
+        if pos is None:
+            self._append(OP_SPAWN_SET, b"\x00" + _XY.pack(0, 0))
+        else:
+            self._append(OP_SPAWN_SET, b"\x01" + _XY.pack(int(pos[0]), int(pos[1])))
+
+    def entry_added(self, kind: str, pos: Tuple[int, int]) -> None:
+        self._append(OP_ENTRY_ADD, bytes([_entry_kind(kind)]) + _XY.pack(int(pos[0]), int(pos[1])))
+
+    def entry_removed(self, kind: str, idx: int) -> None:
+        self._append(OP_ENTRY_DEL, _IDX.pack(_entry_kind(kind), int(idx)))
+
+    def layer_removed(self, kind: str, idx: int) -> None:
+        self._append(OP_LAYER_DEL, _IDX.pack(_layer_kind(kind), int(idx)))
+
+    def layer_duplicated(self, kind: str, idx: int) -> None:
+        self._append(OP_LAYER_DUP, _IDX.pack(_layer_kind(kind), int(idx)))
+
+    def layer_flags(self, kind: str, idx: int, layer: Dict[str, Any]) -> None:
+        self._append(OP_LAYER_FLAGS, _IDX.pack(_layer_kind(kind), int(idx)) + bytes([_flags(layer)]))
+
+    def layer_renamed(self, kind: str, idx: int, name: str) -> None:
+        self._append(OP_LAYER_RENAME, _IDX.pack(_layer_kind(kind), int(idx)) + _enc_str(name))
+
+    def strokes_swapped(self, i: int, j: int) -> None:
+        self._append(OP_STROKE_SWAP, _XY.pack(int(i), int(j)))
+
+    def cleared(self) -> None:
+        self._append(OP_CLEAR, b"")
+
+    def state_replaced(self, state: Dict[str, Any]) -> None:
+        snap = {
+            "strokes": state["strokes"], "doors": state["doors"],
+            "spawn_pos": list(state["spawn_pos"]) if state.get("spawn_pos") else None,
+            "entry_next_spawns": state["entry_next_spawns"],
+            "entry_back_spawns": state["entry_back_spawns"],
+        }
+        self._append(OP_STATE, zlib.compress(json.dumps(snap, separators=(",", ":")).encode("utf-8")))
@@ -0,0 +1,225 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+
+import numpy as np
+import pygame
+
+from theme import (
+    ENTRY_NEXT_BAKE_COLOR, ENTRY_BACK_BAKE_COLOR,
+    DOOR_NEXT_BAKE_COLOR, DOOR_BACK_BAKE_COLOR,
+)
+
+SPAWN_BAKE_COLOR = (255, 0, 0)
+BIG_POLY_PX = 256 * 256    # on-surface bbox area above which pygame's C row fill is cheaper
+
+# Array-based mask baking. Produces the same pixels as persist's set_at /
+# pygame.draw.polygon reference path (see bake_masks.py --verify).
+
+
+def _int_pts(pts: Sequence[Sequence[Any]]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    # only exact ints take the fast path; anything else goes through pygame
+    xs, ys = [], []
+    for p in pts:
+        x, y = p[0], p[1]
+        if type(x) is not int or type(y) is not int:
+            return None
+        xs.append(x); ys.append(y)
+    return np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64)
+
+
+def _clipped_area(arr: Tuple[np.ndarray, np.ndarray], w: int, h: int) -> int:
+    xs, ys = arr
+    cw = min(int(xs.max()), w - 1) - max(int(xs.min()), 0) + 1
+    ch = min(int(ys.max()), h - 1) - max(int(ys.min()), 0) + 1
+    return max(cw, 0) * max(ch, 0)
+
+
+def polygon_spans(
+    polys: List[Tuple[np.ndarray, np.ndarray]], size: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Scanline spans covering what pygame.draw.polygon fills, for many polygons at once.
+
+    Mirrors pygame's draw_fillpoly: per row, edge crossings computed in double
+    and truncated toward zero, sorted and paired; plus the horizontal-edge pass.
+    Work is proportional to the number of crossings, not rows x edges.
+    Returns (poly, row, x0, x1, odd): spans clipped to the surface (x1
+    inclusive) and a per-polygon flag for rows with an odd crossing count,
+    where pygame's result is undefined and the caller should draw it itself.
+    """
+    w, h = size
+    npoly = len(polys)
+    odd = np.zeros(npoly, dtype=bool)
+    if not npoly:
+        e = np.empty(0, np.int64)
+        return e, e, e, e, odd
+    lens = np.array([len(xs) for xs, _ in polys])
+    xs = np.concatenate([p[0] for p in polys]); ys = np.concatenate([p[1] for p in polys])
+    pid = np.repeat(np.arange(npoly), lens)
+    starts = np.cumsum(lens) - lens
+    prev = np.arange(len(xs)) - 1
+    prev[starts] = starts + lens - 1                    # previous vertex, wrapping per polygon
+    xp, yp = xs[prev], ys[prev]
+    miny = np.minimum.reduceat(ys, starts); maxy = np.maximum.reduceat(ys, starts)
+    minx = np.minimum.reduceat(xs, starts); maxx = np.maximum.reduceat(xs, starts)
+
+    pl: List[np.ndarray] = []; rl: List[np.ndarray] = []; al: List[np.ndarray] = []; bl: List[np.ndarray] = []
+
+    flat = miny == maxy                                 # degenerate: one horizontal line
+    if np.any(flat):
+        pl.append(np.nonzero(flat)[0]); rl.append(miny[flat]); al.append(minx[flat]); bl.append(maxx[flat])
+
+    # crossings: every non-horizontal edge, oriented top -> bottom, meets rows
+    # [y1, y2) -- plus y2 itself when it is the polygon's bottom row
+    up = yp < ys
+    keep = (yp != ys) & ~flat[pid]
+    epid = pid[keep]
+    ey1 = np.where(up, yp, ys)[keep]; ey2 = np.where(up, ys, yp)[keep]
+    ex1 = np.where(up, xp, xs)[keep]; ex2 = np.where(up, xs, xp)[keep]
+    last = ey2 - 1 + (ey2 == maxy[epid])
+    r0 = np.maximum(ey1, 0); r1 = np.minimum(last, h - 1)
+    n = np.maximum(r1 - r0 + 1, 0)
+    if n.sum():
+        e = np.repeat(np.arange(len(epid)), n)
+        y = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n) + r0[e]
+        y1, x1, x2 = ey1[e], ex1[e], ex2[e]
+        xi = (((y - y1) * (x2 - x1)) / (ey2[e] - y1) + x1).astype(np.int64)   # C double -> int truncation
+        g = epid[e] * h + y
+        order = np.lexsort((xi, g))
+        g, xi = g[order], xi[order]
+        first = np.r_[True, g[1:] != g[:-1]]
+        starts_g = np.nonzero(first)[0]
+        cnt = np.diff(np.r_[starts_g, len(g)])
+        odd[(g[starts_g] // h)[(cnt & 1) == 1]] = True
+        rank = np.arange(len(g)) - np.repeat(starts_g, cnt)
+        left = np.nonzero((rank & 1) == 0)[0]
+        left = left[left + 1 < len(g)]
+        left = left[g[left + 1] == g[left]]
+        pl.append(g[left] // h); rl.append(g[left] % h); al.append(xi[left]); bl.append(xi[left + 1])
+
+    # horizontal edges strictly between the polygon's top and bottom rows
+    hz = (yp == ys) & (ys > miny[pid]) & (ys < maxy[pid])
+    if np.any(hz):
+        pl.append(pid[hz]); rl.append(ys[hz]); al.append(np.minimum(xs[hz], xp[hz])); bl.append(np.maximum(xs[hz], xp[hz]))
+
+    if not pl:
+        e = np.empty(0, np.int64)
+        return e, e, e, e, odd
+    poly = np.concatenate(pl); rows = np.concatenate(rl); x0 = np.concatenate(al); x1 = np.concatenate(bl)
+    x0, x1 = np.minimum(x0, x1), np.maximum(x0, x1)
+    ok = (rows >= 0) & (rows < h) & (x1 >= 0) & (x0 < w)
+    return poly[ok], rows[ok], np.clip(x0[ok], 0, w - 1), np.clip(x1[ok], 0, w - 1), odd
+
+
+def span_pixels(rows: np.ndarray, x0: np.ndarray, x1: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Expand inclusive spans into (x, y) pixel index arrays."""
+    n = x1 - x0 + 1
+    base = np.repeat(np.cumsum(n) - n, n)
+    xx = np.repeat(x0, n) + (np.arange(int(n.sum())) - base)
+    return xx, np.repeat(rows, n)
+
+
+def _supported(surf: pygame.Surface) -> bool:
+    return surf.get_bitsize() in (24, 32) and not (surf.get_flags() & pygame.SRCALPHA)
+
+
+def _write_pixels(out: pygame.Surface, xx: np.ndarray, yy: np.ndarray, palette: List[Tuple[int, int, int]], ci: Any) -> None:
+    # one fancy-indexed store; 32-bit surfaces get whole mapped pixels like set_at/draw do
+    if out.get_bitsize() == 32:
+        mapped = np.array([out.map_rgb(c) for c in palette], dtype=np.uint32)
+        px = cast(Any, pygame.surfarray.pixels2d(out))
+        px[xx, yy] = mapped[ci]
+    else:
+        px = cast(Any, pygame.surfarray.pixels3d(out))
+        px[xx, yy] = np.array(palette, dtype=np.uint8)[ci]
+    del px
+
+
+def stamp_markers(
+    out: pygame.Surface,
+    spawn_pos: Optional[Tuple[int, int]],
+    entry_next_spawns: List[Tuple[int, int]],
+    entry_back_spawns: List[Tuple[int, int]],
+) -> None:
+    """Write spawn/entry pixels with a single indexed store (later markers win)."""
+    groups = [np.asarray(g, dtype=np.float64).reshape(-1, 2)
+              for g in ([spawn_pos] if spawn_pos else [], entry_next_spawns, entry_back_spawns)]
+    p = np.concatenate(groups).astype(np.int64)                 # int() truncation
+    if not len(p):
+        return
+    c = np.repeat(np.arange(3), [len(g) for g in groups])
+    w, h = out.get_size()
+    ok = (p[:, 0] >= 0) & (p[:, 0] < w) & (p[:, 1] >= 0) & (p[:, 1] < h)
+    p, c = p[ok], c[ok]
+    if not len(p):
+        return
+    # keep the last write per pixel, like the sequential set_at calls
+    lin = p[:, 1] * w + p[:, 0]
+    _, last = np.unique(lin[::-1], return_index=True)
+    keep = len(lin) - 1 - last
+    _write_pixels(out, p[keep, 0], p[keep, 1], [SPAWN_BAKE_COLOR, ENTRY_NEXT_BAKE_COLOR, ENTRY_BACK_BAKE_COLOR], c[keep])
+
+
+def fill_doors(out: pygame.Surface, doors: List[Dict[str, Any]]) -> None:
+    """Scanline-fill every visible door polygon, preserving draw order.
+
+    Spans for all doors are computed in one batch; consecutive doors of the
+    same color are written together since their mutual order can't matter.
+    Large doors (and float or odd-crossing ones) go through pygame.draw.polygon,
+    which fills the same pixels with per-row C loops.
+    """
+    w, h = out.get_size()
+    jobs: List[Tuple[Tuple[int, int, int], Any, Optional[Tuple[np.ndarray, np.ndarray]]]] = []
+    for d in doors:
+        if not d.get('visible', True):
+            continue
+        pts = d.get('pts', [])
+        if len(pts) < 3:
+            continue
+        col = DOOR_NEXT_BAKE_COLOR if d.get('kind', 'next') == 'next' else DOOR_BACK_BAKE_COLOR
+        arr = _int_pts(pts)
+        if arr is not None and _clipped_area(arr, w, h) > BIG_POLY_PX:
+            arr = None
+        jobs.append((col, pts, arr))
+    if not jobs:
+        return
+
+    fast = [i for i, j in enumerate(jobs) if j[2] is not None]
+    poly, rows, x0, x1, odd = polygon_spans([cast(Any, jobs[i][2]) for i in fast], out.get_size())
+    job_of = np.array(fast, dtype=np.int64)
+    slow = set(i for i, j in enumerate(jobs) if j[2] is None) | set(job_of[odd].tolist())
+    span_job = job_of[poly] if len(poly) else poly
+    order = np.argsort(span_job, kind="stable")
+    span_job, rows, x0, x1 = span_job[order], rows[order], x0[order], x1[order]
+
+    i = 0
+    while i < len(jobs):
+        col = jobs[i][0]
+        if i in slow:
+            pygame.draw.polygon(out, col, jobs[i][1])
+            i += 1
+            continue
+        k = i
+        while k + 1 < len(jobs) and k + 1 not in slow and jobs[k + 1][0] == col:
+            k += 1
+        a, b = np.searchsorted(span_job, [i, k + 1])
+        sel = slice(int(a), int(b))
+        if b > a:
+            xx, yy = span_pixels(rows[sel], x0[sel], x1[sel])
+            _write_pixels(out, xx, yy, [col], 0)
+        i = k + 1
+
+
+def bake_mask(
+    mask_world: pygame.Surface,
+    spawn_pos: Optional[Tuple[int, int]],
+    entry_next_spawns: List[Tuple[int, int]],
+    entry_back_spawns: List[Tuple[int, int]],
+    doors: List[Dict[str, Any]],
+) -> Optional[pygame.Surface]:
+    """Baked copy of mask_world, or None if the surface format isn't supported."""
+    if not _supported(mask_world):
+        return None
+    out = mask_world.copy()
+    stamp_markers(out, spawn_pos, entry_next_spawns, entry_back_spawns)
+    fill_doors(out, doors)
+    return out
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import os, json, struct
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, cast
+
+import numpy as np
+import pygame
+
+from theme import (
+    MASK_DRAW_COLOR,
+    ENTRY_NEXT_BAKE_COLOR, ENTRY_BACK_BAKE_COLOR,
+    DOOR_NEXT_BAKE_COLOR, DOOR_BACK_BAKE_COLOR,
+)
+from maskbake import SPAWN_BAKE_COLOR
+from colliders import write_colliders
+from roomgen import module_path, write_room_module
+from outlines import write_outlines
+from regions import write_ids
+from tiles import TILE_SIZE, tiles_manifest_path, write_tiles
+
+# Collision-data exports derived from a baked mask (bake_mask_surface output).
+# Arrays are row-major (y, x) so they index like the game's world coordinates.
+
+EMPTY, WALL, SPAWN, DOOR_NEXT, DOOR_BACK, ENTRY_NEXT, ENTRY_BACK = range(7)
+LABEL_NAMES = ["empty", "wall", "spawn", "door_next", "door_back", "entry_next", "entry_back"]
+LABEL_COLORS = {
+    WALL: MASK_DRAW_COLOR,
+    SPAWN: SPAWN_BAKE_COLOR,
+    DOOR_NEXT: DOOR_NEXT_BAKE_COLOR,
+    DOOR_BACK: DOOR_BACK_BAKE_COLOR,
+    ENTRY_NEXT: ENTRY_NEXT_BAKE_COLOR,
+    ENTRY_BACK: ENTRY_BACK_BAKE_COLOR,
+}
+
+FORMATS = ("png", "bits", "rle", "npy", "rects", "py", "ids", "tiles", "outlines")
+BITS_MAGIC = b"XZB1"
+BITS_HEADER = struct.Struct("<4sII")    # magic, width, height
+
+
+def label_array(baked: pygame.Surface) -> np.ndarray:
+    """(h, w) uint8 label codes for every baked color; anything else is EMPTY."""
+    labels = np.zeros((baked.get_height(), baked.get_width()), dtype=np.uint8)
+    if baked.get_bitsize() == 32:
+        rmask, gmask, bmask, _ = baked.get_masks()
+        px = cast(Any, pygame.surfarray.pixels2d(baked)).T & np.uint32(rmask | gmask | bmask)
+        for code, col in LABEL_COLORS.items():
+            labels[px == np.uint32(baked.map_rgb(col) & (rmask | gmask | bmask))] = code
+    else:
+        rgb = cast(Any, pygame.surfarray.pixels3d(baked)).transpose(1, 0, 2)
+        key = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+        for code, (r, g, b) in LABEL_COLORS.items():
+            labels[key == ((r << 16) | (g << 8) | b)] = code
+        del rgb
+    return labels
+
+
+def pack_walls(labels: np.ndarray) -> np.ndarray:
+    """1 bit per pixel, MSB first, each row padded to a whole byte."""
+    return np.packbits(labels == WALL, axis=1)
+
+
+def unpack_walls(packed: np.ndarray, width: int) -> np.ndarray:
+    return np.unpackbits(packed, axis=1, count=width).astype(bool)
+
+
+def wall_spans(labels: np.ndarray) -> List[List[int]]:
+    """Per row: flat [x0, length, x0, length, ...] runs of wall pixels."""
+    walls = (labels == WALL).astype(np.int8)
+    h = walls.shape[0]
+    edges = np.diff(np.pad(walls, ((0, 0), (1, 1))), axis=1)
+    ys, xs = np.nonzero(edges)
+    kinds = edges[ys, xs]                   # +1 run start, -1 run end (exclusive)
+    starts = xs[kinds == 1]; ends = xs[kinds == -1]
+    flat = np.stack([starts, ends - starts], axis=1).ravel()
+    per_row = np.bincount(ys[kinds == 1], minlength=h) * 2
+    return [r.tolist() for r in np.split(flat, np.cumsum(per_row)[:-1])]
+
+
+def write_bits(path: str, labels: np.ndarray) -> None:
+    h, w = labels.shape
+    with open(path, "wb") as f:
+        f.write(BITS_HEADER.pack(BITS_MAGIC, w, h))
+        f.write(pack_walls(labels).tobytes())
+
+
+def read_bits(path: str) -> np.ndarray:
+    """Wall bitmap as an (h, w) bool array."""
+    with open(path, "rb") as f:
+        magic, w, h = BITS_HEADER.unpack(f.read(BITS_HEADER.size))
+        if magic != BITS_MAGIC:
+            raise ValueError(f"not a wall bitmap: {path}")
+        packed = np.frombuffer(f.read(), dtype=np.uint8).reshape(h, (w + 7) // 8)
+    return unpack_walls(packed, w)
+
+
+def write_rle(path: str, labels: np.ndarray) -> None:
+    h, w = labels.shape
+    data = {"w": w, "h": h, "rows": wall_spans(labels)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def write_npy(path: str, labels: np.ndarray) -> None:
+    # plain .npy so the game can np.load(path, mmap_mode="r")
+    np.save(path, np.ascontiguousarray(labels))
+
+
+def load_labels(path: str, mmap: bool = True) -> np.ndarray:
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def export_paths(png_path: str, formats: Sequence[str]) -> Dict[str, str]:
+    base = os.path.splitext(png_path)[0]
+    names = {"png": png_path, "bits": base + ".bits", "rle": base + ".rle.json", "npy": base + ".npy",
+             "rects": base + ".colliders.json", "py": module_path(png_path), "ids": base + ".ids.json",
+             "tiles": tiles_manifest_path(png_path), "outlines": base + ".outlines.json"}
+    return {k: names[k] for k in formats}
+
+
+def parse_formats(spec: str) -> Tuple[str, ...]:
+    out = tuple(s.strip().lower() for s in spec.split(",") if s.strip())
+    bad = [s for s in out if s not in FORMATS]
+    if bad or not out:
+        raise ValueError(f"unknown format(s) {', '.join(bad) or spec!r}; pick from {', '.join(FORMATS)}")
+    return out
+
+
+def export_baked(
+    baked: pygame.Surface,
+    paths: Dict[str, str],
+    proj: Optional[Dict[str, Any]] = None,
+    source: str = "",
+    bg: Optional[pygame.Surface] = None,
+    tile_size: int = TILE_SIZE,
+    tiles_only: Optional[Set[int]] = None,
+) -> Dict[str, Any]:
+    """Write a baked mask in every requested format (keys of export_paths).
+
+    "rects", "py" and "ids" also need the project dict (strokes, doors, spawns) the
+    mask was baked from; source names the project in the generated module.
+    "tiles" cuts the mask (and bg, when given) into tile_size chunks;
+    tiles_only restricts that to the listed tiles (see tiles.write_tiles).
+    Returns collider / region / tile / outline stats for the formats that have them.
+    """
+    info: Dict[str, Any] = {}
+    if "png" in paths:
+        pygame.image.save(baked, paths["png"])
+    if "tiles" in paths:
+        info["tiles"] = write_tiles(paths["tiles"], baked, bg, tile_size, tiles_only)
+    if any(k in paths for k in ("bits", "rle", "npy", "rects", "py", "ids", "outlines")):
+        labels = label_array(baked)
+        if "bits" in paths:
+            write_bits(paths["bits"], labels)
+        if "rle" in paths:
+            write_rle(paths["rle"], labels)
+        if "npy" in paths:
+            write_npy(paths["npy"], labels)
+        if "rects" in paths:
+            info["colliders"] = write_colliders(paths["rects"], labels == WALL, proj or {})
+        if "py" in paths:
+            write_room_module(paths["py"], labels == WALL, proj or {}, source)
+        if "ids" in paths:
+            info["regions"] = write_ids(paths["ids"], (labels == DOOR_NEXT) | (labels == DOOR_BACK), labels == WALL, proj or {})
+        if "outlines" in paths:
+            info["outlines"] = write_outlines(paths["outlines"], labels == WALL)
+    return info
@@ -0,0 +1,255 @@
+from __future__ import annotations
+import json
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from colliders import row_runs
+from geom import drop_collinear, rdp
+from tiledmask import TiledMask
+
+# Union of the wall strokes as outline polygons. The strokes are rasterized
+# exactly like the mask and the boundary of the wall pixels is traced along
+# pixel corners, so the polygons cover precisely the pixels the mask has and
+# filling them back gives the same mask. Each outline is an outer ring plus
+# the rings of its holes; touching diagonal pixels end up in separate rings.
+# Exported outlines then have their pixel staircases straightened to within
+# OUTLINE_TOL, so a diagonal or round wall is a few edges, not one per step.
+
+UNION_ASYNC_MIN_STROKES = 48        # below this the editor just redraws the strokes
+UNION_ASYNC_MIN_PX = 4_000_000      # ... unless the world itself is this big
+UNION_WRAP_TILES = 64               # finished layer tiles turned into surfaces per poll (UI thread)
+OUTLINE_TOL = 1.0                   # px an exported ring may stray from the pixel boundary
+
+
+def _segments(walls: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Maximal straight boundary runs, each directed so the wall is on its right (y down)."""
+    p = np.pad(walls.astype(np.int8), 1)
+    dh = p[1:, 1:-1] - p[:-1, 1:-1]      # row boundary y: +1 wall below, -1 wall above
+    dv = p[1:-1, 1:] - p[1:-1, :-1]      # column boundary x: +1 wall right, -1 wall left
+    parts = []
+    y, x0, x1 = row_runs(dh == 1);  parts.append((x0, y, x1, y))
+    y, x0, x1 = row_runs(dh == -1); parts.append((x1, y, x0, y))
+    x, y0, y1 = row_runs((dv == 1).T);  parts.append((x, y1, x, y0))
+    x, y0, y1 = row_runs((dv == -1).T); parts.append((x, y0, x, y1))
+    return tuple(np.concatenate([q[i] for q in parts]).astype(np.int64) for i in range(4))
+
+
+def _inside(ring: np.ndarray, px: float, py: float) -> bool:
+    # even-odd over the ring's vertical edges
+    a = ring; b = np.roll(ring, -1, axis=0)
+    vert = a[:, 0] == b[:, 0]
+    lo = np.minimum(a[:, 1], b[:, 1]); hi = np.maximum(a[:, 1], b[:, 1])
+    return bool(np.count_nonzero(vert & (a[:, 0] > px) & (lo < py) & (hi > py)) & 1)
+
+
+def trace_outlines(walls: np.ndarray) -> List[Dict[str, Any]]:
+    """[{"outer": ring, "holes": [ring, ...]}] for an (h, w) bool wall array.
+
+    Rings are [x, y] pixel-corner vertices with no collinear points; outer
+    rings run clockwise on screen, holes counter-clockwise.
+    """
+    h, w = walls.shape
+    sx, sy, ex, ey = _segments(walls)
+    n = len(sx)
+    if not n:
+        return []
+    skey = sy * (w + 1) + sx
+    ekey = ey * (w + 1) + ex
+    order = np.argsort(skey, kind="stable")
+    sk = skey[order]
+    lo = np.searchsorted(sk, ekey, side="left")
+    hi = np.searchsorted(sk, ekey, side="right")
+    nxt = order[lo]
+    # two ways out of a corner only where diagonal pixels touch: turn right, toward the wall
+    dx = np.sign(ex - sx); dy = np.sign(ey - sy)
+    two = np.nonzero(hi - lo == 2)[0]
+    if len(two):
+        alt = order[lo[two] + 1]
+        right = (dx[alt] == -dy[two]) & (dy[alt] == dx[two])
+        nxt[two[right]] = alt[right]
+
+    seen = np.zeros(n, dtype=bool)
+    rings: List[np.ndarray] = []
+    firsts: List[int] = []
+    nxt_l = nxt.tolist()
+    for i in order.tolist():
+        if seen[i]:
+            continue
+        idx = []
+        j = i
+        while not seen[j]:
+            seen[j] = True
+            idx.append(j)
+            j = nxt_l[j]
+        rings.append(np.stack([sx[idx], sy[idx]], axis=1))
+        firsts.append(i)
+
+    areas = [float(np.dot(r[:, 0], np.roll(r[:, 1], -1)) - np.dot(np.roll(r[:, 0], -1), r[:, 1])) / 2 for r in rings]
+    outers = [k for k, a in enumerate(areas) if a > 0]
+    out: List[Dict[str, Any]] = [{"outer": rings[k].tolist(), "holes": []} for k in outers]
+    boxes = [(rings[k].min(axis=0), rings[k].max(axis=0)) for k in outers]
+    for k, a in enumerate(areas):
+        if a > 0:
+            continue
+        # centre of the wall pixel right of the hole's first run lies in the owning outline
+        i = firsts[k]
+        px = sx[i] + (dx[i] - dy[i]) * 0.5; py = sy[i] + (dy[i] + dx[i]) * 0.5
+        best, best_a = -1, 0.0
+        for o, (bmin, bmax) in enumerate(boxes):
+            if bmin[0] < px < bmax[0] and bmin[1] < py < bmax[1] and (best < 0 or areas[outers[o]] < best_a) \
+                    and _inside(rings[outers[o]], px, py):
+                best, best_a = o, areas[outers[o]]
+        if best >= 0:
+            out[best]["holes"].append(rings[k].tolist())
+    return out
+
+
+def outlines_to_walls(outlines: List[Dict[str, Any]], size: Tuple[int, int]) -> np.ndarray:
+    """Fill outlines back into an (h, w) bool array (even-odd, so holes come out empty)."""
+    w, h = size
+    acc = np.zeros((h + 1, w + 1), dtype=np.int32)
+    for o in outlines:
+        for ring in [o["outer"]] + o["holes"]:
+            r = np.asarray(ring, dtype=np.int64)
+            a = r; b = np.roll(r, -1, axis=0)
+            v = a[:, 0] == b[:, 0]
+            x = a[v, 0]; y0 = np.minimum(a[v, 1], b[v, 1]); y1 = np.maximum(a[v, 1], b[v, 1])
+            np.add.at(acc, (y0, x), 1)
+            np.add.at(acc, (y1, x), -1)
+    cross = np.cumsum(acc, axis=0)[:h]
+    return (np.cumsum(cross, axis=1)[:, :w] & 1).astype(bool)
+
+
+def outline_stats(outlines: List[Dict[str, Any]]) -> Dict[str, int]:
+    return {
+        "outlines": len(outlines),
+        "holes": sum(len(o["holes"]) for o in outlines),
+        "vertices": sum(len(o["outer"]) + sum(len(r) for r in o["holes"]) for o in outlines),
+    }
+
+
+def _simplify_ring(ring: List[List[int]], tol: float) -> List[List[int]]:
+    pts = [(int(x), int(y)) for x, y in ring]
+    if len(pts) < 5:
+        return ring
+    # split the closed ring at its first point and the point farthest from it
+    x0, y0 = pts[0]
+    far = max(range(len(pts)), key=lambda k: (pts[k][0] - x0) ** 2 + (pts[k][1] - y0) ** 2)
+    out = drop_collinear(rdp(pts[:far + 1], tol)[:-1] + rdp(pts[far:] + [pts[0]], tol)[:-1])
+    return [list(p) for p in out] if len(out) >= 3 else ring
+
+
+def simplify_outlines(outlines: List[Dict[str, Any]], tol: float = OUTLINE_TOL) -> List[Dict[str, Any]]:
+    """Straighten each ring's pixel staircases (RDP), keeping it within tol px of the traced one."""
+    if tol <= 0:
+        return outlines
+    return [{"outer": _simplify_ring(o["outer"], tol), "holes": [_simplify_ring(r, tol) for r in o["holes"]]}
+            for o in outlines]
+
+
+def stroke_union(world_size: Tuple[int, int], strokes: List[Dict[str, Any]], default_w: int) -> Dict[str, Any]:
+    """The union of the visible strokes as TiledMask.tile_bits(); runs in a worker process for big scenes.
+
+    The layer is drawn tile by tile, so its memory follows the wall area.
+    """
+    layer = TiledMask(world_size)
+    for st in strokes:
+        if st.get('visible', True):
+            layer.draw_stroke(st, default_w)
+    return {"tiles": layer.tile_bits()}
+
+
+def write_outlines(path: str, walls: np.ndarray, tol: float = OUTLINE_TOL) -> Dict[str, int]:
+    """Vector wall colliders: the outlines of the baked wall pixels, straightened to tol (0: exact)."""
+    h, w = walls.shape
+    outlines = simplify_outlines(trace_outlines(walls), tol)
+    stats = outline_stats(outlines)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"w": w, "h": h, "walls": outlines, "stats": stats}, f, separators=(",", ":"))
+    return stats
+
+
+def union_key(strokes: List[Dict[str, Any]], world_size: Tuple[int, int], default_w: int) -> Tuple[Any, ...]:
+    # strokes get new pts lists whenever they change, so identity is enough while the lists are alive
+    return (tuple(world_size), default_w) + tuple(
+        (id(st['pts']), st.get('w'), st.get('mode')) for st in strokes if st.get('visible', True))
+
+
+class WallUnion:
+    """The editor's cached wall layer: the union of a set of strokes, built in a worker process."""
+
+    def __init__(self) -> None:
+        self.key: Optional[Tuple[Any, ...]] = None
+        self.layer: Optional[TiledMask] = None
+        self._keep: List[Dict[str, Any]] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._fut: Optional[Future] = None
+        self._fut_key: Optional[Tuple[Any, ...]] = None
+        self._fut_keep: List[Dict[str, Any]] = []
+        self._fut_size: Tuple[int, int] = (0, 0)
+        self._wrap: Optional[Tuple[Any, TiledMask, List[Tuple[Tuple[int, int], bytes]]]] = None
+
+    @staticmethod
+    def worth_it(strokes: List[Dict[str, Any]], world_size: Tuple[int, int]) -> bool:
+        return len(strokes) >= UNION_ASYNC_MIN_STROKES or world_size[0] * world_size[1] >= UNION_ASYNC_MIN_PX
+
+    def layer_for(self, strokes: List[Dict[str, Any]], world_size: Tuple[int, int], default_w: int) -> Optional[TiledMask]:
+        if self.layer is None or self.key != union_key(strokes, world_size, default_w):
+            return None
+        return self.layer
+
+    def request(self, strokes: List[Dict[str, Any]], world_size: Tuple[int, int], default_w: int) -> None:
+        """Start building the union of strokes unless it's cached or already on its way."""
+        if not self.worth_it(strokes, world_size):
+            return
+        key = union_key(strokes, world_size, default_w)
+        if key == self.key or key == self._fut_key or (self._wrap is not None and key == self._wrap[0][0]):
+            return
+        if self._fut is not None:
+            self._fut.cancel()          # only helps while queued; a running stale job is ignored in poll
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=1)
+        snap = [dict(st) for st in strokes]     # holds on to the pts lists the key refers to
+        self._fut = self._pool.submit(stroke_union, tuple(world_size), snap, default_w)
+        self._fut_key, self._fut_keep, self._fut_size = key, snap, tuple(world_size)
+
+    def poll(self) -> bool:
+        """Pick up a finished job without blocking; True when the layer changed.
+
+        The worker sends the layer as packed tile bits; they become tile
+        surfaces here a few at a time, so a huge world never stalls a frame.
+        """
+        if self._wrap is None:
+            fut = self._fut
+            if fut is None or not fut.done():
+                return False
+            self._fut = None
+            try:
+                res = fut.result()
+            except Exception as ex:
+                print(f"⚠️ wall union failed: {ex}")
+                self._fut_key = None
+                return False
+            done = (self._fut_key, self._fut_keep)
+            self._wrap = (done, TiledMask(self._fut_size), list(res["tiles"].items()))
+            self._fut_key, self._fut_keep = None, []
+        done, layer, todo = self._wrap
+        for key, packed in todo[-UNION_WRAP_TILES:]:
+            layer.set_tile_bits(key, packed)
+        del todo[-UNION_WRAP_TILES:]
+        if todo:
+            return False
+        self._wrap = None
+        self.key, self._keep = done
+        self.layer = layer
+        return True
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._fut = None
+        self._fut_key = None
+        self._wrap = None
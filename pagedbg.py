@@ -0,0 +1,380 @@
+from __future__ import annotations
+import hashlib, io, json, math, os, shutil, struct, zlib
+from collections import OrderedDict
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from recents import recents_file_path
+
+# Backgrounds too big to keep as one resident surface. The image is decoded
+# once into raw BGRA tiles under the app's cache directory, plus a pyramid of
+# halved levels, and memory-mapped from there: the view touches only the
+# tiles it shows, at the level closest to the zoom, and the OS pages them in
+# and out. PNGs are decoded band by band (8-bit RGB/RGBA, not interlaced);
+# any other image is loaded whole once to fill the cache.
+
+PAGED_BG_MIN_PX = 48_000_000        # smaller backgrounds stay plain surfaces
+BG_TILE = 256
+BG_CACHE_KEEP = 4                   # decoded images kept in the cache directory
+SCALED_CACHE_MAX_PX = 8_000_000     # scaled tiles kept for the current zoom
+OVERVIEW_MAX = 1024                 # longest side of the level used for thumbnails
+
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+_INFLATE_STEP = 1 << 22
+
+
+def bgcache_dir() -> str:
+    d = os.path.join(os.path.dirname(recents_file_path()), "bgcache")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def png_size(path: str) -> Optional[Tuple[int, int]]:
+    """Width and height from a PNG header, without decoding; None for anything else."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(24)
+    except OSError:
+        return None
+    if len(head) < 24 or head[:8] != _PNG_SIG or head[12:16] != b"IHDR":
+        return None
+    w, h = struct.unpack(">II", head[16:24])
+    return int(w), int(h)
+
+
+def wants_paging(path: str) -> bool:
+    size = png_size(path)
+    return size is not None and size[0] * size[1] >= PAGED_BG_MIN_PX
+
+
+def _chunks(f: BinaryIO) -> Iterator[Tuple[bytes, bytes]]:
+    if f.read(8) != _PNG_SIG:
+        raise ValueError("not a PNG file")
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            raise ValueError("truncated PNG")
+        n, kind = struct.unpack(">I4s", head)
+        data = f.read(n); f.read(4)
+        yield kind, data
+        if kind == b"IEND":
+            return
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def _png_bands(path: str, rows: int) -> Iterator[np.ndarray]:
+    """(h, w, 3) RGB bands of rows lines from a PNG, in order, never the whole image.
+
+    The filtered scanlines are inflated as a stream and cut into bands; each
+    band becomes a small stored (uncompressed) PNG for pygame to unfilter,
+    led by the previous band's last decoded line so Up/Average/Paeth
+    filters see the row they reference.
+    """
+    with open(path, "rb") as f:
+        chunks = _chunks(f)
+        kind, ihdr = next(chunks)
+        if kind != b"IHDR":
+            raise ValueError("PNG without IHDR")
+        w, h, depth, ctype, _, _, interlace = struct.unpack(">IIBBBBB", ihdr)
+        if depth != 8 or ctype not in (2, 6) or interlace:
+            raise ValueError("PNG layout not streamable")
+        ch = 3 if ctype == 2 else 4
+        fmt = "RGB" if ch == 3 else "RGBA"
+        stride = w * ch + 1
+        inflate = zlib.decompressobj()
+        buf = bytearray()
+        prev: Optional[bytes] = None
+        done = 0
+
+        def band(raw: bytes, n: int) -> np.ndarray:
+            nonlocal prev
+            lead = b"\x00" + prev if prev is not None else b""
+            total = n + (prev is not None)
+            png = (_PNG_SIG + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", w, total, 8, ctype, 0, 0, 0))
+                   + _png_chunk(b"IDAT", zlib.compress(lead + raw, 0)) + _png_chunk(b"IEND", b""))
+            surf = pygame.image.load(io.BytesIO(png), "band.png")
+            px = np.frombuffer(pygame.image.tobytes(surf, fmt), dtype=np.uint8).reshape(total, w, ch)
+            prev = px[-1].tobytes()
+            return px[total - n:, :, :3]
+
+        for kind, data in chunks:
+            if kind != b"IDAT":
+                continue
+            while data:
+                buf += inflate.decompress(data, _INFLATE_STEP)
+                data = inflate.unconsumed_tail
+                while len(buf) >= rows * stride and done < h:
+                    n = min(rows, h - done)
+                    yield band(bytes(buf[:n * stride]), n)
+                    del buf[:n * stride]; done += n
+        buf += inflate.flush()
+        while done < h:
+            n = min(rows, h - done)
+            if len(buf) < n * stride:
+                raise ValueError("truncated PNG data")
+            yield band(bytes(buf[:n * stride]), n)
+            del buf[:n * stride]; done += n
+
+
+def _surface_bands(surf: pygame.Surface, rows: int) -> Iterator[np.ndarray]:
+    w, h = surf.get_size()
+    for y in range(0, h, rows):
+        n = min(rows, h - y)
+        sub = surf.subsurface(pygame.Rect(0, y, w, n))
+        yield np.frombuffer(pygame.image.tobytes(sub, "RGB"), dtype=np.uint8).reshape(n, w, 3)
+
+
+def _level_sizes(w: int, h: int, tile: int) -> List[Tuple[int, int]]:
+    sizes = [(w, h)]
+    while max(sizes[-1]) > tile:
+        pw, ph = sizes[-1]
+        sizes.append((-(-pw // 2), -(-ph // 2)))
+    return sizes
+
+
+def _grid(size: Tuple[int, int], tile: int) -> Tuple[int, int]:
+    return -(-size[1] // tile), -(-size[0] // tile)
+
+
+def _tile_row(band: np.ndarray, cols: int, tile: int) -> np.ndarray:
+    """(h, w, 4) pixels as one row of tiles, edges repeated into the padding."""
+    h, w = band.shape[:2]
+    band = np.pad(band, ((0, tile - h), (0, cols * tile - w), (0, 0)), mode="edge")
+    return band.reshape(tile, cols, tile, 4).transpose(1, 0, 2, 3)
+
+
+def _untile_row(row: np.ndarray) -> np.ndarray:
+    cols, tile = row.shape[:2]
+    return row.transpose(1, 0, 2, 3).reshape(tile, cols * tile, 4)
+
+
+def _build(bands: Iterator[np.ndarray], size: Tuple[int, int], out_dir: str, tile: int) -> None:
+    sizes = _level_sizes(size[0], size[1], tile)
+    rows, cols = _grid(size, tile)
+    mm = np.memmap(os.path.join(out_dir, "L0.raw"), np.uint8, "w+", shape=(rows, cols, tile, tile, 4))
+    for cy, rgb in enumerate(bands):
+        bgra = np.empty(rgb.shape[:2] + (4,), np.uint8)
+        bgra[..., 0] = rgb[..., 2]; bgra[..., 1] = rgb[..., 1]; bgra[..., 2] = rgb[..., 0]; bgra[..., 3] = 255
+        mm[cy] = _tile_row(bgra, cols, tile)
+    mm.flush()
+    for k in range(1, len(sizes)):
+        rows, cols = _grid(sizes[k], tile)
+        out = np.memmap(os.path.join(out_dir, f"L{k}.raw"), np.uint8, "w+", shape=(rows, cols, tile, tile, 4))
+        for cy in range(rows):
+            top = _untile_row(mm[2 * cy])
+            bot = _untile_row(mm[2 * cy + 1]) if 2 * cy + 1 < mm.shape[0] else top[-1:].repeat(tile, axis=0)
+            a = np.concatenate([top, bot]).astype(np.uint16)
+            half = ((a[0::2, 0::2] + a[1::2, 0::2] + a[0::2, 1::2] + a[1::2, 1::2] + 2) >> 2).astype(np.uint8)
+            out[cy] = _tile_row(half[:, :min(half.shape[1], cols * tile)], cols, tile)
+        out.flush()
+        del mm
+        mm = out
+    del mm
+    with open(os.path.join(out_dir, "info.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "size": list(size), "tile": tile, "levels": [list(s) for s in sizes]}, f)
+
+
+def _prune(root: str, keep: str) -> None:
+    entries = []
+    for name in os.listdir(root):
+        info = os.path.join(root, name, "info.json")
+        if name != keep and os.path.isfile(info):
+            entries.append((os.path.getmtime(info), name))
+    for _, name in sorted(entries)[:max(0, len(entries) - (BG_CACHE_KEEP - 1))]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def _to_display(surf: pygame.Surface) -> pygame.Surface:
+    return surf.convert() if pygame.display.get_surface() is not None else surf
+
+
+class PagedBackground:
+    """A decoded background on disk, drawn tile by tile.
+
+    offset places the image in the world (like place_image_onto_canvas does
+    for a project whose world differs from the image); the rest of the world
+    reads as white.
+    """
+
+    def __init__(self, cache_dir: str, world_size: Optional[Tuple[int, int]] = None):
+        with open(os.path.join(cache_dir, "info.json"), "r", encoding="utf-8") as f:
+            info = json.load(f)
+        self.image_size: Tuple[int, int] = (int(info["size"][0]), int(info["size"][1]))
+        self.tile = int(info["tile"])
+        self.levels: List[Tuple[int, int]] = [(int(w), int(h)) for w, h in info["levels"]]
+        self._mm: List[np.ndarray] = []
+        for k, size in enumerate(self.levels):
+            rows, cols = _grid(size, self.tile)
+            self._mm.append(np.memmap(os.path.join(cache_dir, f"L{k}.raw"), np.uint8, "r",
+                                      shape=(rows, cols, self.tile, self.tile, 4)))
+        self.world_size = self.image_size
+        self.offset = (0, 0)
+        self.place(world_size or self.image_size)
+        self._scaled: "OrderedDict[Tuple[int, int, int], pygame.Surface]" = OrderedDict()
+        self._scaled_px = 0
+        self._scaled_zoom = 0.0
+        self._overview: Optional[pygame.Surface] = None
+
+    def place(self, world_size: Tuple[int, int]) -> None:
+        """Center the image in world_size, as place_image_onto_canvas would."""
+        self.world_size = (int(world_size[0]), int(world_size[1]))
+        self.offset = (max(0, (self.world_size[0] - self.image_size[0]) // 2),
+                       max(0, (self.world_size[1] - self.image_size[1]) // 2))
+
+    def get_size(self) -> Tuple[int, int]:
+        return self.world_size
+
+    def _covers_world(self) -> bool:
+        return self.offset == (0, 0) and self.image_size[0] >= self.world_size[0] and self.image_size[1] >= self.world_size[1]
+
+    def tile_surface(self, level: int, cx: int, cy: int) -> pygame.Surface:
+        """One tile straight from the mapped file (no copy; the pixels stay on disk until read)."""
+        return pygame.image.frombuffer(self._mm[level][cy, cx], (self.tile, self.tile), "BGRA")
+
+    def get_at(self, pos: Tuple[int, int]) -> Tuple[int, int, int]:
+        x, y = pos[0] - self.offset[0], pos[1] - self.offset[1]
+        if not (0 <= x < self.image_size[0] and 0 <= y < self.image_size[1]):
+            return (255, 255, 255)
+        t = self.tile
+        b, g, r, _ = self._mm[0][y // t, x // t, y % t, x % t]
+        return (int(r), int(g), int(b))
+
+    def level_for(self, zoom: float) -> int:
+        """The smallest level that still has at least one pixel per screen pixel."""
+        if zoom >= 1.0:
+            return 0
+        return max(0, min(len(self.levels) - 1, int(math.floor(math.log2(1.0 / zoom) + 1e-9))))
+
+    def overview(self) -> pygame.Surface:
+        """The first level whose longest side fits OVERVIEW_MAX, as one surface (image only, no offset)."""
+        if self._overview is None:
+            k = next((i for i, s in enumerate(self.levels) if max(s) <= OVERVIEW_MAX), len(self.levels) - 1)
+            w, h = self.levels[k]
+            rows, cols = _grid((w, h), self.tile)
+            buf = np.ascontiguousarray(np.concatenate([_untile_row(self._mm[k][cy]) for cy in range(rows)])[:h, :w])
+            self._overview = pygame.image.frombuffer(buf, (w, h), "BGRA").copy()
+        return self._overview
+
+    def scaled(self, size: Tuple[int, int]) -> pygame.Surface:
+        """The whole world scaled to size (for thumbnails)."""
+        out = pygame.Surface(size)
+        out.fill((255, 255, 255))
+        kx = size[0] / self.world_size[0]; ky = size[1] / self.world_size[1]
+        w = max(1, round(self.image_size[0] * kx)); h = max(1, round(self.image_size[1] * ky))
+        out.blit(pygame.transform.smoothscale(self.overview(), (w, h)), (round(self.offset[0] * kx), round(self.offset[1] * ky)))
+        return out
+
+    def _keep_scaled(self, key: Tuple[int, int, int], surf: pygame.Surface) -> None:
+        self._scaled[key] = surf
+        self._scaled_px += surf.get_width() * surf.get_height()
+        while self._scaled_px > SCALED_CACHE_MAX_PX and len(self._scaled) > 1:
+            _, old = self._scaled.popitem(last=False)
+            self._scaled_px -= old.get_width() * old.get_height()
+
+    def blit_view(self, dst: pygame.Surface, origin: Tuple[float, float], zoom: float, area: pygame.Rect) -> None:
+        """Draw the background at zoom, world origin at origin on dst, limited to area.
+
+        Only tiles under area are read. Zoomed out, each tile is scaled from
+        the matching level once per zoom and kept (within a pixel budget);
+        zoomed in, only the visible part of each tile is scaled, every time.
+        """
+        if zoom != self._scaled_zoom:
+            self._scaled.clear(); self._scaled_px = 0; self._scaled_zoom = zoom
+        ox, oy = origin
+        W, H = self.world_size
+        world = pygame.Rect(math.floor(ox), math.floor(oy), math.floor(ox + W * zoom) - math.floor(ox),
+                            math.floor(oy + H * zoom) - math.floor(oy))
+        clip = area.clip(world)
+        if clip.w <= 0 or clip.h <= 0:
+            return
+        old_clip = dst.get_clip()
+        dst.set_clip(clip.clip(old_clip) if old_clip else clip)
+        if not self._covers_world():
+            dst.fill((255, 255, 255), clip)
+        level = self.level_for(zoom)
+        step = 1 << level                     # world px per level px
+        t = self.tile
+        iw, ih = self.image_size
+        lw, lh = self.levels[level]
+        ix, iy = ox + self.offset[0] * zoom, oy + self.offset[1] * zoom   # image origin on dst
+        span = t * step * zoom                # tile size on dst
+        cx0 = max(0, math.floor((clip.left - ix) / span)); cx1 = min(-(-lw // t), math.ceil((clip.right - ix) / span))
+        cy0 = max(0, math.floor((clip.top - iy) / span)); cy1 = min(-(-lh // t), math.ceil((clip.bottom - iy) / span))
+        for cy in range(cy0, cy1):
+            y0 = math.floor(iy + cy * t * step * zoom); y1 = math.floor(iy + min((cy + 1) * t * step, ih) * zoom)
+            sh = min(t, lh - cy * t)
+            for cx in range(cx0, cx1):
+                x0 = math.floor(ix + cx * t * step * zoom); x1 = math.floor(ix + min((cx + 1) * t * step, iw) * zoom)
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                sw = min(t, lw - cx * t)
+                if zoom <= 1.0:
+                    key = (level, cx, cy)
+                    surf = self._scaled.get(key)
+                    if surf is None:
+                        src = self.tile_surface(level, cx, cy).subsurface(pygame.Rect(0, 0, sw, sh))
+                        surf = _to_display(pygame.transform.scale(src, (x1 - x0, y1 - y0)))
+                        self._keep_scaled(key, surf)
+                    else:
+                        self._scaled.move_to_end(key)
+                    dst.blit(surf, (x0, y0))
+                    continue
+                # zoomed in: scale just the source pixels behind the visible part of this cell
+                vis = pygame.Rect(x0, y0, x1 - x0, y1 - y0).clip(clip)
+                if vis.w <= 0 or vis.h <= 0:
+                    continue
+                kx = (x1 - x0) / sw; ky = (y1 - y0) / sh
+                sx0 = max(0, math.floor((vis.left - x0) / kx)); sx1 = min(sw, math.ceil((vis.right - x0) / kx))
+                sy0 = max(0, math.floor((vis.top - y0) / ky)); sy1 = min(sh, math.ceil((vis.bottom - y0) / ky))
+                if sx1 <= sx0 or sy1 <= sy0:
+                    continue
+                dx0 = math.floor(x0 + sx0 * kx); dy0 = math.floor(y0 + sy0 * ky)
+                size = (math.ceil(x0 + sx1 * kx) - dx0, math.ceil(y0 + sy1 * ky) - dy0)
+                src = self.tile_surface(level, cx, cy).subsurface(pygame.Rect(sx0, sy0, sx1 - sx0, sy1 - sy0))
+                dst.blit(_to_display(pygame.transform.scale(src, size)), (dx0, dy0))
+        dst.set_clip(old_clip)
+
+
+def open_paged_background(path: str, world_size: Optional[Tuple[int, int]] = None) -> PagedBackground:
+    """PagedBackground for the image at path, decoding it into the cache first if needed.
+
+    Entries are keyed by the file's path, size and modification time, and
+    written under a temporary name so an interrupted decode is never used.
+    """
+    st = os.stat(path)
+    ident = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{BG_TILE}"
+    name = hashlib.sha1(ident.encode("utf-8")).hexdigest()[:16]
+    root = bgcache_dir()
+    out = os.path.join(root, name)
+    if not os.path.isfile(os.path.join(out, "info.json")):
+        tmp = f"{out}.{os.getpid()}.tmp"     # thumbnail workers may decode the same image at once
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        print(f"🧱 Decoding {os.path.basename(path)} into paged tiles…")
+        try:
+            size = png_size(path)
+            try:
+                if size is None:
+                    raise ValueError("not a PNG file")
+                _build(_png_bands(path, BG_TILE), size, tmp, BG_TILE)
+            except ValueError:
+                surf = pygame.image.load(path)
+                _build(_surface_bands(surf, BG_TILE), surf.get_size(), tmp, BG_TILE)
+                del surf
+            if not os.path.isfile(os.path.join(out, "info.json")):
+                shutil.rmtree(out, ignore_errors=True)
+                os.replace(tmp, out)
+            else:
+                shutil.rmtree(tmp, ignore_errors=True)      # another process got there first
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        _prune(root, name)
+    else:
+        os.utime(os.path.join(out, "info.json"))      # most recently used: pruned last
+    return PagedBackground(out, world_size)
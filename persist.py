@@ -6,6 +6,8 @@ import pygame
 import tkinter as tk
 from tkinter import filedialog
 
+from recents import MAX_RECENTS, get_store
+from maskbake import bake_mask
 from theme import (
     ENTRY_NEXT_BAKE_COLOR, ENTRY_BACK_BAKE_COLOR,
     DOOR_NEXT_BAKE_COLOR, DOOR_BACK_BAKE_COLOR,
@@ -13,49 +15,14 @@ from theme import (
 
 BytesLike = Union[bytes, bytearray, memoryview]
 
-def recents_file_path(app_dir: str = "Welcome") -> str:
+def list_recent_projects(recents_path: Optional[str] = None, max_items: int = MAX_RECENTS) -> List[str]:
 
-    appdata = os.environ.get("APPDATA", os.path.expanduser("~"))
-    d = os.path.join(appdata, app_dir)
-    os.makedirs(d, exist_ok=True)
-    return os.path.join(d, "recent.json")
+    return get_store(recents_path).items()[:max_items]
 
 
-def _load_json(path: str, default: Any) -> Any:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return default
-
-
-def _save_json(path: str, data: Any) -> None:
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except Exception:
-        pass
+def remember_recent(path: str, recents_path: Optional[str] = None) -> None:
 
-
-def list_recent_projects(recents_path: Optional[str] = None, max_items: int = 12) -> List[str]:
-
-    rp = recents_path or recents_file_path()
-    data = _load_json(rp, {"projects": []})
-    items = [p for p in data.get("projects", []) if isinstance(p, str)]
-    items = [p for p in items if os.path.isfile(p)]
-    return items[:max_items]
-
-
-def remember_recent(path: str, recents_path: Optional[str] = None, max_items: int = 12) -> None:
-
-    rp = recents_path or recents_file_path()
-    data = _load_json(rp, {"projects": []})
-    items = [p for p in data.get("projects", []) if isinstance(p, str)]
-    if path in items:
-        items.remove(path)
-    items.insert(0, path)
-    items = items[:max_items]
-    _save_json(rp, {"projects": items})
+    get_store(recents_path).remember(path)
 
 def _recent_list() -> List[str]:
     return list_recent_projects()
@@ -107,7 +74,7 @@ def _bake_doors_fill(out_surf: pygame.Surface, doors: List[Dict[str, Any]]) -> p
     return out_surf
 
 
-def bake_mask_surface(
+def bake_mask_surface_reference(
     mask_world: pygame.Surface,
     spawn_pos: Optional[Tuple[int, int]],
     entry_next_spawns: List[Tuple[int, int]],
@@ -120,6 +87,20 @@ def bake_mask_surface(
     return out
 
 
+def bake_mask_surface(
+    mask_world: pygame.Surface,
+    spawn_pos: Optional[Tuple[int, int]],
+    entry_next_spawns: List[Tuple[int, int]],
+    entry_back_spawns: List[Tuple[int, int]],
+    doors: List[Dict[str, Any]],
+) -> pygame.Surface:
+
+    out = bake_mask(mask_world, spawn_pos, entry_next_spawns, entry_back_spawns, doors)
+    if out is None:     # surface format the array path doesn't handle
+        out = bake_mask_surface_reference(mask_world, spawn_pos, entry_next_spawns, entry_back_spawns, doors)
+    return out
+
+
 def export_mask_png_dialog(
     mask_world: pygame.Surface,
     *,
@@ -183,6 +164,7 @@ def build_project_dict(
     entry_next_spawns: List[Tuple[int, int]],
     entry_back_spawns: List[Tuple[int, int]],
     embed_bg_bytes_b64: Optional[str] = None,
+    journal_seq: int = 0,
 ) -> Dict[str, Any]:
 
     data = {
@@ -202,6 +184,7 @@ def build_project_dict(
         "spawn_pos": list(spawn_pos) if (spawn_pos is not None) else None,
         "entry_next_spawns": entry_next_spawns,
         "entry_back_spawns": entry_back_spawns,
+        "journal_seq": int(journal_seq),
     }
     return data
 
@@ -256,8 +239,7 @@ def save_project_dialog(
     data["bg_embed_b64"] = embed_b64
 
     try:
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        write_project_file(out_path, data, project_meta(data))
         print("💾 Project saved:", out_path)
         return out_path
     except Exception as ex:
@@ -265,6 +247,92 @@ def save_project_dialog(
         return None
 
 
+# ---------- metadata header ----------
+# The first two lines of a .xzenp are "{" and '  "meta": {...},' so previews can
+# read world size, layer counts and a small thumbnail without parsing the rest.
+META_VERSION = 1
+META_MAX_LINE = 512 * 1024
+_META_PREFIX = '"meta": '
+
+
+def project_meta(
+    data: Dict[str, Any],
+    *,
+    thumb_png: Optional[bytes] = None,
+    thumb_size: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+
+    ws = data.get("world_size", [1280, 720])
+    strokes: List[Dict[str, Any]] = data.get("strokes", [])
+    doors: List[Dict[str, Any]] = data.get("doors", [])
+    meta: Dict[str, Any] = {
+        "version": META_VERSION,
+        "world_size": [int(ws[0]), int(ws[1])],
+        "layers": {
+            "strokes": len(strokes),
+            "strokes_visible": sum(1 for st in strokes if st.get('visible', True)),
+            "doors": len(doors),
+        },
+        "doors": {
+            "next": sum(1 for d in doors if d.get('kind', 'next') == 'next'),
+            "back": sum(1 for d in doors if d.get('kind', 'next') == 'back'),
+            "names": [str(d.get('name', ""))[:32] for d in doors[:16]],
+        },
+        "entries": {
+            "spawn": data.get("spawn_pos") is not None,
+            "next": len(data.get("entry_next_spawns", [])),
+            "back": len(data.get("entry_back_spawns", [])),
+        },
+        "thumb": None,
+    }
+    if thumb_png:
+        tw, th = thumb_size or (0, 0)
+        meta["thumb"] = {"w": int(tw), "h": int(th), "png_b64": base64.b64encode(thumb_png).decode("ascii")}
+    return meta
+
+
+def dump_project_json(data: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> str:
+
+    body_data = {k: v for k, v in data.items() if k != "meta"}
+    body = json.dumps(body_data, indent=2)
+    if meta is None:
+        return body
+    head = json.dumps(meta, separators=(",", ":"))
+    if body.strip() == "{}":
+        return "{\n  " + _META_PREFIX + head + "\n}"
+    return "{\n  " + _META_PREFIX + head + "," + body[1:]
+
+
+def write_project_file(path: str, data: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> None:
+    """Atomically write a project (tmp file + fsync + replace)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(dump_project_json(data, meta))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_project_meta(path: str) -> Optional[Dict[str, Any]]:
+    """Read only the metadata header of a project; None for older files."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            first = f.readline(16)
+            if first.strip() != "{":
+                return None
+            line = f.readline(META_MAX_LINE).strip()
+    except Exception:
+        return None
+    if not line.startswith(_META_PREFIX):
+        return None
+    line = line[len(_META_PREFIX):].rstrip(",")
+    try:
+        meta = json.loads(line)
+    except ValueError:
+        return None
+    return meta if isinstance(meta, dict) else None
+
+
 def _decode_b64(s: str) -> bytes:
     return base64.b64decode(s)
 
@@ -328,6 +396,7 @@ def load_project_file(
         "bg_path": data.get("bg_path") or None,
         "bg_rel": data.get("bg_rel") or None,
         "bg_embed_b64": data.get("bg_embed_b64") or None,
+        "journal_seq": int(data.get("journal_seq", 0)),
         "project_path": project_path,
     }
 
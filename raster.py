@@ -0,0 +1,120 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+
+import pygame
+
+from theme import MASK_DRAW_COLOR, MASK_ERASE_COLOR, LINE_WIDTH_DEFAULT, WIDTH_MIN
+
+# Display-free stroke rasterization shared by the editor, previews and batch tools.
+
+# ---- Orthogonalization helpers (fix for disconnected auto-straight) ----
+def _dedupe_consecutive(pts: List[Tuple[int,int]]) -> List[Tuple[int,int]]:
+    out: List[Tuple[int,int]] = []
+    last = None
+    for p in pts:
+        if p != last:
+            out.append(p)
+            last = p
+    return out
+
+def orthogonalize_pts(pts: List[Tuple[int,int]]) -> List[Tuple[int,int]]:
+    if not pts:
+        return []
+    out: List[Tuple[int,int]] = [(int(pts[0][0]), int(pts[0][1]))]
+    last_dir: Optional[str] = None  # 'h' or 'v'
+    for i in range(1, len(pts)):
+        x1, y1 = out[-1]
+        x2, y2 = int(pts[i][0]), int(pts[i][1])
+        if x1 == x2 or y1 == y2:
+            out.append((x2, y2))
+            last_dir = 'h' if y1 == y2 else 'v'
+            continue
+        cand_h = (x2, y1) 
+        cand_v = (x1, y2) 
+        if last_dir == 'h':
+            out.append(cand_h); out.append((x2, y2)); last_dir = 'v'
+        elif last_dir == 'v':
+            out.append(cand_v); out.append((x2, y2)); last_dir = 'h'
+        else:
+            if abs(x2 - x1) >= abs(y2 - y1):
+                out.append(cand_h); out.append((x2, y2)); last_dir = 'v'
+            else:
+                out.append(cand_v); out.append((x2, y2)); last_dir = 'h'
+    return _dedupe_consecutive(out)
+
+def axis_segment_rect(w: int, a: Tuple[int,int], b: Tuple[int,int]) -> pygame.Rect:
+    x1, y1 = a; x2, y2 = b
+    dx, dy = x2 - x1, y2 - y1
+    if abs(dx) >= abs(dy):
+        x0, x1b = (x2, x1) if x2 < x1 else (x1, x2)
+        return pygame.Rect(x0, int(y1 - w//2), (x1b - x0) + 1, w)
+    y0, y1b = (y2, y1) if y2 < y1 else (y1, y2)
+    return pygame.Rect(int(x1 - w//2), y0, w, (y1b - y0) + 1)
+
+def draw_axis_rect_segment_world(surf, col, w, a: Tuple[int,int], b: Tuple[int,int]):
+    pygame.draw.rect(surf, col, axis_segment_rect(w, a, b))
+
+def stroke_width(st: Dict[str, Any], default_w: int = LINE_WIDTH_DEFAULT) -> int:
+    return max(WIDTH_MIN, int(st.get('w', default_w)))
+
+def draw_stroke_on(surf, st, col, default_w: int = LINE_WIDTH_DEFAULT):
+    pts = [(int(x), int(y)) for (x, y) in st['pts']]
+    w = stroke_width(st, default_w)
+    if st['mode'] == 'poly':
+        for a, b in zip(pts, pts[1:]):
+            pygame.draw.line(surf, col, a, b, w)
+    elif st['mode'] == 'straight_poly':
+        o = orthogonalize_pts(pts)
+        if len(o) == 1:
+            pygame.draw.rect(surf, col, pygame.Rect(o[0][0] - w//2, o[0][1] - w//2, w, w))
+            return
+        for a, b in zip(o, o[1:]):
+            draw_axis_rect_segment_world(surf, col, w, a, b)
+        for (jx, jy) in o:
+            pygame.draw.rect(surf, col, pygame.Rect(int(jx - w//2), int(jy - w//2), w, w))
+
+def stroke_pieces(st: Dict[str, Any], default_w: int = LINE_WIDTH_DEFAULT) -> List[Dict[str, Any]]:
+    """st as two-point sub-strokes that together draw exactly its pixels.
+
+    Every segment (and joint) of a stroke is rasterized on its own, so a long
+    stroke can be drawn piece by piece onto small surfaces.
+    """
+    pts = [(int(x), int(y)) for (x, y) in st['pts']]
+    w = stroke_width(st, default_w)
+    if st['mode'] == 'straight_poly':
+        pts = orthogonalize_pts(pts)
+        if len(pts) == 1:
+            return [{'mode': 'straight_poly', 'pts': pts, 'w': w}]
+    return [{'mode': st['mode'], 'pts': [a, b], 'w': w} for a, b in zip(pts, pts[1:])]
+
+def stroke_bounds(st, default_w: int = LINE_WIDTH_DEFAULT) -> pygame.Rect:
+    xs=[p[0] for p in st['pts']]; ys=[p[1] for p in st['pts']]
+    if not xs:
+        return pygame.Rect(0,0,0,0)
+    w = stroke_width(st, default_w)
+    return pygame.Rect(min(xs)-w, min(ys)-w, max(xs)-min(xs)+2*w, max(ys)-min(ys)+2*w)
+
+def render_mask(
+    world_size: Tuple[int, int],
+    strokes: List[Dict[str, Any]],
+    default_w: int = LINE_WIDTH_DEFAULT,
+) -> pygame.Surface:
+    """Rasterize visible strokes into a fresh world-sized mask (no display needed)."""
+    mask = pygame.Surface((int(world_size[0]), int(world_size[1])))
+    mask.fill(MASK_ERASE_COLOR)
+    for st in strokes:
+        if not st.get('visible', True):
+            continue
+        draw_stroke_on(mask, st, MASK_DRAW_COLOR, default_w)
+    return mask
+
+def place_image_onto_canvas(img: pygame.Surface, canvas_wh: Tuple[int,int]) -> pygame.Surface:
+    cw, ch = canvas_wh
+    iw, ih = img.get_size()
+    canvas = pygame.Surface((cw, ch))
+    canvas.fill((255, 255, 255))
+    x = max(0, (cw - iw) // 2)
+    y = max(0, (ch - ih) // 2)
+    src = pygame.Rect(0, 0, min(iw, cw), min(ih, ch))
+    canvas.blit(img, (x, y), area=src)
+    return canvas
@@ -0,0 +1,138 @@
+from __future__ import annotations
+import os, json, hashlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pygame
+
+from persist import bake_mask_surface
+from raster import stroke_bounds
+from theme import MASK_ERASE_COLOR
+from tiledmask import stroke_scratches
+from tiles import TILE_SIZE, tile_grid, tile_rect
+
+# Incremental re-bake: the world is split into a grid of regions and each
+# region gets a hash of exactly the inputs that can touch its pixels (strokes,
+# doors and markers whose bounds overlap it, in draw order). After an edit only
+# regions whose hash changed are re-rasterized and patched into the previous
+# baked image.
+
+REGION_PAD = 2      # extra px around stroke/door bounds, for pygame's thick-line rounding
+
+
+def _door_bounds(d: Dict[str, Any]) -> pygame.Rect:
+    xs = [int(p[0]) for p in d['pts']]; ys = [int(p[1]) for p in d['pts']]
+    return pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+
+
+def _items(proj: Dict[str, Any]) -> List[Tuple[str, pygame.Rect, Any]]:
+    """Everything that paints the baked mask, in paint order, with its pixel bounds."""
+    out: List[Tuple[str, pygame.Rect, Any]] = []
+    bw = proj["brush_w"]
+    for st in proj["strokes"]:
+        if st.get('visible', True) and st.get('pts'):
+            out.append(("s", stroke_bounds(st, bw).inflate(2 * REGION_PAD, 2 * REGION_PAD), st))
+    markers = ([("spawn", proj["spawn_pos"])] if proj.get("spawn_pos") else []) \
+        + [("next", p) for p in proj["entry_next_spawns"]] + [("back", p) for p in proj["entry_back_spawns"]]
+    for kind, p in markers:
+        out.append(("m", pygame.Rect(int(p[0]), int(p[1]), 1, 1), [kind, p]))
+    for d in proj["doors"]:
+        if d.get('visible', True) and len(d.get('pts', [])) >= 3:
+            out.append(("d", _door_bounds(d).inflate(2 * REGION_PAD, 2 * REGION_PAD), d))
+    return out
+
+
+def region_hashes(proj: Dict[str, Any], tile: int = TILE_SIZE, extra: str = "") -> List[str]:
+    """One hash per region, row-major over the tile_grid; extra is mixed into every one."""
+    world = (int(proj["world_size"][0]), int(proj["world_size"][1]))
+    cols, rows = tile_grid(world, tile)
+    per: List[List[str]] = [[] for _ in range(cols * rows)]
+    for kind, r, item in _items(proj):
+        r = r.clip(pygame.Rect(0, 0, *world))
+        if r.w <= 0 or r.h <= 0:
+            continue
+        raw = kind + json.dumps(item, sort_keys=True, separators=(",", ":"), default=list)
+        for cy in range(r.top // tile, (r.bottom - 1) // tile + 1):
+            for cx in range(r.left // tile, (r.right - 1) // tile + 1):
+                per[cy * cols + cx].append(raw)
+    head = json.dumps([list(world), tile, proj["brush_w"], extra])
+    return [hashlib.sha1("\n".join([head] + p).encode("utf-8")).hexdigest()[:16] for p in per]
+
+
+def dirty_regions(old: Optional[List[str]], new: List[str]) -> Optional[Set[int]]:
+    """Indices whose hash changed, or None when the old grid can't be compared."""
+    if old is None or len(old) != len(new):
+        return None
+    return {i for i, (a, b) in enumerate(zip(old, new)) if a != b}
+
+
+def rebake_regions(
+    prev: pygame.Surface, proj: Dict[str, Any], dirty: Set[int], tile: int = TILE_SIZE
+) -> pygame.Surface:
+    """prev with the dirty regions re-baked from proj.
+
+    Everything is rasterized onto a surface covering just the dirty regions'
+    bounding box, shifted by its origin. Only the strokes, markers and doors
+    overlapping a dirty region are drawn; stroke parts go through
+    stroke_scratches, unclipped, so their pixels match a full bake exactly.
+    The result is copied into prev region by region.
+    """
+    world = (int(proj["world_size"][0]), int(proj["world_size"][1]))
+    cols, _ = tile_grid(world, tile)
+    rects = [tile_rect(i % cols, i // cols, world, tile) for i in sorted(dirty)]
+    if not rects:
+        return prev
+    box = rects[0].unionall(rects[1:])
+    hit = lambda r: any(r.colliderect(d) for d in rects)
+    shift = lambda p: (p[0] - box.x, p[1] - box.y)
+
+    mask = pygame.Surface(box.size)
+    mask.fill(MASK_ERASE_COLOR)
+    world_r = pygame.Rect(0, 0, *world)
+    for st in proj["strokes"]:
+        if st.get('visible', True) and st.get('pts') and \
+                hit(stroke_bounds(st, proj["brush_w"]).inflate(2 * REGION_PAD, 2 * REGION_PAD)):
+            for r, _hit, scratch in stroke_scratches(st, proj["brush_w"], world_r, box):
+                mask.blit(scratch, shift(r.topleft))
+    near = lambda p: hit(pygame.Rect(int(p[0]), int(p[1]), 1, 1))
+    spawn = shift(proj["spawn_pos"]) if proj.get("spawn_pos") and near(proj["spawn_pos"]) else None
+    doors = [dict(d, pts=[shift(p) for p in d['pts']]) for d in proj["doors"]
+             if d.get('visible', True) and len(d.get('pts', [])) >= 3
+             and hit(_door_bounds(d).inflate(2 * REGION_PAD, 2 * REGION_PAD))]
+    baked = bake_mask_surface(
+        mask, spawn,
+        [shift(p) for p in proj["entry_next_spawns"] if near(p)],
+        [shift(p) for p in proj["entry_back_spawns"] if near(p)],
+        doors,
+    )
+    for r in rects:
+        prev.blit(baked, r, r.move(-box.x, -box.y))
+    return prev
+
+
+def previous_baked(outs: Dict[str, str], world: Tuple[int, int]) -> Optional[pygame.Surface]:
+    """The last baked image, from the exported PNG or reassembled from mask tiles."""
+    png = outs.get("png")
+    if png and os.path.isfile(png):
+        try:
+            surf = pygame.image.load(png)
+        except pygame.error:
+            return None
+        return surf if surf.get_size() == tuple(world) else None
+    man_path = outs.get("tiles")
+    if man_path and os.path.isfile(man_path):
+        try:
+            with open(man_path, "r", encoding="utf-8") as f:
+                man = json.load(f)
+            if (man["w"], man["h"]) != tuple(world):
+                return None
+            out = pygame.Surface(world)
+            out.fill(MASK_ERASE_COLOR)
+            d = os.path.dirname(man_path)
+            for key, ent in man["chunks"].items():
+                if "mask" in ent:
+                    cx, cy = (int(v) for v in key.split(","))
+                    out.blit(pygame.image.load(os.path.join(d, ent["mask"])), (cx * man["tile"], cy * man["tile"]))
+            return out
+        except (OSError, ValueError, KeyError, pygame.error):
+            return None
+    return None
@@ -1,17 +1,23 @@
 from __future__ import annotations
-import os, json
-from typing import List, Any
+import os, json, threading, time
+from typing import Dict, List, Any, Optional
 
 APP_SUBDIR = "Welcome"
 RECENT_FILE_NAME = "recent.json"
 MAX_RECENTS = 12
 
-def _recents_path() -> str:
+STAT_INTERVAL_S = 0.5     # how often items() may stat recent.json
+RECHECK_EXISTS_S = 10.0   # how often the background existence sweep reruns
+
+def recents_file_path(app_dir: str = APP_SUBDIR) -> str:
     appdata = os.environ.get("APPDATA", os.path.expanduser("~"))
-    d = os.path.join(appdata, APP_SUBDIR)
+    d = os.path.join(appdata, app_dir)
     os.makedirs(d, exist_ok=True)
     return os.path.join(d, RECENT_FILE_NAME)
 
+def _recents_path() -> str:
+    return recents_file_path()
+
 def _load_json(path: str, default: Any) -> Any:
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -26,20 +32,122 @@ def _save_json(path: str, data: Any) -> None:
     except Exception:
         pass
 
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RecentsStore:
+    """In-memory recent-projects list backed by recent.json.
+
+    items() is cheap enough to call every frame: the file is re-read only when
+    its mtime changes, and file existence is checked on a background thread
+    (paths not checked yet are shown until proven missing).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_items: int = MAX_RECENTS):
+        self.path = path or recents_file_path()
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._items: List[str] = []
+        self._exists: Dict[str, bool] = {}
+        self._mtime: Optional[int] = None
+        self._loaded = False
+        self._last_stat = 0.0
+        self._last_sweep = 0.0
+        self._sweeping = False
+
+    # ---- reading ----
+    def _reload(self) -> None:
+        data = _load_json(self.path, {"projects": []})
+        items = [p for p in data.get("projects", []) if isinstance(p, str)]
+        with self._lock:
+            self._items = items
+        self._loaded = True
+        self._sweep_async()
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and (now - self._last_stat) < STAT_INTERVAL_S:
+            return
+        self._last_stat = now
+        mt = _mtime_ns(self.path)
+        if not self._loaded or mt != self._mtime:
+            self._mtime = mt
+            self._reload()
+        elif (now - self._last_sweep) >= RECHECK_EXISTS_S:
+            self._sweep_async()
+        else:
+            with self._lock:
+                unknown = any(p not in self._exists for p in self._items)
+            if unknown:
+                self._sweep_async()
+
+    def _sweep_async(self) -> None:
+        if self._sweeping:
+            return
+        self._sweeping = True
+        self._last_sweep = time.monotonic()
+        with self._lock:
+            paths = list(self._items)
+
+        def _run():
+            try:
+                found = {p: os.path.isfile(p) for p in paths}
+                with self._lock:
+                    self._exists.update(found)
+            finally:
+                self._sweeping = False
+
+        threading.Thread(target=_run, name="recents-exists", daemon=True).start()
+
+    def items(self) -> List[str]:
+        self._refresh()
+        with self._lock:
+            out = [p for p in self._items if self._exists.get(p, True)]
+        return out[:self.max_items]
+
+    # ---- writing ----
+    def _write(self, items: List[str]) -> None:
+        with self._lock:
+            self._items = list(items)
+        _save_json(self.path, {"projects": items})
+        self._mtime = _mtime_ns(self.path)
+        self._loaded = True
+
+    def remember(self, path: str) -> None:
+        self._refresh()
+        with self._lock:
+            items = list(self._items)
+            self._exists[path] = True
+        if path in items:
+            items.remove(path)
+        items.insert(0, path)
+        self._write(items[:self.max_items])
+
+    def remove(self, path: str) -> None:
+        self._refresh()
+        with self._lock:
+            items = [p for p in self._items if p != path]
+        self._write(items)
+
+
+_stores: Dict[str, RecentsStore] = {}
+
+def get_store(path: Optional[str] = None) -> RecentsStore:
+    key = path or recents_file_path()
+    st = _stores.get(key)
+    if st is None:
+        st = _stores[key] = RecentsStore(key)
+    return st
+
 def recent_list(max_items: int = MAX_RECENTS) -> List[str]:
-    data = _load_json(_recents_path(), {"projects": []})
-    items = [p for p in data.get("projects", []) if isinstance(p, str)]
-    items = [p for p in items if os.path.isfile(p)]
-    return items[:max_items]
-
-def remember_recent(path: str, max_items: int = MAX_RECENTS) -> None:
-    store_path = _recents_path()
-    data = _load_json(store_path, {"projects": []})
-    items = [p for p in data.get("projects", []) if isinstance(p, str)]
-
-    if path in items:
-        items.remove(path)
-    items.insert(0, path)
-    items = items[:max_items]
-
-    _save_json(store_path, {"projects": items})
+    return get_store().items()[:max_items]
+
+def remember_recent(path: str) -> None:
+    get_store().remember(path)
+
+def remove_recent(path: str) -> None:
+    get_store().remove(path)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import numpy as np
+import pygame
+
+from colliders import row_runs
+from maskbake import span_pixels
+
+# Per-region ids for a baked mask: every door polygon gets its own id (so
+# overlapping/adjacent doors of the same color stay apart) and every connected
+# wall area gets one too. The game turns a trigger test into ids[y, x].
+
+WALL_CONNECTIVITY = 8     # diagonal neighbours join, so thin diagonal brush lines stay one wall
+
+
+def door_id_map(
+    size: Tuple[int, int],
+    doors: List[Dict[str, Any]],
+    within: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """(h, w) uint16 door ids (0 = no door) and the id -> door table.
+
+    Doors are filled in draw order with pygame.draw.polygon, the same fill the
+    bake uses, so ids cover exactly the baked door pixels and the last door
+    drawn owns a shared pixel. within (the baked door pixels) clips the map so
+    it can never disagree with the mask.
+    """
+    w, h = size
+    surf = pygame.Surface((w, h), 0, 32)
+    surf.fill(0)
+    table: List[Dict[str, Any]] = []
+    for d in doors:
+        pts = d.get('pts', [])
+        if not d.get('visible', True) or len(pts) < 3:
+            continue
+        table.append({"id": len(table) + 1, "name": d.get('name', ''), "kind": d.get('kind', 'next')})
+        pygame.draw.polygon(surf, table[-1]["id"], pts)     # int color = raw pixel value
+    if len(table) >= 1 << 16:
+        raise ValueError(f"too many doors for a 16-bit id map ({len(table)})")
+    ids = np.array(cast(Any, pygame.surfarray.pixels2d(surf)).T, dtype=np.uint16)
+    if within is not None:
+        ids[~within] = 0
+    _add_stats(table, ids)
+    return ids, table
+
+
+def wall_components(walls: np.ndarray) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """Label connected wall areas 1..n (row-major by first pixel); 0 = not wall.
+
+    Works on row runs: runs on neighbouring rows that touch are joined with a
+    vectorised min-label propagation, then each run is painted with its label.
+    """
+    h, w = walls.shape
+    y, x0, x1 = row_runs(walls)                          # row-major, x1 exclusive
+    n = len(y)
+    if not n:
+        return np.zeros((h, w), dtype=np.uint16), []
+    reach = 1 if WALL_CONNECTIVITY == 8 else 0
+    stride = w + 2
+    k0 = y * stride + x0; k1 = y * stride + x1           # both sorted ascending
+    # runs on the row above that touch run b: above.x1 + reach > b.x0 and above.x0 < b.x1 + reach
+    lo = np.searchsorted(k1, (y - 1) * stride + x0 - reach, side="right")
+    hi = np.searchsorted(k0, (y - 1) * stride + x1 + reach, side="left")
+    cnt = np.maximum(hi - lo, 0)
+    b = np.repeat(np.arange(n), cnt)
+    a = np.repeat(lo, cnt) + (np.arange(int(cnt.sum())) - np.repeat(np.cumsum(cnt) - cnt, cnt))
+
+    lab = np.arange(n)
+    while True:
+        m = np.minimum(lab[a], lab[b])
+        new = lab.copy()
+        np.minimum.at(new, a, m); np.minimum.at(new, b, m)
+        new = new[new]                                    # pointer jumping
+        if np.array_equal(new, lab):
+            break
+        lab = new
+    roots, comp = np.unique(lab, return_inverse=True)     # roots are first runs, so ids go row-major
+    count = len(roots)
+    ids = np.zeros((h, w), dtype=np.uint16 if count < 1 << 16 else np.uint32)
+    xx, yy = span_pixels(y, x0, x1 - 1)
+    ids[yy, xx] = np.repeat(comp + 1, x1 - x0)
+    table: List[Dict[str, Any]] = [{"id": i + 1} for i in range(count)]
+    _add_stats(table, ids)
+    return ids, table
+
+
+def _add_stats(table: List[Dict[str, Any]], ids: np.ndarray) -> None:
+    # pixel count and inclusive bbox per id; ids with no pixels get px 0 and no bbox
+    ys, xs = np.nonzero(ids)
+    v = ids[ys, xs].astype(np.int64)
+    n = len(table) + 1
+    px = np.bincount(v, minlength=n)
+    big = np.iinfo(np.int64).max
+    bx0 = np.full(n, big); by0 = np.full(n, big); bx1 = np.full(n, -1); by1 = np.full(n, -1)
+    np.minimum.at(bx0, v, xs); np.minimum.at(by0, v, ys)
+    np.maximum.at(bx1, v, xs); np.maximum.at(by1, v, ys)
+    for t in table:
+        i = t["id"]
+        t["px"] = int(px[i])
+        t["bbox"] = [int(bx0[i]), int(by0[i]), int(bx1[i]), int(by1[i])] if px[i] else None
+
+
+def id_paths(json_path: str) -> Tuple[str, str]:
+    """The two id maps that sit next to <base>.ids.json."""
+    base = json_path[:-len(".ids.json")] if json_path.endswith(".ids.json") else json_path
+    return base + ".door_ids.npy", base + ".wall_ids.npy"
+
+
+def write_ids(json_path: str, door_mask: np.ndarray, walls: np.ndarray, proj: Dict[str, Any]) -> Dict[str, Any]:
+    """Write <base>.door_ids.npy, <base>.wall_ids.npy and the <base>.ids.json table."""
+    h, w = walls.shape
+    door_ids, doors = door_id_map((w, h), proj.get("doors", []), within=door_mask)
+    wall_ids, wall_regions = wall_components(walls)
+    door_path, wall_path = id_paths(json_path)
+    np.save(door_path, door_ids)
+    np.save(wall_path, wall_ids)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"w": w, "h": h, "doors": doors, "walls": wall_regions}, f, separators=(",", ":"))
+    return {"doors": len(doors), "wall_regions": len(wall_regions)}
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import os, re, zlib, py_compile
+from typing import Any, Dict, List
+
+import numpy as np
+
+from colliders import wall_colliders, door_polygons
+from theme import LINE_WIDTH_DEFAULT
+
+# Writes a self-contained Python module per room: collision rectangles, the
+# packed wall bitmap, door polygons and spawn/entry points as literals, plus a
+# few lookup helpers. The game imports it (bytecode is precompiled next to it);
+# nothing is decoded at runtime except one zlib.decompress of the bitmap.
+
+MODULE_TEMPLATE = '''\
+# Generated by GhostyEngine2D from {source!r}. Re-export instead of editing.
+import zlib
+
+WIDTH, HEIGHT = {w}, {h}
+SPAWN = {spawn!r}
+ENTRY_NEXT = {entry_next!r}
+ENTRY_BACK = {entry_back!r}
+
+# walls as (x, y, w, h) boxes
+WALL_RECTS = (
+{rects}
+)
+
+# doors in draw order; the last one containing a point wins
+DOORS = (
+{doors}
+)
+
+# 1 bit per pixel, MSB first, rows padded to whole bytes
+ROW_BYTES = (WIDTH + 7) // 8
+WALL_BITS = zlib.decompress(
+{bits}
+)
+
+
+def point_in_wall(x, y):
+    if x < 0 or y < 0 or x >= WIDTH or y >= HEIGHT:
+        return False
+    x, y = int(x), int(y)
+    return (WALL_BITS[y * ROW_BYTES + (x >> 3)] >> (7 - (x & 7))) & 1 == 1
+
+
+def rect_hits_wall(x, y, w, h):
+    for rx, ry, rw, rh in WALL_RECTS:
+        if rx < x + w and x < rx + rw and ry < y + h and y < ry + rh:
+            return True
+    return False
+
+
+def _filled(x, y, door):
+    # pygame.draw.polygon's fill rule for pixel (x, y), which is what the bake uses
+    pts = door["pts"]
+    x0, y0, x1, y1 = door["bbox"]
+    if y0 == y1:
+        return True
+    xs = []
+    for i in range(len(pts)):
+        ax, ay = pts[i - 1]; bx, by = pts[i]
+        if ay == by:
+            if y0 < y == ay < y1 and min(ax, bx) <= x <= max(ax, bx):
+                return True
+            continue
+        if ay > by:
+            ax, ay, bx, by = bx, by, ax, ay
+        if ay <= y < by or y == by == y1:
+            xs.append(int((y - ay) * (bx - ax) / (by - ay) + ax))
+    xs.sort()
+    for a, b in zip(xs[0::2], xs[1::2]):
+        if a <= x <= b:
+            return True
+    return False
+
+
+def door_at(x, y):
+    if x < 0 or y < 0 or x >= WIDTH or y >= HEIGHT:
+        return None
+    x, y = int(x), int(y)
+    for door in reversed(DOORS):
+        x0, y0, x1, y1 = door["bbox"]
+        if x0 <= x <= x1 and y0 <= y <= y1 and _filled(x, y, door):
+            return door
+    return None
+'''
+
+
+def module_name(stem: str) -> str:
+    name = re.sub(r"\W", "_", stem)
+    return name if name and not name[0].isdigit() else "room_" + name
+
+
+def _tuple_lines(items: List[Any], per_line: int) -> str:
+    lines = []
+    for i in range(0, len(items), per_line):
+        lines.append("    " + " ".join(f"{it!r}," for it in items[i:i + per_line]))
+    return "\n".join(lines)
+
+
+def _bytes_lines(data: bytes, width: int = 48) -> str:
+    return "\n".join(f"    {data[i:i + width]!r}" for i in range(0, len(data), width)) or "    b''"
+
+
+def render_room_module(walls: np.ndarray, proj: Dict[str, Any], source: str = "") -> str:
+    h, w = walls.shape
+    rects, _ = wall_colliders(walls, proj.get("strokes", []), proj.get("brush_w", LINE_WIDTH_DEFAULT))
+    doors = []
+    for d in door_polygons(proj.get("doors", [])):
+        xs = [p[0] for p in d["pts"]]; ys = [p[1] for p in d["pts"]]
+        doors.append({
+            "name": d["name"], "kind": d["kind"],
+            "pts": tuple(tuple(p) for p in d["pts"]),
+            "bbox": (min(xs), min(ys), max(xs), max(ys)),
+        })
+    sp = proj.get("spawn_pos")
+    bits = zlib.compress(np.packbits(walls, axis=1).tobytes(), 9)
+    return MODULE_TEMPLATE.format(
+        source=source, w=w, h=h,
+        spawn=(int(sp[0]), int(sp[1])) if sp else None,
+        entry_next=tuple((int(x), int(y)) for (x, y) in proj.get("entry_next_spawns", [])),
+        entry_back=tuple((int(x), int(y)) for (x, y) in proj.get("entry_back_spawns", [])),
+        rects=_tuple_lines([tuple(r) for r in rects.tolist()], 4),
+        doors=_tuple_lines(doors, 1),
+        bits=_bytes_lines(bits),
+    )
+
+
+def module_path(png_path: str) -> str:
+    base = os.path.splitext(png_path)[0]
+    return os.path.join(os.path.dirname(base), module_name(os.path.basename(base)) + ".py")
+
+
+def write_room_module(path: str, walls: np.ndarray, proj: Dict[str, Any], source: str = "") -> None:
+    src = render_room_module(walls, proj, source)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(src)
+    os.replace(tmp, path)
+    try:
+        py_compile.compile(path, doraise=True)     # ship the bytecode so even the first import is cheap
+    except (py_compile.PyCompileError, OSError) as ex:
+        print(f"⚠️ Could not precompile {path}: {ex}")
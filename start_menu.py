@@ -16,6 +16,9 @@ _deleted_set: set[str] = set()
 
 _proj_first_index: int = 0
 
+# path -> ((thumb mtime, fitted size), scaled thumb); rescaled only when either changes
+_thumb_fit_cache: Dict[str, Tuple[Tuple[Any, Tuple[int, int]], pygame.Surface]] = {}
+
 def px_rect(surf: pygame.Surface, r: pygame.Rect, fill, border, bw: int = 1):
     pygame.draw.rect(surf, fill, r)
     pygame.draw.rect(surf, border, r, bw)
@@ -65,6 +68,7 @@ def draw_start_menu(
     title_text: str = "Welcome!",
     uptime_s: float = 0.0,
     auto_hide_min: int = 30,
+    previews: Dict[str, Dict[str, Any]] | None = None,
 ) -> Dict[str, Any]:
 
     global _proj_first_index
@@ -116,11 +120,31 @@ def draw_start_menu(
             px_button(screen, rr, pressed=pressed_row, hover=hover_row)
             pygame.draw.rect(screen, C_FRAME, rr, 2)
 
+            pv = (previews or {}).get(pth) or {}
+            thumb = pv.get("thumb")
+            tx0 = rr.x + 10
+            if thumb is not None:
+                th_r = pygame.Rect(rr.x + 4, rr.y + 4, (rr.h - 8) * 16 // 9, rr.h - 8)
+                tw, th = thumb.get_size()
+                k = min(th_r.w / max(1, tw), th_r.h / max(1, th))
+                fit_key = (pv.get("thumb_mtime", id(thumb)), (max(1, int(tw * k)), max(1, int(th * k))))
+                hit = _thumb_fit_cache.get(pth)
+                if hit is not None and hit[0] == fit_key:
+                    fit = hit[1]
+                else:
+                    fit = pygame.transform.scale(thumb, fit_key[1])
+                    _thumb_fit_cache[pth] = (fit_key, fit)
+                screen.blit(fit, fit.get_rect(center=th_r.center))
+                pygame.draw.rect(screen, C_FRAME, th_r, 1)
+                tx0 = th_r.right + 8
+
+            avail = rr.right - hide_w - 18 - tx0
             base = os.path.basename(pth)
-            show_base = trunc_text(base, fonts["btn"], rr.w - hide_w - 28)
-            show_dir  = trunc_text(os.path.dirname(pth), fonts["small"], rr.w - hide_w - 28)
-            text(screen, show_base, (rr.x + 10, rr.y + 8), C_TEXT, fonts["btn"])
-            text(screen, show_dir,  (rr.x + 10, rr.y + 32), C_TEXT_DIM, fonts["small"])
+            show_base = trunc_text(base, fonts["btn"], avail)
+            sub = pv.get("stats") or os.path.dirname(pth)
+            show_dir  = trunc_text(sub, fonts["small"], avail)
+            text(screen, show_base, (tx0, rr.y + 8), C_TEXT, fonts["btn"])
+            text(screen, show_dir,  (tx0, rr.y + 32), C_TEXT_DIM, fonts["small"])
 
             # Hide button (UI-only: hides from left)
             px_button(screen, hide_r, pressed=pressed_hide, hover=hover_hide)
@@ -0,0 +1,31 @@
+import numpy as np
+
+from colliders import greedy_rects
+
+
+def _cover(rects, shape):
+    cov = np.zeros(shape, np.int32)
+    for x, y, w, h in rects:
+        cov[y:y + h, x:x + w] += 1
+    return cov
+
+
+def test_greedy_rects_cover_exactly_once():
+    rng = np.random.default_rng(33)
+    for _ in range(200):
+        walls = rng.random((rng.integers(1, 40), rng.integers(1, 40))) < rng.random()
+        assert np.array_equal(_cover(greedy_rects(walls), walls.shape), walls.astype(np.int32))
+    assert greedy_rects(np.zeros((5, 7), bool)).shape == (0, 4)
+
+
+def test_greedy_rects_grow_through_wider_rows():
+    # a block with a tab on its right: row runs differ, but [0, 10) spans every row
+    walls = np.zeros((10, 20), bool)
+    walls[:, :10] = True
+    walls[3:6, 10:15] = True
+    assert greedy_rects(walls).tolist() == [[0, 0, 10, 10], [10, 3, 5, 3]]
+    # a cross: one bar through the whole height, the other split in two
+    walls = np.zeros((30, 30), bool)
+    walls[:, 12:15] = True
+    walls[10:14, 2:28] = True
+    assert greedy_rects(walls).tolist() == [[12, 0, 3, 30], [2, 10, 10, 4], [15, 10, 13, 4]]
@@ -0,0 +1,100 @@
+import math
+import random
+
+import numpy as np
+
+from collision import Room
+from colliders import door_polygons, greedy_rects
+from regions import door_id_map
+
+
+def _walls(rng, w, h):
+    walls = np.zeros((h, w), bool)
+    for _ in range(rng.randint(3, 15)):
+        x, y = rng.randint(-5, w), rng.randint(-5, h)
+        walls[max(y, 0):y + rng.randint(1, 25), max(x, 0):x + rng.randint(1, 25)] = True
+    return walls
+
+
+def _brute_hits(walls, x, y, w, h, solid_outside=False):
+    x0, x1 = math.floor(x + 1e-7), math.ceil(x + w - 1e-7)
+    y0, y1 = math.floor(y + 1e-7), math.ceil(y + h - 1e-7)
+    H, W = walls.shape
+    if x1 <= x0 or y1 <= y0:
+        return False
+    if solid_outside and (x0 < 0 or y0 < 0 or x1 > W or y1 > H):
+        return True
+    return bool(walls[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)].any())
+
+
+def _rooms(walls, **kw):
+    size = (walls.shape[1], walls.shape[0])
+    return Room(size, walls=walls, **kw), Room(size, rects=greedy_rects(walls).tolist(), **kw)
+
+
+def test_point_and_box_queries_match_the_pixels():
+    rng = random.Random(34)
+    for _ in range(30):
+        w, h = rng.randint(10, 90), rng.randint(10, 70)
+        walls = _walls(rng, w, h)
+        solid = rng.random() < 0.5
+        sat, idx = _rooms(walls, solid_outside=solid)
+        assert sat._sat is not None and sat._sat.itemsize == 8
+        for _ in range(300):
+            x, y = rng.uniform(-8, w + 8), rng.uniform(-8, h + 8)
+            inside = 0 <= x < w and 0 <= y < h
+            want = bool(walls[int(y), int(x)]) if inside else solid
+            assert sat.point_in_wall(x, y) == idx.point_in_wall(x, y) == want, (x, y)
+            bw, bh = rng.choice([rng.uniform(0, 20), rng.randint(1, 20)]), rng.uniform(0.5, 20)
+            want = _brute_hits(walls, x, y, bw, bh, solid)
+            assert sat.aabb_hits_wall(x, y, bw, bh) == idx.aabb_hits_wall(x, y, bw, bh) == want, (x, y, bw, bh)
+
+
+def test_move_aabb_stops_flush_without_tunnelling():
+    rng = random.Random(340)
+    for _ in range(20):
+        w, h = rng.randint(30, 90), rng.randint(30, 70)
+        walls = _walls(rng, w, h)
+        for room in _rooms(walls, solid_outside=True):
+            for _ in range(150):
+                bw, bh = rng.uniform(1, 10), rng.uniform(1, 10)
+                x, y = rng.uniform(0, w - bw), rng.uniform(0, h - bh)
+                if room.aabb_hits_wall(x, y, bw, bh):
+                    assert room.move_aabb(x, y, bw, bh, 5.0, -3.0) == (x, y, True, True)
+                    continue
+                dx, dy = rng.uniform(-40, 40), rng.uniform(-40, 40)
+                nx, ny, hit_x, hit_y = room.move_aabb(x, y, bw, bh, dx, dy)
+                assert not room.aabb_hits_wall(nx, ny, bw, bh)
+                for axis, (a, b, d, hit) in enumerate(((x, nx, dx, hit_x), (y, ny, dy, hit_y))):
+                    at = (lambda p: (p, y)) if axis == 0 else (lambda p: (nx, p))
+                    for k in range(41):                  # nothing in the way of the travelled span
+                        assert not room.aabb_hits_wall(*at(a + (b - a) * k / 40), bw, bh)
+                    if hit:
+                        assert abs(b - a) < abs(d)
+                        assert room.aabb_hits_wall(*at(b + math.copysign(0.01, d)), bw, bh)
+                    else:
+                        assert b == a + d
+
+
+def test_door_at_lookups_agree():
+    rng = random.Random(3400)
+    for _ in range(15):
+        w, h = rng.randint(20, 120), rng.randint(20, 90)
+        doors = []
+        for i in range(rng.randint(1, 8)):
+            cx, cy, r = rng.randint(0, w), rng.randint(0, h), rng.randint(2, 30)
+            doors.append({"name": f"d{i}", "kind": rng.choice(["next", "back"]), "visible": True,
+                          "pts": [(cx + rng.randint(-r, r), cy + rng.randint(-r, r)) for _ in range(rng.randint(3, 7))]})
+        ids, table = door_id_map((w, h), doors)
+        kinds = np.array([0] + [3 if t["kind"] == "next" else 4 for t in table], np.uint8)
+        walls = np.zeros((h, w), bool)
+        by_ids = Room((w, h), walls=walls, door_ids=ids, door_table=table)
+        by_labels = Room((w, h), walls=walls, labels=kinds[ids], doors=door_polygons(doors))
+        for y in range(h):
+            for x in range(w):
+                fx, fy = x + rng.random() * 0.999, y + rng.random() * 0.999
+                a, b = by_ids.door_at(fx, fy), by_labels.door_at(fx, fy)
+                want = table[ids[y, x] - 1] if ids[y, x] else None
+                assert a == ({"name": want["name"], "kind": want["kind"]} if want else None)
+                assert (b["kind"] if b else None) == (want["kind"] if want else None), (x, y)
+        assert by_ids.door_at(-0.5, 0) is None and by_labels.door_at(w, 0) is None
@@ -0,0 +1,45 @@
+import random
+
+import pygame
+
+from geom import drop_axis_runs, simplify_stroke_pts
+from raster import render_mask
+
+
+def _same_pixels(world, before, after):
+    a = render_mask(world, [before])
+    b = render_mask(world, [after])
+    return pygame.image.tobytes(a, "RGB") == pygame.image.tobytes(b, "RGB")
+
+
+def test_straight_poly_keeps_diagonal_collinear_points():
+    pts = [(10, 10), (30, 30), (50, 50)]
+    assert simplify_stroke_pts('straight_poly', pts, 1.0) == pts
+
+
+def test_straight_poly_keeps_repeated_points():
+    pts = [(0, 0), (0, 10), (0, 10), (10, 20)]
+    assert simplify_stroke_pts('straight_poly', pts, 1.0) == pts
+
+
+def test_drop_axis_runs():
+    assert drop_axis_runs([(0, 0), (5, 0), (9, 0), (9, 4), (9, 8)]) == [(0, 0), (9, 0), (9, 8)]
+    assert drop_axis_runs([(0, 0), (9, 0), (4, 0)]) == [(0, 0), (9, 0), (4, 0)]     # turns back
+
+
+def test_straight_poly_simplify_is_pixel_identical():
+    rng = random.Random(40)
+    world = (160, 120)
+    for _ in range(300):
+        pts = []
+        for _ in range(rng.randint(1, 12)):
+            if pts and rng.random() < 0.6:
+                x, y = pts[-1]
+                step = rng.randint(-30, 30)
+                pts.append(rng.choice([(x + step, y), (x, y + step), (x + step, y + step), (x, y)]))
+            else:
+                pts.append((rng.randint(-10, 170), rng.randint(-10, 130)))
+        st = {'mode': 'straight_poly', 'pts': pts, 'w': rng.randint(1, 12)}
+        out = simplify_stroke_pts('straight_poly', pts, 4.0)
+        assert len(out) <= len(pts)
+        assert _same_pixels(world, st, dict(st, pts=out)), pts
@@ -0,0 +1,118 @@
+import struct, threading, time, zlib
+
+import journal as J
+
+
+def _state():
+    return {"strokes": [], "doors": [], "spawn_pos": None, "entry_next_spawns": [], "entry_back_spawns": []}
+
+
+def _stroke(i):
+    return {"mode": "poly", "pts": [(i, 0), (i + 5, 7)], "visible": True, "locked": False, "name": f"s{i}", "w": 4}
+
+
+def _journal(tmp_path, n=3):
+    j = J.Journal(str(tmp_path / "room.xzenp"))
+    for i in range(n):
+        j.stroke_added(_stroke(i))
+    j.flush()
+    return j
+
+
+def test_record_layout(tmp_path):
+    j = _journal(tmp_path, 1)
+    buf = open(j.path, "rb").read()
+    assert buf[:4] == b"XZJ1"
+    n, seq, op = struct.unpack_from("<IQB", buf, 4)
+    assert (seq, op) == (1, J.OP_STROKE_ADD)
+    end = 4 + 13 + n
+    assert len(buf) == end + 4
+    (crc,) = struct.unpack_from("<I", buf, end)
+    assert crc == zlib.crc32(buf[8:end])
+
+
+def test_torn_or_corrupt_tail_is_dropped(tmp_path):
+    j = _journal(tmp_path, 3)
+    j.close()
+    buf = open(j.path, "rb").read()
+    with open(j.path, "wb") as f:
+        f.write(buf[:-3])                        # torn mid-CRC
+    assert [r[0] for r in J.read_records(j.path)] == [1, 2]
+    bad = bytearray(buf)
+    bad[-6] ^= 0xFF                              # payload byte of the last record
+    with open(j.path, "wb") as f:
+        f.write(bytes(bad))
+    assert [r[0] for r in J.read_records(j.path)] == [1, 2]
+    # reopening cuts the bad tail, so new records follow the last good one
+    j2 = J.Journal(j.path[:-len(J.JOURNAL_SUFFIX)])
+    assert j2.seq == 2
+    j2.spawn_set((3, 4)); j2.flush()
+    assert [r[0] for r in J.read_records(j.path)] == [1, 2, 3]
+
+
+def test_replay_rebuilds_edits(tmp_path):
+    j = _journal(tmp_path, 3)
+    j.door_added({"pts": [(0, 0), (9, 0), (9, 9)], "kind": "back", "name": "d", "w": 3})
+    j.layer_moved("stroke", 1, [(40, 41), (42, 43)])
+    j.layer_removed("stroke", 0)
+    j.layer_renamed("door", 0, "exit")
+    j.entry_added("next", (5, 6))
+    j.spawn_set((7, 8))
+    j.flush()
+    st = _state()
+    assert J.replay(J.read_records(j.path), st) == j.seq
+    assert [s["name"] for s in st["strokes"]] == ["s1", "s2"]
+    assert st["strokes"][0]["pts"] == [(40, 41), (42, 43)]
+    assert st["doors"][0]["name"] == "exit" and st["doors"][0]["kind"] == "back"
+    assert st["entry_next_spawns"] == [(5, 6)] and st["spawn_pos"] == (7, 8)
+    assert J.pending_records(j.project_path, 4)[0][0] == 5
+
+
+def test_truncate_through_keeps_newer(tmp_path):
+    j = _journal(tmp_path, 5)
+    j.truncate_through(3)
+    assert [r[0] for r in J.read_records(j.path)] == [4, 5]
+    j.stroke_added(_stroke(9)); j.flush()
+    assert [r[0] for r in J.read_records(j.path)] == [4, 5, 6]
+
+
+def test_compaction_never_overwrites_a_newer_save(tmp_path):
+    j = _journal(tmp_path, 2)
+    written = []
+    started, release = threading.Event(), threading.Event()
+
+    def slow_compact(upto):
+        started.set(); release.wait(5)
+        written.append(upto)
+        return True
+
+    j.compact_async(slow_compact)
+    assert started.wait(5)
+    j.stroke_added(_stroke(7))
+    t = threading.Thread(target=lambda: j.save_full(lambda upto: written.append(upto) or True))
+    t.start()
+    time.sleep(0.05)
+    assert written == []                         # the save waits for the compaction write
+    release.set(); t.join(5)
+    assert written == [2, 3]
+    assert J.read_records(j.path) == []
+
+    # a compaction that starts while a save is writing finds nothing left to fold in
+    j.stroke_added(_stroke(8))
+    saving, release = threading.Event(), threading.Event()
+
+    def slow_save(upto):
+        saving.set(); release.wait(5)
+        written.append(upto)
+        return True
+
+    t = threading.Thread(target=lambda: j.save_full(slow_save))
+    t.start()
+    assert saving.wait(5)
+    j.compact_async(lambda upto: written.append(("compact", upto)) or True)
+    release.set(); t.join(5)
+    for _ in range(500):
+        if not j._compacting:
+            break
+        time.sleep(0.01)
+    assert written == [2, 3, 4]
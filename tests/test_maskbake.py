@@ -0,0 +1,51 @@
+import random
+
+import pygame
+import pytest
+
+from maskbake import bake_mask
+from persist import bake_mask_surface, bake_mask_surface_reference
+from theme import MASK_DRAW_COLOR, MASK_ERASE_COLOR
+
+
+def _mask(rng, size, depth):
+    surf = pygame.Surface(size, 0, depth)
+    surf.fill(MASK_ERASE_COLOR)
+    for _ in range(rng.randint(0, 6)):
+        a = (rng.randint(-20, size[0] + 20), rng.randint(-20, size[1] + 20))
+        b = (rng.randint(-20, size[0] + 20), rng.randint(-20, size[1] + 20))
+        pygame.draw.line(surf, MASK_DRAW_COLOR, a, b, rng.randint(1, 9))
+    return surf
+
+
+def _pt(rng, size, margin):
+    return (rng.randint(-margin, size[0] + margin), rng.randint(-margin, size[1] + margin))
+
+
+def _door(rng, size):
+    n = rng.choice([1, 2, 3, 3, 4, 5, 8, 12])
+    if rng.random() < 0.3:      # partly or entirely off the surface
+        return [_pt(rng, size, 80) for _ in range(n)]
+    cx, cy = _pt(rng, size, 0)
+    r = rng.randint(1, 40)
+    return [(cx + rng.randint(-r, r), cy + rng.randint(-r, r)) for _ in range(n)]
+
+
+@pytest.mark.parametrize("depth", [24, 32])
+def test_bake_matches_reference(depth):
+    rng = random.Random(31 + depth)
+    for _ in range(200):
+        size = (rng.randint(1, 140), rng.randint(1, 100))
+        mask = _mask(rng, size, depth)
+        spawn = _pt(rng, size, 6) if rng.random() < 0.8 else None
+        nxt = [_pt(rng, size, 6) for _ in range(rng.randint(0, 30))]
+        back = [_pt(rng, size, 6) for _ in range(rng.randint(0, 30))]
+        if nxt and rng.random() < 0.3:
+            back.append(nxt[0])     # markers on top of each other
+        doors = [{"pts": _door(rng, size), "kind": rng.choice(["next", "back"])} for _ in range(rng.randint(0, 8))]
+        args = (mask, spawn, nxt, back, doors)
+        assert bake_mask(*args) is not None     # the array engine handles this format
+        fast = bake_mask_surface(*args)
+        ref = bake_mask_surface_reference(*args)
+        assert fast.get_size() == ref.get_size() and fast.get_bitsize() == ref.get_bitsize()
+        assert pygame.image.tobytes(fast, "RGBA") == pygame.image.tobytes(ref, "RGBA")
@@ -0,0 +1,52 @@
+import numpy as np
+
+from outlines import outlines_to_walls, outline_stats, simplify_outlines, trace_outlines
+
+
+def _disc_with_hole(w=120, h=90):
+    yy, xx = np.mgrid[0:h, 0:w]
+    r = np.hypot(xx - 60.5, yy - 45.5)
+    return (r < 40) & (r >= 15) | ((xx + yy > 150) & (xx - yy < 20))
+
+
+def _fill_centres(outlines, w, h):
+    # even-odd at pixel centres; works for the diagonal edges outlines_to_walls doesn't take
+    yy, xx = np.mgrid[0:h, 0:w] + 0.5
+    inside = np.zeros((h, w), bool)
+    for o in outlines:
+        for ring in [o["outer"]] + o["holes"]:
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+                if y1 == y2:
+                    continue
+                cross = (y1 <= yy) != (y2 <= yy)
+                xc = x1 + (yy - y1) * (x2 - x1) / (y2 - y1)
+                inside ^= cross & (xx < xc)
+    return inside
+
+
+def _near_boundary(walls):
+    # pixels within one step of a wall/empty edge
+    p = np.pad(walls, 1, mode="edge")
+    edge = np.zeros_like(walls)
+    for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+        edge |= p[1 + dy:1 + dy + walls.shape[0], 1 + dx:1 + dx + walls.shape[1]] != walls
+    return edge
+
+
+def test_trace_fills_back_exactly():
+    walls = _disc_with_hole()
+    out = trace_outlines(walls)
+    assert np.array_equal(outlines_to_walls(out, (walls.shape[1], walls.shape[0])), walls)
+
+
+def test_simplified_rings_drop_staircases_but_stay_close():
+    walls = _disc_with_hole()
+    exact = trace_outlines(walls)
+    simple = simplify_outlines(exact, 1.0)
+    assert outline_stats(simple)["outlines"] == outline_stats(exact)["outlines"]
+    assert outline_stats(simple)["holes"] == outline_stats(exact)["holes"]
+    assert outline_stats(simple)["vertices"] * 3 < outline_stats(exact)["vertices"]
+    assert np.array_equal(_fill_centres(exact, walls.shape[1], walls.shape[0]), walls)
+    back = _fill_centres(simple, walls.shape[1], walls.shape[0])
+    assert not np.any((back != walls) & ~_near_boundary(walls))
+    assert simplify_outlines(exact, 0) is exact
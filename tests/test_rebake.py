@@ -0,0 +1,61 @@
+import copy
+import random
+
+import pygame
+
+from persist import bake_mask_surface
+from raster import render_mask
+from rebake import dirty_regions, rebake_regions, region_hashes
+
+TILE = 64
+
+
+def _project(rng, w, h):
+    strokes = []
+    for i in range(rng.randint(4, 12)):
+        n = rng.randint(2, 6)
+        strokes.append({"mode": rng.choice(["poly", "straight_poly"]), "visible": True, "name": f"s{i}",
+                        "w": rng.randint(1, 24),
+                        "pts": [(rng.randint(-30, w + 30), rng.randint(-30, h + 30)) for _ in range(n)]})
+    doors = []
+    for i in range(rng.randint(1, 6)):
+        cx, cy, r = rng.randint(0, w), rng.randint(0, h), rng.randint(3, 50)
+        doors.append({"kind": rng.choice(["next", "back"]), "visible": True, "name": f"d{i}",
+                      "pts": [(cx + rng.randint(-r, r), cy + rng.randint(-r, r)) for _ in range(rng.randint(3, 7))]})
+    pt = lambda: (rng.randint(0, w - 1), rng.randint(0, h - 1))
+    return {"world_size": [w, h], "brush_w": rng.randint(2, 12), "strokes": strokes, "doors": doors,
+            "spawn_pos": pt(), "entry_next_spawns": [pt() for _ in range(3)], "entry_back_spawns": [pt()]}
+
+
+def _full(proj):
+    mask = render_mask(proj["world_size"], proj["strokes"], proj["brush_w"])
+    return bake_mask_surface(mask, proj["spawn_pos"], proj["entry_next_spawns"],
+                             proj["entry_back_spawns"], proj["doors"])
+
+
+def _edit(rng, proj):
+    new = copy.deepcopy(proj)
+    d = rng.choice(new["doors"])
+    dx, dy = rng.randint(-60, 60), rng.randint(-60, 60)
+    d["pts"] = [(x + dx, y + dy) for x, y in d["pts"]]
+    if rng.random() < 0.5:
+        st = rng.choice(new["strokes"])
+        st["pts"] = st["pts"] + [(st["pts"][-1][0] + rng.randint(-40, 40), st["pts"][-1][1] + rng.randint(-40, 40))]
+    if rng.random() < 0.3:
+        new["entry_next_spawns"][0] = (rng.randint(0, proj["world_size"][0] - 1), 0)
+    return new
+
+
+def test_rebake_after_moving_a_door_matches_full_bake():
+    rng = random.Random(39)
+    patched = 0
+    for _ in range(40):
+        proj = _project(rng, rng.randint(200, 520), rng.randint(150, 400))
+        new = _edit(rng, proj)
+        dirty = dirty_regions(region_hashes(proj, TILE), region_hashes(new, TILE))
+        assert dirty is not None
+        got = rebake_regions(_full(proj), new, dirty, TILE)
+        want = _full(new)
+        assert pygame.image.tobytes(got, "RGB") == pygame.image.tobytes(want, "RGB")
+        patched += len(dirty) < len(region_hashes(new, TILE))
+    assert patched > 20        # most edits really only touched part of the world
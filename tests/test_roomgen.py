@@ -0,0 +1,37 @@
+import random
+
+import numpy as np
+
+from regions import door_id_map
+from roomgen import render_room_module
+
+
+def _room(rng, w, h):
+    doors = []
+    for i in range(rng.randint(1, 20)):
+        cx, cy = rng.randint(-20, w + 20), rng.randint(-20, h + 20)
+        r = rng.randint(1, 40)
+        if rng.random() < 0.15:     # flat: a single row
+            pts = [(cx - r, cy), (cx + r, cy), (cx, cy)]
+        else:
+            pts = [(cx + rng.randint(-r, r), cy + rng.randint(-r, r)) for _ in range(rng.randint(3, 8))]
+        doors.append({"pts": pts, "kind": rng.choice(["next", "back"]), "name": f"d{i}"})
+    return {"world_size": [w, h], "strokes": [], "doors": doors, "spawn_pos": None,
+            "entry_next_spawns": [], "entry_back_spawns": [], "brush_w": 8}
+
+
+def test_door_at_matches_door_ids():
+    rng = random.Random(35)
+    for _ in range(20):
+        w, h = rng.randint(20, 160), rng.randint(20, 120)
+        proj = _room(rng, w, h)
+        ns = {}
+        exec(compile(render_room_module(np.zeros((h, w), bool), proj), "room", "exec"), ns)
+        ids, table = door_id_map((w, h), proj["doors"])
+        names = [None] + [t["name"] for t in table]
+        for y in range(h):
+            for x in range(w):
+                fx, fy = x + rng.random() * 0.999, y + rng.random() * 0.999
+                got = ns["door_at"](fx, fy)
+                assert (got["name"] if got else None) == names[ids[y, x]], (x, y)
+        assert ns["door_at"](-1, 0) is None and ns["door_at"](w, h - 1) is None
@@ -0,0 +1,22 @@
+import math
+
+import numpy as np
+import pygame
+
+from tiledmask import TiledMask
+
+
+def test_blit_scaled_has_no_seams_after_subpixel_pans():
+    m = TiledMask((1000, 700))
+    m.draw_stroke({'mode': 'poly', 'pts': [(0, 350), (1000, 350)], 'w': 800, 'visible': True}, 800)
+    assert m.stats()["tiles"] == m.stats()["cells"]
+    dst = pygame.Surface((800, 600))
+    z = 0.613
+    for ox, oy in [(0.0, 0.0), (0.3, 0.7), (10.6, 3.2), (-100.45, -50.9), (0.99, 0.01)]:
+        dst.fill((0, 255, 0))
+        m.blit_scaled(dst, (ox, oy), z, dst.get_rect())
+        a = pygame.surfarray.array3d(dst)
+        x0, x1 = max(0, math.ceil(ox)), min(800, math.floor(ox + 1000 * z))
+        y0, y1 = max(0, math.ceil(oy)), min(600, math.floor(oy + 700 * z))
+        gap = (a[x0:x1, y0:y1, 1] == 255) & (a[x0:x1, y0:y1, 0] == 0)
+        assert not np.any(gap), (ox, oy)
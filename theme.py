@@ -41,6 +41,8 @@ C_BTN_DANGER_PRS = (255, 200, 200)
 MASK_DRAW_COLOR     = (255, 255, 255)
 MASK_ERASE_COLOR    = (0, 0, 0)
 LINE_WIDTH_DEFAULT  = 3
+WIDTH_MIN           = 1
+WIDTH_MAX           = 150
 DOUBLE_CLICK_MS     = 400
 
 # ---------- Spawn & Entry Overlays ----------
@@ -0,0 +1,324 @@
+from __future__ import annotations
+import os, io, json, base64, hashlib, threading, time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from recents import recents_file_path
+from persist import read_project_meta, load_project_file, bake_mask_surface, project_meta
+from raster import render_mask
+from pagedbg import open_paged_background, wants_paging
+from atlas import load_bg
+
+THUMB_W, THUMB_H = 160, 90
+INDEX_NAME = "index.json"
+STAT_INTERVAL_S = 1.0
+
+
+def thumbs_dir() -> str:
+    d = os.path.join(os.path.dirname(recents_file_path()), "thumbs")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def thumb_fit(world_size: Tuple[int, int], box: Tuple[int, int] = (THUMB_W, THUMB_H)) -> Tuple[int, int]:
+    w, h = max(1, int(world_size[0])), max(1, int(world_size[1]))
+    k = min(box[0] / w, box[1] / h)
+    return max(1, int(w * k)), max(1, int(h * k))
+
+
+def _as_rgb(surf: pygame.Surface) -> pygame.Surface:
+    # display-free stand-in for convert(): smoothscale/colorkey want 24/32-bit
+    if surf.get_bitsize() in (24, 32):
+        return surf
+    out = pygame.Surface(surf.get_size(), 0, 24)
+    out.blit(surf, (0, 0))
+    return out
+
+
+def compose_thumbnail(
+    bg: Optional[pygame.Surface],
+    mask: Optional[pygame.Surface],
+    world_size: Tuple[int, int],
+    *,
+    alpha: int = 96,
+) -> pygame.Surface:
+
+    size = thumb_fit(world_size)
+    out = pygame.Surface(size, 0, 24)
+    out.fill((255, 255, 255))
+    if bg is not None:
+        out.blit(pygame.transform.smoothscale(_as_rgb(bg), size), (0, 0))
+    if mask is not None:
+        m = _as_rgb(pygame.transform.scale(mask, size))
+        m.set_colorkey((0, 0, 0))
+        m.set_alpha(max(alpha, 128))
+        out.blit(m, (0, 0))
+    return out
+
+
+def encode_png(surf: pygame.Surface) -> bytes:
+    buf = io.BytesIO()
+    pygame.image.save(surf, buf, "thumb.png")
+    return buf.getvalue()
+
+
+def make_thumbnail_png(
+    bg: Optional[pygame.Surface],
+    mask: Optional[pygame.Surface],
+    world_size: Tuple[int, int],
+    *,
+    alpha: int = 96,
+) -> Tuple[bytes, Tuple[int, int]]:
+
+    surf = compose_thumbnail(bg, mask, world_size, alpha=alpha)
+    return encode_png(surf), surf.get_size()
+
+
+def stats_line(meta: Dict[str, Any]) -> str:
+    ws = meta.get("world_size", [0, 0])
+    lay = meta.get("layers", {})
+    dr = meta.get("doors", {})
+    en = meta.get("entries", {})
+    return (f"{ws[0]}x{ws[1]}  walls {lay.get('strokes', 0)}"
+            f"  doors {dr.get('next', 0)}/{dr.get('back', 0)}"
+            f"  entries {en.get('next', 0)}/{en.get('back', 0)}"
+            + ("  spawn" if en.get("spawn") else ""))
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+class ThumbIndex:
+    """Small on-disk index (path -> header stats + thumbnail file) for the start menu.
+
+    Everything the start menu needs per frame comes from memory; stale or
+    missing entries are refreshed from project headers on a worker thread.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or thumbs_dir()
+        self.path = os.path.join(self.root, INDEX_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            data = {}
+        self._entries: Dict[str, Dict[str, Any]] = dict(data.get("entries", {}))
+        self._surfs: Dict[str, Optional[pygame.Surface]] = {}
+        self._surf_mtimes: Dict[str, Optional[int]] = {}   # thumb file mtime at load, for the menu's fit cache
+        self._keys: Dict[str, Optional[List[int]]] = {}
+        self._last_stat = 0.0
+        self._busy = False
+        self._dirty = False
+
+    def _thumb_file(self, project_path: str) -> str:
+        h = hashlib.sha1(os.path.abspath(project_path).encode("utf-8")).hexdigest()[:16]
+        return h + ".png"
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": 1, "entries": dict(self._entries)}
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as ex:
+            print("💥 Failed to write thumbnail index:", ex)
+
+    def put(
+        self,
+        project_path: str,
+        meta: Dict[str, Any],
+        thumb_png: Optional[bytes] = None,
+        *,
+        key: Optional[List[int]] = None,
+    ) -> None:
+        """Record fresh header stats (and thumbnail) for a project."""
+        meta = dict(meta)
+        thumb = meta.pop("thumb", None)
+        if thumb_png is None and thumb and thumb.get("png_b64"):
+            try:
+                thumb_png = base64.b64decode(thumb["png_b64"])
+            except ValueError:
+                thumb_png = None
+        fname = None
+        if thumb_png:
+            fname = self._thumb_file(project_path)
+            try:
+                with open(os.path.join(self.root, fname), "wb") as f:
+                    f.write(thumb_png)
+            except OSError:
+                fname = None
+        with self._lock:
+            old = self._entries.get(project_path, {})
+            if fname is None:
+                fname = old.get("thumb")
+            self._entries[project_path] = {"key": key or _stat_key(project_path), "meta": meta, "thumb": fname}
+            self._surfs.pop(project_path, None)
+            self._dirty = True
+
+    def _stale(self, paths: List[str]) -> List[str]:
+        now = time.monotonic()
+        if now - self._last_stat >= STAT_INTERVAL_S:
+            self._last_stat = now
+            self._keys = {p: _stat_key(p) for p in paths}
+        out = []
+        with self._lock:
+            for p in paths:
+                ent = self._entries.get(p)
+                key = self._keys.get(p)
+                if ent is None or (key is not None and ent.get("key") != key):
+                    out.append(p)
+        return out
+
+    def refresh_async(self, paths: List[str]) -> None:
+        """Re-read headers of stale entries on a worker; cheap when nothing changed."""
+        if self._busy:
+            return
+        stale = self._stale(paths)
+        if not stale:
+            return
+        self._busy = True
+
+        def _run():
+            try:
+                for p in stale:
+                    meta = read_project_meta(p)
+                    if meta is not None:
+                        self.put(p, meta)
+                    else:
+                        # no header (older file): leave it to the thumbnail pipeline
+                        with self._lock:
+                            self._entries[p] = {"key": _stat_key(p), "meta": None, "thumb": None}
+                            self._surfs.pop(p, None)
+                            self._dirty = True
+                self.save()
+            finally:
+                self._busy = False
+
+        threading.Thread(target=_run, name="thumb-index", daemon=True).start()
+
+    def needs_thumb(self, project_path: str) -> bool:
+        """True once the header refresh has run and found no thumbnail."""
+        with self._lock:
+            ent = self._entries.get(project_path)
+            if ent is None or ent.get("thumb"):
+                return False
+        key = self._keys.get(project_path)
+        return key is not None and ent.get("key") == key
+
+    def meta(self, project_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            ent = self._entries.get(project_path)
+            return ent.get("meta") if ent else None
+
+    def surface(self, project_path: str) -> Optional[pygame.Surface]:
+        if project_path in self._surfs:
+            return self._surfs[project_path]
+        with self._lock:
+            ent = self._entries.get(project_path)
+            fname = ent.get("thumb") if ent else None
+        if not fname:
+            return None
+        fpath = os.path.join(self.root, fname)
+        try:
+            surf: Optional[pygame.Surface] = pygame.image.load(fpath)
+            mtime: Optional[int] = os.stat(fpath).st_mtime_ns
+        except Exception:
+            surf, mtime = None, None
+        self._surfs[project_path] = surf
+        self._surf_mtimes[project_path] = mtime
+        return surf
+
+    def previews(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """path -> {"thumb": Surface|None, "thumb_mtime": int|None, "stats": str|None} for the start menu."""
+        self.refresh_async(paths)
+        out: Dict[str, Dict[str, Any]] = {}
+        for p in paths:
+            m = self.meta(p)
+            thumb = self.surface(p)
+            out[p] = {"thumb": thumb, "thumb_mtime": self._surf_mtimes.get(p), "stats": stats_line(m) if m else None}
+        return out
+
+
+# ---------- background thumbnail pipeline ----------
+def render_project_thumb(project_path: str) -> Dict[str, Any]:
+    """Worker job: decode bg, overlay the baked mask, downscale, PNG-encode.
+
+    Runs in a pool process, so it only uses display-free pygame calls. A
+    background big enough to be paged comes from its tile pyramid's
+    overview level instead of a full decode.
+    """
+    proj, bg_src = load_project_file(project_path, allow_bg_prompt=False)
+    world = proj["world_size"]
+    bg: Optional[pygame.Surface] = None
+    if bg_src is not None and bg_src[0] == "path" and wants_paging(bg_src[1]):
+        bg = open_paged_background(bg_src[1], world).scaled(thumb_fit(world))
+    else:
+        bg = load_bg(bg_src, world)
+    mask = render_mask(world, proj["strokes"], proj["brush_w"])
+    baked = bake_mask_surface(
+        mask, proj["spawn_pos"], proj["entry_next_spawns"], proj["entry_back_spawns"], proj["doors"]
+    )
+    png, size = make_thumbnail_png(bg, baked, world, alpha=proj["preview_alpha"])
+    meta = project_meta(proj)
+    return {"path": project_path, "key": _stat_key(project_path), "meta": meta, "png": png, "size": size}
+
+
+class ThumbPipeline:
+    """Generates missing thumbnails on a process pool and feeds them into a ThumbIndex."""
+
+    def __init__(self, index: ThumbIndex, max_workers: Optional[int] = None):
+        self.index = index
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._failed: Set[str] = set()
+
+    def _submit(self, path: str) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._inflight[path] = self._pool.submit(render_project_thumb, path)
+
+    def request(self, paths: List[str]) -> None:
+        """Queue every path whose index entry is fresh but still has no thumbnail."""
+        for p in paths:
+            if p in self._inflight or p in self._failed:
+                continue
+            if self.index.needs_thumb(p):
+                self._submit(p)
+
+    def poll(self) -> int:
+        """Collect finished jobs without blocking; returns how many arrived."""
+        done = [p for p, f in self._inflight.items() if f.done()]
+        for p in done:
+            fut = self._inflight.pop(p)
+            try:
+                res = fut.result()
+            except Exception as ex:
+                print(f"thumbnail failed for {p}: {ex}")
+                self._failed.add(p)
+                continue
+            self.index.put(p, res["meta"], res["png"], key=res["key"])
+        if done:
+            self.index.save()
+        return len(done)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._inflight.clear()
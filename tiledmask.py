@@ -0,0 +1,213 @@
+from __future__ import annotations
+import itertools, math
+from typing import Any, Dict, Iterator, Optional, Set, Tuple, cast
+
+import numpy as np
+import pygame
+
+from raster import draw_stroke_on, stroke_bounds, stroke_pieces
+from theme import LINE_WIDTH_DEFAULT, MASK_DRAW_COLOR, MASK_ERASE_COLOR
+
+# The editor's working wall mask, stored sparsely: the world is a grid of
+# MASK_TILE cells and a cell only gets a surface once something is drawn in
+# it, so memory follows the wall area instead of the world size. Unallocated
+# cells read as MASK_ERASE_COLOR. Tiles are 8-bit with a two-color palette
+# (a quarter of the memory and scaling traffic of 32-bit ones); the colors
+# only come back when a tile is blitted onto a full-color surface. surface()
+# and scaled() assemble plain surfaces for baking and thumbnails;
+# blit_scaled() is the viewport's layer.
+
+MASK_TILE = 256
+SCRATCH_MAX_PX = 1 << 20        # strokes with bigger bounds are drawn segment by segment
+
+_revs = itertools.count(1)
+_PALETTE = [MASK_ERASE_COLOR, MASK_DRAW_COLOR] + [MASK_ERASE_COLOR] * 254    # index 0 erase, 1 wall
+
+
+def _to_display(surf: pygame.Surface) -> pygame.Surface:
+    return surf.convert() if pygame.display.get_surface() is not None else surf
+
+
+def _new_surface(size: Tuple[int, int]) -> pygame.Surface:
+    return _to_display(pygame.Surface(size))
+
+
+def _new_tile(size: Tuple[int, int]) -> pygame.Surface:
+    surf = pygame.Surface(size, 0, 8)      # new surfaces are zeroed: index 0, erase
+    surf.set_palette(_PALETTE)
+    return surf
+
+
+def stroke_scratches(
+    st: Dict[str, Any], default_w: int, world: pygame.Rect, area: Optional[pygame.Rect] = None
+) -> Iterator[Tuple[pygame.Rect, pygame.Rect, pygame.Surface]]:
+    """(bounds, on-world part, scratch) for each part of st that reaches area.
+
+    Each part is drawn on a scratch surface around it, clipped only by the
+    world edge: pygame rasterizes a thick line differently depending on
+    where it is cut. Blitting the scratches at their bounds paints st pixel
+    for pixel as raster.draw_stroke_on would on one world-sized surface;
+    the erase color is their colorkey.
+    """
+    if not st.get('pts'):
+        return
+    b = stroke_bounds(st, default_w)
+    parts = [st] if b.w * b.h <= SCRATCH_MAX_PX else stroke_pieces(st, default_w)
+    for part in parts:
+        r = stroke_bounds(part, default_w)
+        hit = r.clip(world)
+        if hit.w <= 0 or hit.h <= 0 or (area is not None and not hit.colliderect(area)):
+            continue
+        scratch = _new_tile(r.size)
+        scratch.set_clip(hit.move(-r.x, -r.y))      # the world edge cuts lines like it does on one surface
+        moved = dict(part, pts=[(int(x) - r.x, int(y) - r.y) for (x, y) in part['pts']])
+        draw_stroke_on(scratch, moved, MASK_DRAW_COLOR, default_w)
+        scratch.set_colorkey(MASK_ERASE_COLOR)
+        yield r, hit, scratch
+
+
+class TiledMask:
+    def __init__(self, size: Tuple[int, int], tile: int = MASK_TILE):
+        self.size = (int(size[0]), int(size[1]))
+        self.tile = tile
+        self.cols = -(-self.size[0] // tile)
+        self.rows = -(-self.size[1] // tile)
+        self.tiles: Dict[Tuple[int, int], pygame.Surface] = {}
+        self.revs: Dict[Tuple[int, int], int] = {}      # new number whenever a tile's pixels change
+        self._shared: Set[Tuple[int, int]] = set()       # tiles still owned by the mask they came from
+        self._scaled: Dict[Tuple[int, int], Tuple[int, pygame.Surface]] = {}
+        self._scaled_zoom = 0.0
+        self._erase: Optional[pygame.Surface] = None
+
+    def get_size(self) -> Tuple[int, int]:
+        return self.size
+
+    def cell_rect(self, cx: int, cy: int) -> pygame.Rect:
+        t = self.tile
+        return pygame.Rect(cx * t, cy * t, t, t).clip(pygame.Rect(0, 0, *self.size))
+
+    def clear(self) -> None:
+        self.tiles.clear(); self.revs.clear(); self._shared.clear()
+
+    def assign(self, other: "TiledMask") -> None:
+        """Become a copy of other; tiles are shared until one side draws on them."""
+        self.tiles = dict(other.tiles)
+        self.revs = dict(other.revs)
+        self._shared = set(other.tiles)
+        other._shared.update(other.tiles)
+
+    def _writable(self, key: Tuple[int, int]) -> pygame.Surface:
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = _new_tile(self.cell_rect(*key).size)
+        elif key in self._shared:
+            tile = self.tiles[key] = tile.copy()
+            self._shared.discard(key)
+        self.revs[key] = next(_revs)
+        return tile
+
+    def draw_stroke(self, st: Dict[str, Any], default_w: int = LINE_WIDTH_DEFAULT) -> None:
+        """Paint st as wall, pixel for pixel as raster.draw_stroke_on would (see stroke_scratches)."""
+        for r, hit, scratch in stroke_scratches(st, default_w, pygame.Rect(0, 0, *self.size)):
+            t = self.tile
+            for cy in range(hit.top // t, (hit.bottom - 1) // t + 1):
+                for cx in range(hit.left // t, (hit.right - 1) // t + 1):
+                    self._writable((cx, cy)).blit(scratch, (r.x - cx * t, r.y - cy * t))
+
+    def tile_bits(self) -> Dict[Tuple[int, int], bytes]:
+        """Each allocated tile's wall pixels, row by row and bit-packed (to hand a mask across processes)."""
+        out: Dict[Tuple[int, int], bytes] = {}
+        for key, tile in self.tiles.items():
+            px = cast(Any, pygame.surfarray.pixels2d(tile))
+            out[key] = np.packbits(px.T == 1).tobytes()
+            del px
+        return out
+
+    def set_tile_bits(self, key: Tuple[int, int], packed: bytes) -> None:
+        """Load one tile from its tile_bits() entry."""
+        r = self.cell_rect(*key)
+        walls = np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=r.w * r.h).reshape(r.h, r.w)
+        if walls.any():
+            px = cast(Any, pygame.surfarray.pixels2d(self._writable(key)))
+            px[...] = walls.T
+            del px
+
+    def surface(self) -> pygame.Surface:
+        """The whole mask as one world-sized surface (for baking and export)."""
+        out = _new_surface(self.size)
+        out.fill(MASK_ERASE_COLOR)
+        for (cx, cy), tile in self.tiles.items():
+            out.blit(tile, (cx * self.tile, cy * self.tile))
+        return out
+
+    def scaled(self, size: Tuple[int, int]) -> pygame.Surface:
+        """The whole mask scaled to size, built tile by tile (for thumbnails)."""
+        out = pygame.Surface(size)
+        out.fill(MASK_ERASE_COLOR)
+        kx = size[0] / self.size[0]; ky = size[1] / self.size[1]
+        for (cx, cy), tile in self.tiles.items():
+            r = self.cell_rect(cx, cy)
+            x0, x1 = math.floor(r.left * kx), math.floor(r.right * kx)
+            y0, y1 = math.floor(r.top * ky), math.floor(r.bottom * ky)
+            if x1 > x0 and y1 > y0:
+                out.blit(pygame.transform.scale(tile, (x1 - x0, y1 - y0)), (x0, y0))
+        return out
+
+    def _erase_block(self, w: int, h: int) -> pygame.Surface:
+        if self._erase is None or self._erase.get_width() < w or self._erase.get_height() < h:
+            ew, eh = self._erase.get_size() if self._erase is not None else (0, 0)
+            self._erase = pygame.Surface((max(w, ew), max(h, eh)))
+            self._erase.fill(MASK_ERASE_COLOR)
+        return self._erase
+
+    def blit_scaled(self, dst: pygame.Surface, origin: Tuple[float, float], zoom: float,
+                    area: pygame.Rect, alpha: Optional[int] = None) -> None:
+        """Draw the mask at zoom, world origin at origin on dst, limited to area.
+
+        Only cells under area are drawn. Each cell spans floor()ed screen
+        edges shared with its neighbours, so its size can be a pixel off
+        t*zoom depending on the origin's fraction; scaled tiles are kept per
+        zoom until their pixels or that size change. Empty cells are
+        erase-colored blocks, so the result looks like the whole mask scaled
+        in one piece.
+        """
+        if zoom != self._scaled_zoom:
+            self._scaled.clear(); self._scaled_zoom = zoom
+        ox, oy = origin
+        W, H = self.size
+        t = self.tile
+        wx0 = max(0, math.floor((area.left - ox) / zoom)); wx1 = min(W, math.ceil((area.right - ox) / zoom))
+        wy0 = max(0, math.floor((area.top - oy) / zoom)); wy1 = min(H, math.ceil((area.bottom - oy) / zoom))
+        if wx1 <= wx0 or wy1 <= wy0:
+            return
+        for cy in range(wy0 // t, (wy1 - 1) // t + 1):
+            y0 = math.floor(oy + cy * t * zoom); y1 = math.floor(oy + min((cy + 1) * t, H) * zoom)
+            for cx in range(wx0 // t, (wx1 - 1) // t + 1):
+                x0 = math.floor(ox + cx * t * zoom); x1 = math.floor(ox + min((cx + 1) * t, W) * zoom)
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                key = (cx, cy)
+                tile = self.tiles.get(key)
+                if tile is None:
+                    cell = pygame.Rect(x0, y0, x1 - x0, y1 - y0).clip(area)
+                    if cell.w > 0 and cell.h > 0:
+                        block = self._erase_block(cell.w, cell.h)
+                        block.set_alpha(alpha)
+                        dst.blit(block, cell.topleft, pygame.Rect(0, 0, cell.w, cell.h))
+                    continue
+                ent = self._scaled.get(key)
+                if ent is None or ent[0] != self.revs[key] or ent[1].get_size() != (x1 - x0, y1 - y0):
+                    # scaled in 8 bits, colored once here: palette blits with alpha are slow
+                    scaled = _to_display(pygame.transform.scale(tile, (x1 - x0, y1 - y0)))
+                    ent = self._scaled[key] = (self.revs[key], scaled)
+                ent[1].set_alpha(alpha)
+                dst.blit(ent[1], (x0, y0))
+
+    def stats(self) -> Dict[str, int]:
+        """Allocated tiles and their bytes next to what one full-size, full-color surface would take."""
+        return {
+            "tiles": len(self.tiles),
+            "cells": self.cols * self.rows,
+            "bytes": sum(s.get_width() * s.get_height() for s in self.tiles.values()),
+            "full_bytes": self.size[0] * self.size[1] * _new_surface((1, 1)).get_bytesize(),
+        }
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import os, json
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
+
+import numpy as np
+import pygame
+
+# Chunked export for big worlds: the baked mask (and background) cut into
+# fixed-size tiles under <base>_tiles/, plus a manifest mapping "cx,cy" chunk
+# coordinates to files. Mask tiles with no baked pixel are not written; a
+# background tile that is one flat color is stored as that color instead.
+
+TILE_SIZE = 512
+TILES_MANIFEST = "manifest.json"
+
+
+def tiles_dir(manifest_path: str) -> str:
+    return os.path.dirname(manifest_path)
+
+
+def tiles_manifest_path(png_path: str) -> str:
+    return os.path.join(os.path.splitext(png_path)[0] + "_tiles", TILES_MANIFEST)
+
+
+def _rgb_ints(surf: pygame.Surface) -> np.ndarray:
+    """(h, w) 0xRRGGBB per pixel, whatever the surface format."""
+    rgb = cast(Any, pygame.surfarray.pixels3d(surf)) if surf.get_bitsize() in (24, 32) \
+        else pygame.surfarray.array3d(surf)
+    out = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+    del rgb
+    return out.T
+
+
+def _has_pixels(surf: pygame.Surface, r: pygame.Rect) -> bool:
+    # baked masks are black wherever nothing was painted
+    px = cast(Any, pygame.surfarray.pixels3d(surf.subsurface(r)))
+    found = bool(px.any())
+    del px
+    return found
+
+
+def tile_grid(size: Tuple[int, int], tile: int = TILE_SIZE) -> Tuple[int, int]:
+    w, h = size
+    return -(-w // tile), -(-h // tile)
+
+
+def tile_rect(cx: int, cy: int, size: Tuple[int, int], tile: int = TILE_SIZE) -> pygame.Rect:
+    return pygame.Rect(cx * tile, cy * tile, tile, tile).clip(pygame.Rect(0, 0, *size))
+
+
+def _save_tile(surf: pygame.Surface, r: pygame.Rect, path: str) -> None:
+    tmp = path + ".tmp.png"
+    pygame.image.save(surf.subsurface(r), tmp)
+    os.replace(tmp, path)
+
+
+def write_tiles(
+    manifest_path: str,
+    baked: pygame.Surface,
+    bg: Optional[pygame.Surface] = None,
+    tile: int = TILE_SIZE,
+    only: Optional[Set[int]] = None,
+) -> Dict[str, Any]:
+    """Write mask_<cx>_<cy>.png / bg_<cx>_<cy>.png tiles and the manifest; returns tile counts.
+
+    only (row-major tile indices) limits the files rewritten to those tiles;
+    every other chunk keeps its entry from the existing manifest, and so do
+    the background tiles when bg is None. Tiles left over from an earlier
+    export that are no longer needed are removed.
+    """
+    d = tiles_dir(manifest_path)
+    old: Dict[str, Dict[str, Any]] = {}
+    if only is not None:
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                old = json.load(f).get("chunks", {})
+        except (OSError, ValueError):
+            only = None
+    os.makedirs(d, exist_ok=True)
+    size = baked.get_size()
+    cols, rows = tile_grid(size, tile)
+
+    chunks: Dict[str, Dict[str, Any]] = {}
+    written = set()
+    n_written = 0
+    for cy in range(rows):
+        for cx in range(cols):
+            key = f"{cx},{cy}"
+            if only is not None and cy * cols + cx not in only:
+                if key in old:
+                    chunks[key] = old[key]
+                    written.update(v for k, v in old[key].items() if k in ("mask", "bg"))
+                continue
+            r = tile_rect(cx, cy, size, tile)
+            ent: Dict[str, Any] = {}
+            if _has_pixels(baked, r):
+                ent["mask"] = f"mask_{cx}_{cy}.png"
+                _save_tile(baked, r, os.path.join(d, ent["mask"]))
+                n_written += 1
+            if bg is not None:
+                ints = _rgb_ints(bg.subsurface(r))
+                if ints.min() == ints.max():
+                    c = int(ints.flat[0])
+                    ent["bg_color"] = [c >> 16, (c >> 8) & 255, c & 255]
+                else:
+                    ent["bg"] = f"bg_{cx}_{cy}.png"
+                    _save_tile(bg, r, os.path.join(d, ent["bg"]))
+                    n_written += 1
+            elif only is not None:
+                ent.update({k: v for k, v in old.get(key, {}).items() if k in ("bg", "bg_color")})
+            if ent:
+                chunks[key] = ent
+                written.update(v for k, v in ent.items() if k in ("mask", "bg"))
+
+    for name in os.listdir(d):
+        if name.endswith(".png") and (name.startswith("mask_") or name.startswith("bg_")) and name not in written:
+            os.remove(os.path.join(d, name))
+    data = {"w": size[0], "h": size[1], "tile": tile, "cols": cols, "rows": rows, "chunks": chunks}
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, manifest_path)
+    n_mask = sum(1 for e in chunks.values() if "mask" in e)
+    return {"tiles": cols * rows, "mask_tiles": n_mask, "bg_tiles": sum(1 for e in chunks.values() if "bg" in e),
+            "files_written": n_written}
+
+
+def chunks_near(manifest: Dict[str, Any], x: float, y: float, radius: float) -> List[Tuple[int, int, Dict[str, Any]]]:
+    """Runtime helper: (cx, cy, entry) for every written chunk within radius px of (x, y)."""
+    t = manifest["tile"]
+    cx0 = max(int((x - radius) // t), 0); cx1 = min(int((x + radius) // t), manifest["cols"] - 1)
+    cy0 = max(int((y - radius) // t), 0); cy1 = min(int((y + radius) // t), manifest["rows"] - 1)
+    out = []
+    for cy in range(cy0, cy1 + 1):
+        for cx in range(cx0, cx1 + 1):
+            ent = manifest["chunks"].get(f"{cx},{cy}")
+            if ent:
+                out.append((cx, cy, ent))
+    return out
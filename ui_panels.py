@@ -153,6 +153,10 @@ def draw_status(
         except Exception:
             pass
     right += f"  Doors►:{n_next}  ◄:{n_back}   Entry►:{n_en}  ◄:{n_eb}"
+    if info.get("mask_tiles"):
+        mt = info["mask_tiles"]
+        right += (f"  Mask:{mt['tiles']}/{mt['cells']} tiles"
+                  f" {mt['bytes'] / 2**20:.0f}/{mt['full_bytes'] / 2**20:.0f} MB")
 
     text(screen, left_msg, (8, WIN_H - STATUS_H + 3), C_TEXT_DIM, f_small)
     text(screen, right, (WIN_W - 780, WIN_H - STATUS_H + 3), C_TEXT_DIM, f_small)
@@ -181,6 +185,7 @@ def draw_left_toolbar(
     items = [
         ("brush", "B", "Brush (Create)"),
         ("line",  "L", "Line (Create)"),
+        ("freehand", "F", "Freehand (Create)"),
         ("door_next", "O", "Door► (Next)"),
         ("door_back", "U", "Door◄ (Back)"),
         ("move", "Mv", "Move (Edit)"),
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import math
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pygame
+
+# Rescaling the editor's world-sized layers (background and edge map)
+# for a new zoom, off the UI thread: pygame.transform.scale releases the GIL,
+# so one worker thread is enough. Finished levels are kept (within a pixel
+# budget) so zooming back is instant; until a level is ready the view shows
+# the closest cached one stretched, scaling only the part that is on screen.
+
+ZOOM_CACHE_MAX_PX = 48_000_000      # scaled pixels kept across all levels and layers (the current one always stays)
+
+
+def scale_surface(src: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+    """pygame.transform.scale, but without holding the GIL while the result is allocated.
+
+    pygame allocates (and zero-fills) a new surface with the GIL held, which
+    for a big zoom level stalls the UI about as long as the scale itself.
+    32-bit RGB sources are scaled into a numpy buffer instead, wrapped as a
+    BGRA surface (same byte layout, padding byte set to opaque).
+    """
+    rgb = src.get_masks()[:3] == (0xFF0000, 0x00FF00, 0x0000FF)
+    if src.get_bitsize() != 32 or not rgb or src.get_masks()[3] not in (0, 0xFF000000) or min(size) <= 0:
+        return pygame.transform.scale(src, size)
+    w, h = size
+    buf = np.empty((h, w, 4), dtype=np.uint8)
+    out = pygame.image.frombuffer(buf, (w, h), "BGRA")     # keeps buf alive
+    pygame.transform.scale(src, (w, h), out)
+    if not src.get_masks()[3]:
+        buf[..., 3] = 255
+    return out
+
+
+class ZoomScaler:
+    def __init__(self, max_px: int = ZOOM_CACHE_MAX_PX):
+        self.max_px = max_px
+        self.rev = 0                    # bumped whenever a level is stored
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[Tuple[float, str], Tuple[Any, Future]] = {}
+        # (zoom, layer) -> (source key, scaled surface), least recently used first
+        self._cache: "OrderedDict[Tuple[float, str], Tuple[Any, pygame.Surface]]" = OrderedDict()
+
+    def get(self, zoom: float, name: str, key: Any) -> Optional[pygame.Surface]:
+        ent = self._cache.get((zoom, name))
+        if ent is None or ent[0] != key:
+            return None
+        self._cache.move_to_end((zoom, name))
+        return ent[1]
+
+    def nearest(self, zoom: float, name: str, key: Any) -> Optional[Tuple[float, pygame.Surface]]:
+        """The cached level of this layer closest to zoom (by ratio), if any."""
+        best = None
+        for (z, n), (k, surf) in self._cache.items():
+            if n == name and k == key and (best is None or abs(math.log(z / zoom)) < abs(math.log(best[0] / zoom))):
+                best = (z, surf)
+        return best
+
+    def put(self, zoom: float, name: str, key: Any, surf: pygame.Surface) -> None:
+        self._cache[(zoom, name)] = (key, surf)
+        self.rev += 1
+        self._cache.move_to_end((zoom, name))
+        # over budget, drop the least recently used levels; never the one just stored, however big
+        total = sum(s.get_width() * s.get_height() for _, s in self._cache.values())
+        for z, n in [k for k in self._cache if k[0] != zoom]:
+            if total <= self.max_px:
+                break
+            _, old = self._cache.pop((z, n))
+            total -= old.get_width() * old.get_height()
+
+    def request(self, zoom: float, size: Tuple[int, int], layers: Dict[str, Tuple[Any, pygame.Surface]]) -> None:
+        """Scale each (key, source) layer to size on the worker, unless cached or already queued.
+
+        Queued jobs for any other zoom are cancelled: the user has scrolled past them.
+        So is a queued job for the same layer with an older source.
+        Layers should be keyed by their source surface, not by a counter that
+        every edit bumps, or each edit would queue another full scale.
+        """
+        for (z, name), (_, fut) in list(self._jobs.items()):
+            if z != zoom and fut.cancel():
+                del self._jobs[(z, name)]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zoomscale")
+        for name, (key, src) in layers.items():
+            job = self._jobs.get((zoom, name))
+            if self.get(zoom, name, key) is not None or (job is not None and job[0] == key):
+                continue
+            if job is not None:
+                job[1].cancel()         # superseded source; if it is already running its result is dropped
+            self._jobs[(zoom, name)] = (key, self._pool.submit(scale_surface, src, size))
+
+    def pending(self, zoom: float) -> bool:
+        return any(z == zoom for z, _ in self._jobs)
+
+    def poll(self) -> bool:
+        """Move finished jobs into the cache; True when any arrived."""
+        done = [k for k, (_, fut) in self._jobs.items() if fut.done()]
+        for k in done:
+            key, fut = self._jobs.pop(k)
+            try:
+                self.put(k[0], k[1], key, fut.result())
+            except Exception as ex:
+                print(f"⚠️ rescale failed at zoom {k[0]:.2f}: {ex}")
+        return bool(done)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._jobs.clear()
+
+
+def blit_stretched(
+    dst: pygame.Surface, surf: pygame.Surface, src_zoom: float, zoom: float,
+    origin: Tuple[float, float], area: pygame.Rect, alpha: Optional[int] = None,
+) -> None:
+    """Draw surf (scaled for src_zoom, world origin at origin on dst) as if scaled for zoom.
+
+    Only the part of surf that lands in area is scaled, so the cost follows
+    the view size rather than the world size.
+    """
+    k = zoom / src_zoom
+    sx0 = max(0, math.floor((area.x - origin[0]) / k)); sy0 = max(0, math.floor((area.y - origin[1]) / k))
+    sx1 = min(surf.get_width(), math.ceil((area.right - origin[0]) / k) + 1)
+    sy1 = min(surf.get_height(), math.ceil((area.bottom - origin[1]) / k) + 1)
+    if sx1 <= sx0 or sy1 <= sy0:
+        return
+    piece = surf.subsurface(pygame.Rect(sx0, sy0, sx1 - sx0, sy1 - sy0))
+    dx0 = origin[0] + sx0 * k; dy0 = origin[1] + sy0 * k
+    w = max(1, round(origin[0] + sx1 * k - dx0)); h = max(1, round(origin[1] + sy1 * k - dy0))
+    out = pygame.transform.scale(piece, (w, h))
+    if alpha is not None:
+        out.set_alpha(alpha)
+    dst.blit(out, (round(dx0), round(dy0)))